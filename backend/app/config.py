@@ -1,32 +1,137 @@
+import logging
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./sedori.db"
+    # SQLite のストレージプロファイル: "wal"（WAL + 読み書きのエンジン分離）/ "legacy"（既定のまま）
+    sqlite_profile: str = "wal"
+    sqlite_synchronous: str = "NORMAL"         # WAL なら NORMAL でも壊れない（電源断で直近の書き込みを失うだけ）
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 読み取りをメモリマップで行う上限（バイト）
+    sqlite_cache_size_kb: int = 64 * 1024      # 接続ごとのページキャッシュ
+    sqlite_busy_timeout_ms: int = 5000         # ロック待ちの上限（超えたら database is locked）
+    # 書き込みはプロセスごとに1本の接続に直列化する前提（SQLite の書き込みは DB 全体で同時に1つ）。
+    # 長い書き込みリクエストがあると他の書き込みは接続の空き待ちになるので、待ちの上限は短くし、
+    # 超えたら 503（再試行してよい）を返す。プロセス間の競合は busy_timeout で待つ
+    sqlite_writer_pool_size: int = 1           # 書き込み用の接続数（1 = 直列化）
+    sqlite_writer_pool_timeout_seconds: int = 5
+    sqlite_reader_pool_size: int = 8           # GET エンドポイント用の読み取り接続数
+    sqlite_maintenance_interval_minutes: int = 30  # WAL チェックポイント・PRAGMA optimize の間隔
     yahoo_scrape_interval_seconds: int = 600
-    yahoo_request_delay_min: int = 3
-    yahoo_request_delay_max: int = 8
-    # 対話的な検索（拡張機能/リサーチ画面）用の短い遅延
-    yahoo_search_delay_min: float = 0.3
-    yahoo_search_delay_max: float = 1.0
     # 検索結果キャッシュのTTL（秒）
     yahoo_search_cache_ttl: int = 600
-    # Amazon
-    amazon_request_delay_min: int = 3
-    amazon_request_delay_max: int = 8
+    # TTL切れ後もこの秒数は古い結果を即返し、裏で再取得する（stale-while-revalidate）
+    yahoo_search_cache_stale_ttl: int = 1800
+    # 裏での再取得に失敗したら、この秒数は同じキーワードを取り直さない
+    yahoo_search_cache_retry_after: int = 120
+    # 検索結果キャッシュの上限（件数・おおよそのバイト数）。超えたら古い順に追い出す
+    yahoo_search_cache_max_entries: int = 2000
+    yahoo_search_cache_max_bytes: int = 32 * 1024 * 1024
+    # スクレイピング結果の永続キャッシュ（再起動・複数ワーカーで共有するSQLiteファイル。空で無効）
+    scrape_cache_path: str = "./scrape_cache.db"
+    # 永続キャッシュの種別ごとのTTL（秒）。監視用の詳細は価格鮮度のため短く
+    scrape_cache_ttl_search: int = 600
+    scrape_cache_ttl_detail: int = 60
+    scrape_cache_ttl_history: int = 21600
+    scrape_cache_ttl_amazon: int = 3600
+    # ブラウザプール（Chromiumプロセス数 × 各プロセスのページ数 = 同時スクレイプ上限）
+    # リサーチの同時実行数（ヤフオク5 + Amazon3）を下回らないこと
+    browser_pool_browsers: int = 2
+    browser_pool_pages_per_browser: int = 4
+    browser_pool_max_uses: int = 50  # この回数使ったページはコンテキストごと作り直す
+    browser_pool_prewarm: bool = False  # 起動時にページを事前作成する
+    # ブラウザを使わずHTTP+HTMLパースで先に取得し、取れない時だけPlaywrightで描画する
+    scrape_http_first: bool = True
+    # ホスト単位のレート制限（全リクエスト合算のreq/秒。429/503/CAPTCHAで自動減速）
+    rate_limit_default_rps: float = 0.5
+    yahoo_rate_limit_rps: float = 1.0
+    amazon_rate_limit_rps: float = 0.2
+    rate_limit_burst: int = 3
+    # 成功ごとのレート加算幅と、加速の上限（設定レートに対する倍率。1.0 = 設定値まで）
+    rate_limit_increase_step: float = 0.05
+    rate_limit_max_ratio: float = 1.0
+    # 旧設定（リクエストごとのランダム遅延・秒）。指定されていればレート制限に換算する
+    yahoo_request_delay_min: float | None = None
+    yahoo_request_delay_max: float | None = None
+    amazon_request_delay_min: float | None = None
+    amazon_request_delay_max: float | None = None
+    yahoo_search_delay_min: float | None = None  # 無効（ホスト単位のレート制限に統合）
+    yahoo_search_delay_max: float | None = None  # 無効（同上）
+    # サーキットブレーカー: 連続失敗がこの回数に達したら一定時間そのホストへは即失敗
+    circuit_breaker_threshold: int = 5
+    circuit_breaker_cooldown_seconds: int = 300
+    # AmazonのHTTP取得がこの回数連続で弾かれたら（CAPTCHA等）、一定時間ブラウザだけで取得する
+    amazon_http_probe_max_blocks: int = 3
+    amazon_http_probe_cooldown_seconds: int = 1800
     # Scheduler
     scheduler_interval_minutes: int = 10
     scheduler_auto_start: bool = False
-    # Amazon価格リフレッシュ（スケジューラー）
+    # 監視チェックの同時実行数（全体）と、サイトごとの同時取得数
+    scheduler_check_concurrency: int = 6
+    scheduler_yahoo_concurrency: int = 4
+    scheduler_amazon_concurrency: int = 2      # Amazon価格リフレッシュの同時取得数
+    scheduler_item_timeout_seconds: int = 180  # 1件のチェックがこれを超えたら打ち切る
+    # 複数プロセス（uvicorn --workers）でもスケジューラーのジョブを実行するのは
+    # DB上のリースを持つ1プロセスだけ。リーダーが止まると TTL 経過後に他が引き継ぐ
+    scheduler_lease_ttl_seconds: int = 30
+    scheduler_lease_heartbeat_seconds: int = 10
+    # 優先度付きポーリング: tick ごとに「次回チェック時刻」を過ぎた件だけ取得する
+    scheduler_tick_seconds: int = 60
+    scheduler_max_checks_per_tick: int = 50  # 1 tick で取得する上限（残りは次の tick へ）
+    polling_min_interval_minutes: float = 2    # 次回チェックまでの最短間隔
+    polling_max_interval_minutes: float = 360  # 最長間隔（終了が遠い・動きのない件）
+    polling_deadline_divisor: float = 8        # 残り時間をこの数で割った値を基本間隔にする
+    polling_active_window_hours: float = 6     # この時間内に価格が動いた件は間隔を詰める
+    polling_threshold_band: float = 5.0        # 利益率がチャンス閾値 ±この幅（%）なら間隔を詰める
+    # 終了間際レーン: 終了前 final_lane_window_minutes 分に入った件は通常の巡回から外し、
+    # 短い間隔で価格だけを追って終了を確認してから最終価格で確定させる
+    final_lane_enabled: bool = True
+    final_lane_window_minutes: int = 15
+    final_lane_interval_seconds: int = 20
+    final_lane_concurrency: int = 2            # 通常の巡回とは別枠の同時取得数
+    final_lane_timeout_seconds: int = 60
+    final_lane_settle_seconds: int = 120       # 終了表示が取れなくても終了時刻からこの秒数で確定
+    final_lane_max_overrun_minutes: int = 30   # 終了時刻をこれ以上過ぎた件は通常の巡回に戻す
+    # ジョブキュー（DB）: 有効にするとAPI側は巡回・調査をキューに積むだけになり、
+    # `python -m app.worker` のワーカープロセス（複数可）が取り出して実行する
+    job_queue_enabled: bool = False
+    job_visibility_timeout_seconds: int = 300  # リースの有効期限（実行中は延長し続ける）
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: int = 30        # 失敗後の再実行までの待ち（回数ごとに倍）
+    job_retention_hours: int = 24              # 完了・失敗したジョブを残す時間
+    worker_concurrency: int = 4                # 1ワーカーが同時に実行するジョブ数
+    worker_poll_interval_seconds: float = 2.0  # キューが空の時の問い合わせ間隔
+    # Amazon価格リフレッシュ（スケジューラー）: ヤフオクの巡回とは別のジョブで、
+    # 古くて利益が見込める商品から順に amazon_refresh_batch_size 件ずつ更新する
     amazon_refresh_enabled: bool = True
     amazon_refresh_interval_hours: int = 12  # この時間より古い価格だけ再取得
+    amazon_refresh_tick_minutes: int = 5
+    amazon_refresh_batch_size: int = 20
+    # 取得に失敗した商品は次の再取得まで待つ（連続失敗ごとに倍、上限あり）。
+    # 取れない商品がバッチを占領して他の商品が更新されなくなるのを防ぐ
+    amazon_refresh_failure_backoff_minutes: int = 60
+    amazon_refresh_failure_max_backoff_hours: int = 24
     # 価格差「仕入れチャンス」検出の閾値
     chance_min_profit_rate: float = 15.0   # 利益率（%）以上で通知
     chance_min_profit_amount: int = 1000   # かつ利益額（円）以上で通知
     chance_default_shipping: int = 800     # 利益計算に使う送料
+    # 価格スナップショットの保持: 生の行はこの日数を過ぎたら時間単位、
+    # 時間単位はこの日数を過ぎたら日単位の集約（min / max / close）にまとめる
+    snapshot_raw_retention_days: int = 7
+    snapshot_hourly_retention_days: int = 90
+    snapshot_retention_interval_hours: int = 6
     # Keepa（Amazon価格履歴API）将来連携用。.env に KEEPA_API_KEY を入れると有効化
     keepa_api_key: str = ""
     keepa_domain: int = 5  # Amazonドメイン: 5=co.jp（日本）
+    # Keepaが有効なら Amazon価格リフレッシュは100件ずつのバッチ取得で行う（ブラウザは取れなかった分だけ）
+    keepa_refresh_max_asins: int = 1000  # 1回のリフレッシュで Keepa に問い合わせる上限
+    keepa_min_tokens: int = 10           # バッチ取得で使い切らずに残すトークン（画面からの個別照会用）
+    keepa_batch_window_ms: int = 50      # 単品の同時リクエストをまとめて送るまでの待ち時間
+    keepa_max_wait_seconds: float = 10.0  # トークン回復をこれ以上待つ必要があれば断る
     # Notification
     max_notifications: int = 100
     # General
@@ -35,6 +140,34 @@ class Settings(BaseSettings):
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
+    @model_validator(mode="after")
+    def _apply_legacy_delays(self):
+        """旧 *_request_delay_min/max を平均間隔としてreq/秒に換算する（*_rate_limit_rps 未指定時）"""
+        for site in ("yahoo", "amazon"):
+            lo = getattr(self, f"{site}_request_delay_min")
+            hi = getattr(self, f"{site}_request_delay_max")
+            if lo is None and hi is None:
+                continue
+            rps_field = f"{site}_rate_limit_rps"
+            if rps_field in self.model_fields_set:
+                logger.warning(
+                    f"{site.upper()}_REQUEST_DELAY_* is ignored because "
+                    f"{rps_field.upper()} is set"
+                )
+                continue
+            mean = ((lo if lo is not None else hi) + (hi if hi is not None else lo)) / 2
+            if mean > 0:
+                setattr(self, rps_field, round(1 / mean, 3))
+                logger.warning(
+                    f"{site.upper()}_REQUEST_DELAY_* is deprecated; "
+                    f"using {rps_field.upper()}={getattr(self, rps_field)}"
+                )
+        if self.yahoo_search_delay_min is not None or self.yahoo_search_delay_max is not None:
+            logger.warning(
+                "YAHOO_SEARCH_DELAY_* is no longer used; tune YAHOO_RATE_LIMIT_RPS instead"
+            )
+        return self
+
     @property
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
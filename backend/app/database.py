@@ -1,11 +1,142 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+"""DBエンジンとセッション
+
+SQLite のストレージプロファイル（settings.sqlite_profile）:
+- "wal"（既定）: WAL・synchronous=NORMAL・mmap・キャッシュを設定し、書き込みは
+  1本の接続に直列化、GET エンドポイントは別プールの読み取り専用接続（query_only）を使う。
+  WAL なので読み取りはスケジューラーの書き込み中も待たされない。
+  書き込みのトランザクションは BEGIN IMMEDIATE で始める（他プロセスとのロック競合を
+  コミット時ではなく BEGIN で検出する）。接続の空き待ち・ロック待ちが上限を超えたら
+  API は 503 を返す（main.py）。
+- "legacy": SQLite の既定のまま1つのエンジンを読み書きで共有する（従来の動作）。
+SQLite 以外・インメモリDBでは読み書きを分けない。
+"""
+import logging
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
 
-engine = create_async_engine(settings.database_url, echo=False)
+logger = logging.getLogger(__name__)
+
+
+def _is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _apply_pragmas(engine: AsyncEngine, read_only: bool) -> None:
+    """接続ごとに SQLite の PRAGMA を設定する"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        # 負の値は KiB 単位
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kb}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL はDBファイルに記録されるので書き込み側で1回設定すれば読み取り側にも効く
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def _begin_immediate(engine: AsyncEngine) -> None:
+    """トランザクションを BEGIN IMMEDIATE で始める（書き込みロックを最初に取る）
+
+    ドライバーの暗黙の BEGIN（最初の書き込みで DEFERRED）を止め、begin イベントで発行する。
+    AUTOCOMMIT の接続（チェックポイント等）ではトランザクションを始めない。
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn):
+        if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def create_engines(url: str, profile: str) -> tuple[AsyncEngine, AsyncEngine]:
+    """(書き込み用, 読み取り用) のエンジンを作る。分けない構成では同じエンジンを返す"""
+    if profile != "wal" or not _is_file_sqlite(url):
+        engine = create_async_engine(url, echo=False)
+        return engine, engine
+
+    writer = create_async_engine(
+        url,
+        echo=False,
+        # 書き込みは1本の接続に並べる（SQLite の書き込みロックを接続同士で奪い合わない）
+        pool_size=settings.sqlite_writer_pool_size,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_writer_pool_timeout_seconds,
+    )
+    reader = create_async_engine(
+        url,
+        echo=False,
+        pool_size=settings.sqlite_reader_pool_size,
+        max_overflow=settings.sqlite_reader_pool_size,
+    )
+    _apply_pragmas(writer, read_only=False)
+    _begin_immediate(writer)
+    _apply_pragmas(reader, read_only=True)
+    return writer, reader
+
+
+engine, read_engine = create_engines(settings.database_url, settings.sqlite_profile)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def get_read_db():
+    """読み取り専用の GET エンドポイント用（書き込むと query_only でエラーになる）"""
+    async with read_session() as session:
+        yield session
+
+
+def is_busy_error(exc: Exception) -> bool:
+    """DBが混んでいて処理できなかった（再試行してよい）エラーか
+
+    書き込み接続の空き待ちの上限超え（pool_timeout）と、busy_timeout を超えたロック待ち。
+    """
+    if isinstance(exc, SATimeoutError):
+        return True
+    return isinstance(exc, OperationalError) and "database is locked" in str(exc.orig)
+
+
+async def run_maintenance() -> None:
+    """WAL のチェックポイントと統計の更新（スケジューラーの定期ジョブ）
+
+    WAL ファイルが伸び続けないよう本体へ書き戻して切り詰め、PRAGMA optimize で
+    クエリプランナーの統計を必要な分だけ更新する。
+    """
+    if not _is_file_sqlite(settings.database_url):
+        return
+    async with engine.connect() as conn:
+        # チェックポイントはトランザクションの外で行う
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if settings.sqlite_profile == "wal":
+            busy, wal_pages, moved = (
+                await conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            ).one()
+            logger.info(
+                f"SQLite checkpoint: {moved}/{wal_pages} WAL pages written back"
+                + (" (busy)" if busy else "")
+            )
+        await conn.execute(text("PRAGMA optimize"))
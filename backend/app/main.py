@@ -9,20 +9,24 @@ from contextlib import asynccontextmanager
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as SATimeoutError
 
 from app.config import settings
-from app.database import engine
+from app.database import engine, is_busy_error
 from app.migrations import run_migrations
 from app.models import Base
-from app.routers import amazon, keepa, listings, monitor, notifications, pricing, research, scheduler, stats, templates, yahoo
+from app.routers import amazon, jobs, keepa, listings, monitor, notifications, pricing, research, scheduler, scraper, stats, templates, yahoo
 
 # ログ設定
 logging.basicConfig(
     level=getattr(logging, settings.log_level.upper()),
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -32,6 +36,14 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
         await run_migrations(conn)
 
+    # 手数料・閾値の設定が変わっていればチャンス一覧の利益を計算し直す
+    from app.services.price_intelligence import reindex_pricing
+    await reindex_pricing()
+
+    if settings.browser_pool_prewarm:
+        from app.scrapers.base import browser_pool
+        await browser_pool.warm()
+
     if settings.scheduler_auto_start:
         from app.services.scheduler import start_scheduler
         start_scheduler()
@@ -39,9 +51,20 @@ async def lifespan(app: FastAPI):
     yield
 
     from app.scrapers.base import close_shared_browser
-    from app.services.scheduler import stop_scheduler
+    from app.scrapers.http_fetch import close_http_client
+    from app.scrapers.persistent_cache import scrape_cache
+    from app.scrapers.yahoo_search import _search_cache
+    from app.services.keepa import close_keepa_client
+    from app.services.runs import check_runs
+    from app.services.scheduler import release_scheduler_lease, stop_scheduler
     stop_scheduler()
+    check_runs.cancel()
+    await release_scheduler_lease()
+    _search_cache.cancel_refreshes()
     await close_shared_browser()
+    await close_http_client()
+    await close_keepa_client()
+    scrape_cache.close()
 
 
 app = FastAPI(
@@ -60,6 +83,20 @@ app.add_middleware(
     allow_headers=["Content-Type"],
 )
 
+@app.exception_handler(SATimeoutError)
+@app.exception_handler(OperationalError)
+async def database_busy(request: Request, exc: Exception):
+    """書き込みの接続待ち・ロック待ちが上限を超えたら 503（クライアントは再試行してよい）"""
+    if not is_busy_error(exc):
+        raise exc
+    logger.warning(f"Database busy: {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # ルーター登録
 app.include_router(yahoo.router)
 app.include_router(monitor.router)
@@ -72,6 +109,8 @@ app.include_router(keepa.router)
 app.include_router(templates.router)
 app.include_router(notifications.router)
 app.include_router(scheduler.router)
+app.include_router(scraper.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -1,19 +1,27 @@
 """軽量マイグレーション
 
-Alembic を使わないため、起動時に既存テーブルへ不足カラムを追加する。
-SQLite の `ALTER TABLE ... ADD COLUMN`（NULL許容カラムのみ）で冪等に実行する。
-新規テーブルは Base.metadata.create_all が作成するのでここでは扱わない。
+Alembic を使わないため、起動時に既存テーブルへ不足カラム・インデックスを追加する。
+- カラム: SQLite の `ALTER TABLE ... ADD COLUMN`（NULL許容か定数の DEFAULT 付きのみ）で冪等に実行する。
+- インデックス: モデルに定義されたもののうち DB に無いものを作成し、
+  DROPPED_INDEXES に挙げた不要になったものを削除する（どちらも冪等）。
+新規テーブルは Base.metadata.create_all が（インデックスごと）作成するのでここでは扱わない。
 """
 import logging
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from app.models import Base
+
 logger = logging.getLogger(__name__)
 
 # テーブル名 -> [(カラム名, SQLの型定義), ...]
-# すべて NULL 許容（既存行があるため DEFAULT なしで追加可能）
+# NULL 許容か定数の DEFAULT 付き（既存行は NULL / DEFAULT の値で埋まる。NOT NULL は付けない）
 COLUMN_ADDITIONS: dict[str, list[tuple[str, str]]] = {
+    "auctions": [
+        ("price_changed_at", "DATETIME"),
+        ("next_check_at", "DATETIME"),
+    ],
     "listings": [
         ("actual_purchase_price", "INTEGER"),
         ("min_price", "INTEGER"),
@@ -21,16 +29,51 @@ COLUMN_ADDITIONS: dict[str, list[tuple[str, str]]] = {
         ("sold_date", "DATETIME"),
         ("actual_profit", "INTEGER"),
     ],
+    "price_snapshots": [
+        ("last_seen_at", "DATETIME"),
+    ],
+    "products": [
+        ("price_refresh_failures", "INTEGER DEFAULT 0"),
+        ("price_refresh_retry_at", "DATETIME"),
+    ],
 }
 
+# モデルから外したインデックス（既存DBに残っていれば削除する）
+DROPPED_INDEXES: list[str] = [
+    "ix_price_snapshots_link_id",  # ix_price_snapshots_link_id_captured_at で兼ねる
+]
+
 
 async def _get_existing_columns(conn: AsyncConnection, table: str) -> set[str]:
     result = await conn.execute(text(f"PRAGMA table_info({table})"))
     return {row[1] for row in result.fetchall()}
 
 
+async def _get_existing_indexes(conn: AsyncConnection) -> set[str]:
+    result = await conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index'")
+    )
+    return {row[0] for row in result.fetchall()}
+
+
+async def _sync_indexes(conn: AsyncConnection) -> None:
+    """モデルのインデックスを作成し、不要になったものを削除する"""
+    existing = await _get_existing_indexes(conn)
+    for name in DROPPED_INDEXES:
+        if name in existing:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            logger.info(f"Migration: dropped index {name}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+            columns = ", ".join(c.name for c in index.columns)
+            logger.info(f"Migration: created index {index.name} on {table.name}({columns})")
+
+
 async def run_migrations(conn: AsyncConnection) -> None:
-    """不足カラムを追加する（create_all の後に呼ぶ）"""
+    """不足カラム・インデックスを追加する（create_all の後に呼ぶ）"""
     for table, columns in COLUMN_ADDITIONS.items():
         existing = await _get_existing_columns(conn, table)
         if not existing:
@@ -43,3 +86,5 @@ async def run_migrations(conn: AsyncConnection) -> None:
                 text(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
             )
             logger.info(f"Migration: added column {table}.{col_name} ({col_type})")
+    # カラム追加の後（新しいカラムのインデックスもあるため）
+    await _sync_indexes(conn)
@@ -1,10 +1,14 @@
 from app.models.auction import Auction, AuctionHistory, ProductAuctionLink
 from app.models.base import Base
+from app.models.check_run import CheckRun
+from app.models.job import Job
+from app.models.lease import SchedulerLease
+from app.models.link_state import LinkState
 from app.models.listing import Listing
 from app.models.notification import Notification
 from app.models.order import Order, ShippingRate, Template
 from app.models.product import Product
-from app.models.snapshot import PriceSnapshot
+from app.models.snapshot import PriceSnapshot, PriceSnapshotRollup
 
 __all__ = [
     "Base",
@@ -18,4 +22,9 @@ __all__ = [
     "Template",
     "Notification",
     "PriceSnapshot",
+    "PriceSnapshotRollup",
+    "LinkState",
+    "Job",
+    "SchedulerLease",
+    "CheckRun",
 ]
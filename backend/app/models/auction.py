@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -17,7 +17,9 @@ class Auction(Base):
     seller_id: Mapped[str | None] = mapped_column(String, nullable=True)
     start_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     end_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-    status: Mapped[str] = mapped_column(String, default="active")  # active/ended/sold
+    status: Mapped[str] = mapped_column(
+        String, default="active", index=True
+    )  # active/ended/sold
     image_urls: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON array
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     url: Mapped[str | None] = mapped_column(String, nullable=True)
@@ -25,6 +27,11 @@ class Auction(Base):
     # 価格変動追跡
     previous_price: Mapped[int | None] = mapped_column(Integer, nullable=True)
     price_changed: Mapped[bool] = mapped_column(Boolean, default=False)
+    price_changed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # 優先度付きポーリング: この時刻を過ぎたらスケジューラーが再チェックする（NULL = 未チェック）
+    next_check_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
 
 
 class AuctionHistory(Base):
@@ -42,6 +49,12 @@ class AuctionHistory(Base):
 
 class ProductAuctionLink(Base):
     __tablename__ = "product_auction_links"
+    __table_args__ = (
+        # 商品・オークションからの紐づけ検索（重複チェック・商品ごとの再計算）
+        Index("ix_links_product_auction_monitoring", "product_id", "auction_id", "is_monitoring"),
+        # オークション側から監視中の紐づけを引く（一覧・巡回の join）
+        Index("ix_links_auction_monitoring", "auction_id", "is_monitoring"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class CheckRun(Base):
+    """監視チェックの実行（run）の進捗
+
+    実行中のプロセスが数秒ごとに書き込み、どのプロセス（uvicorn の別ワーカー）からでも
+    問い合わせられるようにする。status: queued（ジョブキュー待ち）→ running → done / failed
+    """
+
+    __tablename__ = "check_runs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    trigger: Mapped[str] = mapped_column(String)  # manual / scheduled
+    status: Mapped[str] = mapped_column(String, default="running", index=True)
+    owner: Mapped[str | None] = mapped_column(String, nullable=True)  # 実行しているプロセス
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    done: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[str] = mapped_column(Text, default="[]")  # JSON
+    started_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
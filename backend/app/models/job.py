@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class Job(Base):
+    """DB上のジョブキュー（ワーカープロセスがリースして実行する）
+
+    status: queued → running（リース中）→ done / failed
+    リース期限（leased_until）を過ぎた running はワーカーが落ちたとみなし、再度リースできる。
+    """
+
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String, index=True)
+    payload: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+    status: Mapped[str] = mapped_column(String, default="queued", index=True)
+    # 同じ内容のジョブを重複して積まないためのキー（queued/running の間だけ有効）
+    dedupe_key: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    # 実行可能になる時刻（リトライのバックオフで後ろにずらす）
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True)
+    lease_owner: Mapped[str | None] = mapped_column(String, nullable=True)
+    leased_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now()
+    )
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class LinkState(Base):
+    """監視ごとの最新状態（link_id ごとに1行）
+
+    スケジューラーがチェックと同じトランザクションで更新する。変化の判定・
+    チャンスのエッジ検出はスナップショットを遡らずこの行だけを見る。
+    profit / profit_rate はチャンス一覧の索引を兼ねる（profit_rate 降順のキーセットページング）。
+    """
+
+    __tablename__ = "link_states"
+    __table_args__ = (
+        Index("ix_link_states_chance", "profit_rate", "link_id"),
+    )
+
+    link_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("product_auction_links.id"), primary_key=True
+    )
+    yahoo_price: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amazon_price: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    profit: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    profit_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    is_chance: Mapped[bool] = mapped_column(Boolean, default=False)  # チャンス閾値を満たしているか
+    snapshot_id: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 現在の値のスナップショット
+    pricing_version: Mapped[str | None] = mapped_column(String(16), nullable=True)  # 計算に使った手数料設定
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -23,6 +23,11 @@ class Product(Base):
     price_updated_at: Mapped[datetime | None] = mapped_column(
         DateTime, nullable=True
     )
+    # Amazon価格リフレッシュの連続失敗（CAPTCHA・カート無し等）と、次に試してよい時刻
+    price_refresh_failures: Mapped[int] = mapped_column(Integer, default=0)
+    price_refresh_retry_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now()
     )
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -9,15 +9,21 @@ from app.models.base import Base
 class PriceSnapshot(Base):
     """価格推移グラフ用の時系列スナップショット
 
-    スケジューラーが監視対象ごとに定期記録する。
-    1行 = ある時点での「ヤフオク相場・Amazon価格・想定利益率」のセット。
+    スケジューラーが監視対象ごとに記録する。値が変わった時だけ行を追加し、
+    変わらない間は直近行の last_seen_at だけを進める（1行 = captured_at から
+    last_seen_at まで続いた「ヤフオク相場・Amazon価格・想定利益率」のセット）。
+    古い行は snapshot_retention が時間・日単位の PriceSnapshotRollup に集約して消す。
     """
 
     __tablename__ = "price_snapshots"
+    __table_args__ = (
+        # 監視ごとの時系列（グラフ・直近行）。link_id 単独のインデックスはこれで兼ねる
+        Index("ix_price_snapshots_link_id_captured_at", "link_id", "captured_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     link_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("product_auction_links.id"), index=True
+        Integer, ForeignKey("product_auction_links.id")
     )
     yahoo_price: Mapped[int | None] = mapped_column(
         Integer, nullable=True
@@ -31,3 +37,37 @@ class PriceSnapshot(Base):
     captured_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), index=True
     )
+    last_seen_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True
+    )  # この値を最後に確認した時刻（変化なしのチェックで更新）
+
+
+class PriceSnapshotRollup(Base):
+    """スナップショットの時間・日単位の集約（min / max / close）
+
+    resolution = "hour" / "day"、bucket_start はその時間・日の開始時刻。
+    close はバケット内で最後に記録された値。
+    """
+
+    __tablename__ = "price_snapshot_rollups"
+    __table_args__ = (
+        UniqueConstraint("link_id", "resolution", "bucket_start"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    link_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("product_auction_links.id"), index=True
+    )
+    resolution: Mapped[str] = mapped_column(String(8))
+    bucket_start: Mapped[datetime] = mapped_column(DateTime)
+    last_captured_at: Mapped[datetime] = mapped_column(DateTime)  # close の記録時刻
+    yahoo_min: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    yahoo_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    yahoo_close: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amazon_min: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amazon_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amazon_close: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    profit_rate_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    profit_rate_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    profit_rate_close: Mapped[float | None] = mapped_column(Float, nullable=True)
+    samples: Mapped[int] = mapped_column(Integer, default=0)  # 集約した行数
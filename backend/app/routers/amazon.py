@@ -13,6 +13,7 @@ from app.scrapers.amazon_product import (
     get_amazon_product,
     get_competitor_offers,
 )
+from app.services.price_intelligence import reprice_product_links
 
 router = APIRouter(prefix="/api/amazon", tags=["amazon"])
 
@@ -116,6 +117,8 @@ async def save_amazon_product(
             existing.review_count = scraped.review_count
         existing.price_updated_at = now
         product = existing
+        # 監視中なら利益・チャンスを新しい価格で計算し直す
+        await reprice_product_links(db, product.id, now)
     else:
         # 新規作成
         product = Product(
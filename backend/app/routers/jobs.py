@@ -0,0 +1,55 @@
+"""ジョブキューAPIエンドポイント"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.models import Job
+from app.services import job_handlers  # noqa: F401  ハンドラーの登録
+from app.services.jobqueue import enqueue, job_to_dict, registered_kinds
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+class EnqueueRequest(BaseModel):
+    kind: str
+    payload: dict = {}
+
+
+@router.get("/")
+async def list_jobs(
+    status: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """最近のジョブ一覧と状態ごとの件数"""
+    query = select(Job).order_by(desc(Job.id)).limit(limit)
+    if status:
+        query = query.where(Job.status == status)
+    jobs = (await db.execute(query)).scalars().all()
+
+    counts = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {
+        "items": [job_to_dict(j) for j in jobs],
+        "counts": {s: c for s, c in counts.all()},
+    }
+
+
+@router.post("/")
+async def enqueue_job(req: EnqueueRequest, db: AsyncSession = Depends(get_db)):
+    """ジョブを積む（kind は登録済みのものだけ）"""
+    if req.kind not in registered_kinds():
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {req.kind}")
+    job = await enqueue(db, req.kind, req.payload)
+    await db.commit()
+    return job_to_dict(job)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    """ジョブの状態・結果を取得"""
+    job = await db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
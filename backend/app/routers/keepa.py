@@ -10,6 +10,7 @@ router = APIRouter(prefix="/api/keepa", tags=["keepa"])
 
 class KeepaStatus(BaseModel):
     enabled: bool
+    tokens_left: int | None = None  # トークン残高の見積もり（未呼び出しなら None）
 
 
 class KeepaPoint(BaseModel):
@@ -28,7 +29,9 @@ class KeepaIdentityResponse(BaseModel):
 @router.get("/status", response_model=KeepaStatus)
 async def keepa_status():
     """Keepa連携が有効か（APIキー設定済みか）"""
-    return KeepaStatus(enabled=keepa.is_enabled())
+    return KeepaStatus(
+        enabled=keepa.is_enabled(), tokens_left=keepa.keepa_client.tokens.available()
+    )
 
 
 @router.get("/history/{asin}", response_model=list[KeepaPoint])
@@ -40,6 +43,8 @@ async def keepa_history(
         raise HTTPException(status_code=503, detail="Keepa API key not configured")
     try:
         points = await keepa.fetch_amazon_price_history(asin)
+    except keepa.KeepaThrottled as e:
+        raise HTTPException(status_code=429, detail=f"Keepa token budget exhausted: {e}")
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Keepa fetch failed: {e}")
     return [KeepaPoint(captured_at=p.captured_at, price=p.price) for p in points]
@@ -54,6 +59,8 @@ async def keepa_identity(
         raise HTTPException(status_code=503, detail="Keepa API key not configured")
     try:
         ident = await keepa.fetch_product_identity(asin)
+    except keepa.KeepaThrottled as e:
+        raise HTTPException(status_code=429, detail=f"Keepa token budget exhausted: {e}")
     except Exception as e:
         raise HTTPException(status_code=502, detail=f"Keepa fetch failed: {e}")
     if not ident:
@@ -6,7 +6,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Listing, Product
 from app.services.pricing import calculate_pricing
 
@@ -117,7 +117,7 @@ async def _get_listing_with_product(
 
 
 @router.get("/", response_model=list[ListingResponse])
-async def list_listings(db: AsyncSession = Depends(get_db)):
+async def list_listings(db: AsyncSession = Depends(get_read_db)):
     """出品一覧取得"""
     result = await db.execute(
         select(Listing, Product)
@@ -165,7 +165,7 @@ async def create_listing(req: ListingCreate, db: AsyncSession = Depends(get_db))
 
 
 @router.get("/{listing_id}", response_model=ListingResponse)
-async def get_listing(listing_id: int, db: AsyncSession = Depends(get_db)):
+async def get_listing(listing_id: int, db: AsyncSession = Depends(get_read_db)):
     """出品詳細取得"""
     listing, product = await _get_listing_with_product(listing_id, db)
     return _to_response(listing, product)
@@ -1,16 +1,17 @@
 """監視対象管理APIエンドポイント"""
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
-from app.models import Auction, PriceSnapshot, Product, ProductAuctionLink
-from app.services.pricing import calculate_pricing
+from app.database import get_db, get_read_db
+from app.models import Auction, LinkState, Product, ProductAuctionLink
+from app.services.price_intelligence import process_price_intelligence
+from app.services.snapshot_retention import load_snapshot_series
 
 router = APIRouter(prefix="/api/monitor", tags=["monitor"])
 
@@ -46,6 +47,12 @@ class MonitorResponse(BaseModel):
     buy_now_price: int | None
     status: str
     is_monitoring: bool
+    # 最新状態（スケジューラーが最後にチェックした時点の値。未チェックなら None）
+    amazon_price: int | None = None
+    profit: int | None = None
+    profit_rate: float | None = None
+    is_chance: bool = False
+    last_checked_at: str | None = None
 
 
 class MonitorListResponse(BaseModel):
@@ -79,6 +86,20 @@ class ChanceListResponse(BaseModel):
     total: int
     min_profit_rate: float
     min_profit_amount: int
+    next_cursor: str | None = None  # 続きがあれば次ページ取得用のカーソル
+
+
+def _state_fields(state: LinkState | None) -> dict:
+    """MonitorResponse の最新状態フィールド"""
+    if state is None:
+        return {}
+    return {
+        "amazon_price": state.amazon_price,
+        "profit": state.profit,
+        "profit_rate": state.profit_rate,
+        "is_chance": state.is_chance,
+        "last_checked_at": state.checked_at.isoformat() if state.checked_at else None,
+    }
 
 
 # --- エンドポイント ---
@@ -136,6 +157,11 @@ async def add_monitor(req: MonitorAddRequest, db: AsyncSession = Depends(get_db)
         db.add(link)
         await db.flush()
 
+    # 最新状態（チャンス一覧の索引）を今ある価格で作っておく
+    if auction.status == "active":
+        state = await db.get(LinkState, link.id)
+        await process_price_intelligence(db, link, auction, product, state, datetime.now())
+
     await db.commit()
 
     return MonitorResponse(
@@ -156,13 +182,14 @@ async def add_monitor(req: MonitorAddRequest, db: AsyncSession = Depends(get_db)
 @router.get("/list", response_model=MonitorListResponse)
 async def list_monitors(
     status: StatusFilter = Query(StatusFilter.active, description="active or ended"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """監視中の商品一覧を取得"""
     query = (
-        select(ProductAuctionLink, Product, Auction)
+        select(ProductAuctionLink, Product, Auction, LinkState)
         .join(Product, ProductAuctionLink.product_id == Product.id)
         .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+        .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
         .where(ProductAuctionLink.is_monitoring.is_(True))
     )
 
@@ -187,23 +214,36 @@ async def list_monitors(
             buy_now_price=auction.buy_now_price,
             status=auction.status,
             is_monitoring=link.is_monitoring,
+            **_state_fields(state),
         )
-        for link, product, auction in rows
+        for link, product, auction, state in rows
     ]
 
     return MonitorListResponse(items=items, total=len(items))
 
 
+def _parse_cursor(cursor: str) -> tuple[float, int]:
+    """チャンス一覧のカーソル "利益率:link_id" を分解する"""
+    try:
+        rate, link_id = cursor.rsplit(":", 1)
+        return float(rate), int(link_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/chances", response_model=ChanceListResponse)
 async def list_chances(
     min_profit_rate: float | None = Query(None, description="利益率の下限（%）"),
     min_profit_amount: int | None = Query(None, description="利益額の下限（円）"),
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500, description="1ページの件数"),
+    cursor: str | None = Query(None, description="前ページの next_cursor"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """現在の「仕入れチャンス」一覧
 
-    監視中(active)でAmazon価格・ヤフオク価格が揃っている商品について
-    その場で利益を計算し、閾値を満たすものを利益率の高い順に返す。
+    監視中(active)の商品のうち、最新状態（LinkState）の利益・利益率が閾値を満たすものを
+    利益率の高い順に返す。利益はチェック・Amazon価格更新のたびに計算済みなので
+    ここでは索引を引くだけ。続きは next_cursor を cursor に渡して取得する。
     """
     rate_threshold = (
         min_profit_rate if min_profit_rate is not None
@@ -214,49 +254,63 @@ async def list_chances(
         else settings.chance_min_profit_amount
     )
 
-    result = await db.execute(
-        select(ProductAuctionLink, Product, Auction)
+    base = (
+        select(LinkState, ProductAuctionLink, Product, Auction)
+        .join(ProductAuctionLink, LinkState.link_id == ProductAuctionLink.id)
         .join(Product, ProductAuctionLink.product_id == Product.id)
         .join(Auction, ProductAuctionLink.auction_id == Auction.id)
         .where(
             ProductAuctionLink.is_monitoring.is_(True),
             Auction.status == "active",
+            LinkState.profit_rate >= rate_threshold,
+            LinkState.profit >= amount_threshold,
         )
     )
-
-    items: list[ChanceItem] = []
-    for link, product, auction in result.all():
-        if not product.amazon_price or not auction.current_price:
-            continue
-
-        calc = calculate_pricing(
-            selling_price=product.amazon_price,
-            expected_winning_price=auction.current_price,
-            category=product.category,
-            shipping_cost=settings.chance_default_shipping,
-        )
-        if calc.profit_rate >= rate_threshold and calc.profit >= amount_threshold:
-            items.append(
-                ChanceItem(
-                    link_id=link.id,
-                    asin=product.asin,
-                    product_title=product.title,
-                    yahoo_auction_id=auction.auction_id,
-                    auction_title=auction.title,
-                    yahoo_price=auction.current_price,
-                    amazon_price=product.amazon_price,
-                    profit=calc.profit,
-                    profit_rate=calc.profit_rate,
-                    url=auction.url,
-                )
+    total = (
+        await db.execute(select(func.count()).select_from(base.subquery()))
+    ).scalar_one()
+
+    query = base
+    if cursor:
+        last_rate, last_link_id = _parse_cursor(cursor)
+        query = query.where(
+            or_(
+                LinkState.profit_rate < last_rate,
+                and_(LinkState.profit_rate == last_rate, LinkState.link_id < last_link_id),
             )
+        )
+    rows = (
+        await db.execute(
+            query.order_by(LinkState.profit_rate.desc(), LinkState.link_id.desc())
+            .limit(limit + 1)
+        )
+    ).all()
 
-    items.sort(key=lambda x: x.profit_rate, reverse=True)
+    items = [
+        ChanceItem(
+            link_id=link.id,
+            asin=product.asin,
+            product_title=product.title,
+            yahoo_auction_id=auction.auction_id,
+            auction_title=auction.title,
+            yahoo_price=state.yahoo_price,
+            amazon_price=state.amazon_price,
+            profit=state.profit,
+            profit_rate=state.profit_rate,
+            url=auction.url,
+        )
+        for state, link, product, auction in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = f"{last.profit_rate!r}:{last.link_id}"
     return ChanceListResponse(
         items=items,
-        total=len(items),
+        total=total,
         min_profit_rate=rate_threshold,
         min_profit_amount=amount_threshold,
+        next_cursor=next_cursor,
     )
 
 
@@ -264,37 +318,32 @@ async def list_chances(
 async def get_snapshots(
     link_id: int,
     days: int = Query(30, ge=1, le=365, description="取得日数"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """価格推移グラフ用の時系列データを取得（古い順）"""
-    since = datetime.now() - timedelta(days=days)
-    result = await db.execute(
-        select(PriceSnapshot)
-        .where(
-            PriceSnapshot.link_id == link_id,
-            PriceSnapshot.captured_at >= since,
-        )
-        .order_by(PriceSnapshot.captured_at.asc())
-    )
-    snapshots = result.scalars().all()
+    """価格推移グラフ用の時系列データを取得（古い順）
+
+    日数に応じて生の行・時間単位・日単位の集約から粒度を選ぶ（集約区間は close の値）。
+    """
+    points = await load_snapshot_series(db, link_id, days)
     return [
         SnapshotPoint(
-            captured_at=s.captured_at.isoformat(),
-            yahoo_price=s.yahoo_price,
-            amazon_price=s.amazon_price,
-            profit_rate=s.profit_rate,
+            captured_at=p.at.isoformat(),
+            yahoo_price=p.yahoo_price,
+            amazon_price=p.amazon_price,
+            profit_rate=p.profit_rate,
         )
-        for s in snapshots
+        for p in points
     ]
 
 
 @router.get("/{link_id}", response_model=MonitorResponse)
-async def get_monitor(link_id: int, db: AsyncSession = Depends(get_db)):
+async def get_monitor(link_id: int, db: AsyncSession = Depends(get_read_db)):
     """監視対象の詳細を取得"""
     result = await db.execute(
-        select(ProductAuctionLink, Product, Auction)
+        select(ProductAuctionLink, Product, Auction, LinkState)
         .join(Product, ProductAuctionLink.product_id == Product.id)
         .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+        .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
         .where(ProductAuctionLink.id == link_id)
     )
     row = result.one_or_none()
@@ -302,7 +351,7 @@ async def get_monitor(link_id: int, db: AsyncSession = Depends(get_db)):
     if not row:
         raise HTTPException(status_code=404, detail="Monitor not found")
 
-    link, product, auction = row
+    link, product, auction, state = row
     return MonitorResponse(
         id=link.id,
         product_id=product.id,
@@ -315,6 +364,7 @@ async def get_monitor(link_id: int, db: AsyncSession = Depends(get_db)):
         buy_now_price=auction.buy_now_price,
         status=auction.status,
         is_monitoring=link.is_monitoring,
+        **_state_fields(state),
     )
 
 
@@ -5,7 +5,7 @@ from sqlalchemy import desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.notification import Notification
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
@@ -31,7 +31,7 @@ class NotificationListResponse(BaseModel):
 async def list_notifications(
     limit: int = Query(50, ge=1, le=100),
     unread_only: bool = Query(False),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """通知一覧取得"""
     query = select(Notification).order_by(desc(Notification.created_at))
@@ -92,7 +92,7 @@ async def mark_all_as_read(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/unread-count")
-async def get_unread_count(db: AsyncSession = Depends(get_db)):
+async def get_unread_count(db: AsyncSession = Depends(get_read_db)):
     """未読通知数を取得"""
     result = await db.execute(
         select(func.count()).select_from(Notification).where(
@@ -7,7 +7,7 @@ import asyncio
 import logging
 import re
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -22,11 +22,13 @@ from app.scrapers.amazon_listing import (
 from app.scrapers.amazon_product import get_amazon_product
 from app.scrapers.yahoo_search import search_yahoo_auctions
 from app.services import keepa
+from app.services.jobqueue import enqueue
 from app.services.matching import (
     build_search_keyword,
     is_relevant,
     representative_price,
 )
+from app.services.price_intelligence import reprice_product_links
 from app.services.pricing import calculate_pricing
 from app.models import Product
 
@@ -110,6 +112,7 @@ async def _get_amazon_for_asin(asin: str) -> tuple[str, int | None, str | None,
             product.image_url = amzn.image_url or product.image_url
             product.category = amzn.category or product.category
             product.price_updated_at = datetime.now()
+            await reprice_product_links(db, product.id, product.price_updated_at)
         else:
             product = Product(
                 asin=asin,
@@ -251,18 +254,33 @@ async def _keepa_identity(asin: str, enabled: bool) -> tuple[list[str], str | No
 @router.post("/price-diff", response_model=PriceDiffResponse)
 async def price_diff(req: PriceDiffRequest):
     """Amazon一覧URL もしくは ASINリストから価格差を一括算出"""
+    return await run_price_diff(req)
+
+
+@router.post("/price-diff/jobs")
+async def enqueue_price_diff(req: PriceDiffRequest):
+    """価格差の一括算出をジョブキューに積む（結果は /api/jobs/{job_id} で取得）"""
+    if not settings.job_queue_enabled:
+        raise HTTPException(status_code=409, detail="Job queue is disabled")
+    async with async_session() as db:
+        job = await enqueue(db, "research_price_diff", req.model_dump())
+        await db.commit()
+        return {"job_id": job.id}
+
+
+async def run_price_diff(req: PriceDiffRequest) -> PriceDiffResponse:
+    """価格差の一括算出本体（APIとワーカーのジョブで共有）"""
     query = req.query.strip()
     sem = asyncio.Semaphore(YAHOO_CONCURRENCY)
     use_keepa = req.use_keepa and keepa.is_enabled()
-    keepa_sem = asyncio.Semaphore(AMAZON_CONCURRENCY)
 
     if _is_amazon_listing_url(query):
         # URLモード: 一覧ページから ASIN・タイトル・価格を自動収集
         cards = await harvest_amazon_listing(query, limit=MAX_ITEMS)
 
         async def build_card(c) -> PriceDiffRow:
-            async with keepa_sem:
-                jan, model = await _keepa_identity(c.asin, use_keepa)
+            # Keepaクライアントが同時の問い合わせを複数ASINの1リクエストにまとめる
+            jan, model = await _keepa_identity(c.asin, use_keepa)
             return await _build_row(
                 c.asin, c.title, c.price, c.image_url, None,
                 req.shipping_cost, sem, jan_codes=jan, model=model,
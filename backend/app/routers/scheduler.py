@@ -1,9 +1,15 @@
 """スケジューラー管理APIエンドポイント"""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.services.leader import scheduler_leader
+from app.services.runs import RunInProgress, check_runs
 from app.services.scheduler import (
     get_scheduler_status,
+    release_scheduler_lease,
     start_scheduler,
     stop_scheduler,
 )
@@ -11,17 +17,28 @@ from app.services.scheduler import (
 router = APIRouter(prefix="/api/scheduler", tags=["scheduler"])
 
 
+class SchedulerLeaderInfo(BaseModel):
+    owner: str
+    expires_at: str
+    heartbeat_at: str
+
+
 class SchedulerStatusResponse(BaseModel):
     running: bool
-    interval_minutes: int
+    tick_seconds: int                   # 期限の来た件を拾う間隔
+    min_interval_minutes: float         # 1件ごとのチェック間隔の下限・上限
+    max_interval_minutes: float
     next_run: str | None
+    owner: str                          # このプロセスの識別子（ホスト名:PID）
+    is_leader: bool                     # このプロセスが巡回を実行しているか
+    leader: SchedulerLeaderInfo | None  # 現在リースを持っているプロセス（いなければ None）
 
 
 @router.get("/status", response_model=SchedulerStatusResponse)
-async def scheduler_status():
-    """スケジューラーの状態を取得"""
+async def scheduler_status(db: AsyncSession = Depends(get_read_db)):
+    """スケジューラーの状態を取得（どのプロセスが巡回を実行しているかを含む）"""
     status = get_scheduler_status()
-    return SchedulerStatusResponse(**status)
+    return SchedulerStatusResponse(**status, leader=await scheduler_leader.holder(db))
 
 
 @router.post("/start")
@@ -35,13 +52,56 @@ async def scheduler_start():
 async def scheduler_stop():
     """スケジューラーを停止"""
     stop_scheduler()
+    await release_scheduler_lease()
     return {"detail": "Scheduler stopped"}
 
 
-@router.post("/run-now")
-async def run_now():
-    """今すぐ監視チェックを実行"""
+@router.post("/run-now", status_code=202)
+async def run_now(db: AsyncSession = Depends(get_db)):
+    """今すぐ監視チェックをバックグラウンドで開始し、run id を返す
+
+    既に実行中（他のプロセスを含む）なら新しくは始めず、実行中の run id を返す（already_running=True）。
+    ジョブキューが有効ならワーカーが実行する（check_run ジョブを積んで run id を返す）。
+    進捗は GET /api/scheduler/runs/{run_id} で取得する。
+    """
     from app.services.scheduler import check_monitored_auctions
 
-    await check_monitored_auctions()
-    return {"detail": "Check completed"}
+    if settings.job_queue_enabled:
+        run_id, already_running = await check_runs.enqueue(db, trigger="manual")
+        await db.commit()
+        return {
+            "run_id": run_id,
+            "already_running": already_running,
+            "detail": "Check already running" if already_running else "Check queued",
+        }
+    try:
+        run = await check_runs.start(
+            lambda progress: check_monitored_auctions(progress=progress),
+            trigger="manual",
+        )
+    except RunInProgress as e:
+        return {
+            "run_id": e.run_id,
+            "already_running": True,
+            "detail": "Check already running",
+        }
+    return {"run_id": run.id, "already_running": False, "detail": "Check started"}
+
+
+@router.get("/runs")
+async def list_runs(db: AsyncSession = Depends(get_read_db)):
+    """最近の run（全プロセス分、新しい順）と実行中の run"""
+    current = await check_runs.running(db)
+    return {
+        "current": current.to_dict() if current else None,
+        "items": [r.to_dict() for r in await check_runs.recent(db)],
+    }
+
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: str, db: AsyncSession = Depends(get_read_db)):
+    """run の進捗（処理済み/全件・失敗・残り時間の目安）"""
+    run = await check_runs.get(db, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run.to_dict()
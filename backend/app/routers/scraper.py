@@ -0,0 +1,23 @@
+"""スクレイパー基盤の稼働状況APIエンドポイント"""
+from fastapi import APIRouter
+
+from app.scrapers.base import browser_pool
+from app.scrapers.persistent_cache import scrape_cache
+from app.scrapers.ratelimit import probe_limiter, rate_limiter
+from app.scrapers.singleflight import single_flight
+from app.scrapers.yahoo_search import _search_cache
+
+router = APIRouter(prefix="/api/scraper", tags=["scraper"])
+
+
+@router.get("/stats")
+async def scraper_stats():
+    """ブラウザプールの混雑状況・ホスト別レート制限・相乗り状況・キャッシュ状況を取得"""
+    return {
+        "browser_pool": browser_pool.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "http_probe_limits": probe_limiter.stats(),
+        "single_flight": single_flight.stats(),
+        "caches": {_search_cache.name: _search_cache.stats()},
+        "persistent_cache": scrape_cache.stats(),
+    }
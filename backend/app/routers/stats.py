@@ -6,7 +6,7 @@ from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_read_db
 from app.models import Auction, Listing, Product, ProductAuctionLink
 
 router = APIRouter(prefix="/api/stats", tags=["stats"])
@@ -73,7 +73,7 @@ PRICE_BANDS: list[tuple[str, int, int | None]] = [
 @router.get("/summary", response_model=StatsSummary)
 async def stats_summary(
     period: str = Query("month", pattern="^(month|all)$"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """集計サマリー: 在庫・売上・利益・価格帯別・直近売れた商品"""
 
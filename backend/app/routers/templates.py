@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.order import Template
 
 router = APIRouter(prefix="/api/templates", tags=["templates"])
@@ -34,7 +34,7 @@ class TemplateResponse(BaseModel):
 
 
 @router.get("/", response_model=list[TemplateResponse])
-async def list_templates(db: AsyncSession = Depends(get_db)):
+async def list_templates(db: AsyncSession = Depends(get_read_db)):
     """テンプレート一覧取得"""
     result = await db.execute(select(Template).order_by(Template.id))
     templates = result.scalars().all()
@@ -65,7 +65,7 @@ async def create_template(req: TemplateCreate, db: AsyncSession = Depends(get_db
 
 
 @router.get("/{template_id}", response_model=TemplateResponse)
-async def get_template(template_id: int, db: AsyncSession = Depends(get_db)):
+async def get_template(template_id: int, db: AsyncSession = Depends(get_read_db)):
     """テンプレート詳細取得"""
     result = await db.execute(select(Template).where(Template.id == template_id))
     template = result.scalar_one_or_none()
@@ -111,10 +111,11 @@ async def yahoo_detail(
 @router.get("/history", response_model=HistoryResponse)
 async def yahoo_history(
     keyword: str = Query(..., min_length=1),
-    count: int = Query(50, ge=1, le=100),
+    count: int = Query(100, ge=1, le=100),
+    pages: int = Query(1, ge=1, le=5, description="取得ページ数（1ページ=count件）"),
 ):
     """キーワードで落札履歴を検索"""
-    results = await search_auction_history(keyword, count=count)
+    results = await search_auction_history(keyword, count=count, pages=pages)
 
     prices = [r.winning_price for r in results]
     median_price = None
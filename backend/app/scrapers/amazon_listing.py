@@ -8,8 +8,7 @@ import logging
 import re
 from dataclasses import dataclass
 
-from app.config import settings
-from app.scrapers.base import fetch_with_retry, get_browser, get_page
+from app.scrapers.base import fetch_page
 
 logger = logging.getLogger(__name__)
 
@@ -77,17 +76,11 @@ async def harvest_asins_from_url(url: str, limit: int = 30) -> list[str]:
     ページHTML内の amazon.co.jp/dp/ASIN 形式リンクを拾って重複排除して返す。
     Amazon以外のサイト（せどりブログ等）でも、Amazon商品にリンクしていれば収集できる。
     """
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(
-                page, url,
-                delay_min=settings.yahoo_search_delay_min,
-                delay_max=settings.yahoo_search_delay_max,
-            )
-            if not success:
-                logger.error(f"Failed to load page: {url}")
-                return []
-            html = await page.content()
+    async with fetch_page(url) as page:
+        if page is None:
+            logger.error(f"Failed to load page: {url}")
+            return []
+        html = await page.content()
 
     seen: set[str] = set()
     asins: list[str] = []
@@ -104,19 +97,12 @@ async def harvest_asins_from_url(url: str, limit: int = 30) -> list[str]:
 
 async def harvest_amazon_listing(url: str, limit: int = 30) -> list[ListingCard]:
     """Amazon一覧ページURLから商品カードを収集（先頭limit件）"""
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(
-                page,
-                url,
-                delay_min=settings.yahoo_search_delay_min,
-                delay_max=settings.yahoo_search_delay_max,
-            )
-            if not success:
-                logger.error(f"Failed to load Amazon listing: {url}")
-                return []
+    async with fetch_page(url) as page:
+        if page is None:
+            logger.error(f"Failed to load Amazon listing: {url}")
+            return []
 
-            raw = await page.evaluate(_HARVEST_JS)
+        raw = await page.evaluate(_HARVEST_JS)
 
     cards: list[ListingCard] = []
     for r in raw[:limit]:
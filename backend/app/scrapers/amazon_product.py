@@ -1,12 +1,18 @@
 """Amazon商品ページスクレイパー - ASIN指定で商品情報+価格を取得"""
+import json
 import logging
 import re
+import time
 from dataclasses import dataclass, field
 
 from playwright.async_api import Page
 
 from app.config import settings
-from app.scrapers.base import fetch_with_retry, get_browser, get_page, random_delay
+from app.scrapers.base import fetch_page
+from app.scrapers.http_fetch import fetch_html, inner_text, parse_html, xp_class
+from app.scrapers.persistent_cache import scrape_cache
+from app.scrapers.ratelimit import probe_limiter, rate_limiter
+from app.scrapers.singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -36,167 +42,252 @@ class CompetitorOffer:
     is_fba: bool = False
 
 
-async def _parse_product_page(page: Page, asin: str) -> AmazonProduct:
-    """Amazon商品ページから情報を抽出"""
+# 価格（複数のセレクタパターンに対応。上から順に最初に数値が取れたものを採用）
+_PRICE_SELECTORS = [
+    "span.a-price span.a-offscreen",
+    "#priceblock_ourprice",
+    "#priceblock_dealprice",
+    "#corePrice_feature_div span.a-offscreen",
+    ".a-price .a-offscreen",
+]
+_CAPTCHA_SELECTOR = "#captchacharacters, form[action*='validateCaptcha']"
+
+# 商品ページの必要な情報を1回の page.evaluate でまとめて抜き出すJS
+# （セレクタごとに query_selector / inner_text を await するとCDP往復が数十回になるため）
+# 戻り値は _product_from_payload の payload と同じ形。selectors は _PRICE_SELECTORS
+_EXTRACT_PRODUCT_JS = r"""
+(priceSelectors) => {
+  const text = (sel) => {
+    const el = document.querySelector(sel);
+    return el ? el.innerText : null;
+  };
+  const img = document.querySelector('#landingImage, #imgBlkFront');
+  const twister = document.querySelector('#twister-plus-price-data-price');
+  const jsonLd = [];
+  document.querySelectorAll('script[type="application/ld+json"]').forEach((s) => {
+    try { jsonLd.push(JSON.parse(s.textContent)); } catch (e) { /* 壊れたJSON-LDは無視 */ }
+  });
+  return {
+    title: text('#productTitle'),
+    price_texts: priceSelectors.map(text),
+    byline: text('#bylineInfo'),
+    detail_rows: Array.from(
+      document.querySelectorAll(
+        '#productDetails_techSpec_section_1 tr, #detailBullets_feature_div li, '
+        + '#productDetails_detailBullets_sections1 tr'
+      ),
+      (row) => row.innerText
+    ),
+    breadcrumbs: Array.from(
+      document.querySelectorAll('#wayfinding-breadcrumbs_feature_div a'), (a) => a.innerText
+    ),
+    image_hires: img ? img.getAttribute('data-old-hires') : null,
+    image_src: img ? img.getAttribute('src') : null,
+    rating_text: text('#acrPopover span.a-icon-alt'),
+    review_text: text('#acrCustomerReviewText'),
+    twister_price: twister ? twister.getAttribute('value') : null,
+    json_ld: jsonLd,
+  };
+}
+"""
+
+# 出品者一覧（AOD）のカードを1回の page.evaluate でまとめて抜き出すJS
+# 戻り値は _offers_from_payload の payload と同じ形
+_EXTRACT_OFFERS_JS = r"""
+() => {
+  const text = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.innerText : null;
+  };
+  const pinned = document.querySelector('#aod-pinned-offer');
+  return {
+    pinned_price_text: pinned ? text(pinned, '.a-offscreen') : null,
+    offers: Array.from(document.querySelectorAll('#aod-offer'), (card) => ({
+      price_text: text(card, '.a-offscreen'),
+      condition_text: text(card, '#aod-offer-heading h5'),
+      seller_text: text(card, '#aod-offer-soldBy a'),
+      shipping_text: text(card, '#aod-offer-shippingMessage .a-color-base'),
+      fulfillment_text: text(card, '#aod-offer-shippingMessage'),
+    })),
+  };
+}
+"""
+
+# 上のCSSセレクタのHTML(lxml)版
+_PRICE_XPATHS = [
+    f"//span[{xp_class('a-price')}]//span[{xp_class('a-offscreen')}]",
+    "//*[@id='priceblock_ourprice']",
+    "//*[@id='priceblock_dealprice']",
+    f"//*[@id='corePrice_feature_div']//span[{xp_class('a-offscreen')}]",
+    f"//*[{xp_class('a-price')}]//*[{xp_class('a-offscreen')}]",
+]
+_DETAIL_ROW_XPATH = (
+    "//*[@id='productDetails_techSpec_section_1']//tr"
+    " | //*[@id='detailBullets_feature_div']//li"
+    " | //*[@id='productDetails_detailBullets_sections1']//tr"
+)
+
+
+def _price_from_text(text: str | None) -> int | None:
+    """"￥5,980" のような価格テキストから数値を取り出す"""
+    if not text:
+        return None
+    match = re.search(r"[\d,]+", text.strip().replace("￥", ""))
+    if not match:
+        return None
+    digits = match.group().replace(",", "")
+    return int(digits) if digits else None
+
+
+def _is_captcha_html(html: str) -> bool:
+    """ボット検知（CAPTCHA）ページか"""
+    return "captchacharacters" in html or "validateCaptcha" in html
+
+
+def _jsonld_product(items: list) -> dict | None:
+    """JSON-LD群から @type=Product のオブジェクトを探す（@graph・配列にも対応）"""
+    stack = list(items or [])
+    while stack:
+        item = stack.pop(0)
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            if item.get("@type") == "Product":
+                return item
+            stack.extend(item.get("@graph") or [])
+    return None
+
+
+def _jsonld_price(ld: dict) -> int | None:
+    offers = ld.get("offers")
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if not isinstance(offers, dict):
+        return None
+    price = offers.get("price") or offers.get("lowPrice")
+    try:
+        return int(float(price)) if price is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _product_from_payload(payload: dict, asin: str) -> AmazonProduct:
+    """商品ページの生データを AmazonProduct に変換
+
+    payload の形（ブラウザ版・HTML版で共通）:
+      title / price_texts: _PRICE_SELECTORS 順の最初の一致テキスト / byline
+      detail_rows: 商品情報の各行 / breadcrumbs: パンくず各リンク
+      image_hires, image_src / rating_text / review_text
+      twister_price: 価格データの hidden input / json_ld: JSON-LD（あれば表示要素の補完に使う）
+    """
     product = AmazonProduct(asin=asin)
+    ld = _jsonld_product(payload.get("json_ld") or []) or {}
 
     # タイトル
-    title_el = await page.query_selector("#productTitle")
-    if title_el:
-        product.title = (await title_el.inner_text()).strip()
-
-    # 価格（複数のセレクタパターンに対応）
-    price_selectors = [
-        "span.a-price span.a-offscreen",
-        "#priceblock_ourprice",
-        "#priceblock_dealprice",
-        "#corePrice_feature_div span.a-offscreen",
-        ".a-price .a-offscreen",
-    ]
-    for selector in price_selectors:
-        price_el = await page.query_selector(selector)
-        if price_el:
-            price_text = (await price_el.inner_text()).strip()
-            price_match = re.search(r"[\d,]+", price_text.replace("￥", ""))
-            if price_match:
-                product.price = int(price_match.group().replace(",", ""))
-                break
+    if payload.get("title"):
+        product.title = payload["title"].strip()
+    elif isinstance(ld.get("name"), str):
+        product.title = ld["name"].strip()
+
+    # 価格
+    for price_text in payload.get("price_texts") or []:
+        price = _price_from_text(price_text)
+        if price is not None:
+            product.price = price
+            break
+    # 価格ブロックが描画されないページ（バリエーション親等）は構造化データで補う
+    if product.price is None:
+        product.price = _jsonld_price(ld)
+    if product.price is None and payload.get("twister_price"):
+        try:
+            product.price = int(float(payload["twister_price"]))
+        except ValueError:
+            pass
 
     # ブランド
-    brand_el = await page.query_selector("#bylineInfo")
-    if brand_el:
-        brand_text = (await brand_el.inner_text()).strip()
+    if payload.get("byline"):
         # "ブランド: XXX" or "XXXのストアを表示" パターン
-        brand_text = re.sub(r"(ブランド:\s*|のストアを表示)", "", brand_text).strip()
+        brand_text = re.sub(r"(ブランド:\s*|のストアを表示)", "", payload["byline"].strip()).strip()
         if brand_text:
             product.brand = brand_text
+    if product.brand is None:
+        brand = ld.get("brand")
+        brand = brand.get("name") if isinstance(brand, dict) else brand
+        if isinstance(brand, str) and brand.strip():
+            product.brand = brand.strip()
 
     # 型番 - 商品情報テーブルから取得
-    detail_rows = await page.query_selector_all(
-        "#productDetails_techSpec_section_1 tr, "
-        "#detailBullets_feature_div li, "
-        "#productDetails_detailBullets_sections1 tr"
-    )
-    for row in detail_rows:
-        text = (await row.inner_text()).strip()
+    for text in payload.get("detail_rows") or []:
+        text = text.strip()
         if "型番" in text or "モデル番号" in text or "Model" in text:
             # "型番\tABC-123" のようなパターン
             parts = re.split(r"[\t\n:：]", text)
             if len(parts) >= 2:
                 product.model_number = parts[-1].strip()
                 break
+    if product.model_number is None and isinstance(ld.get("mpn"), str):
+        product.model_number = ld["mpn"].strip() or None
 
-    # カテゴリ - パンくずリストから取得
-    breadcrumbs = await page.query_selector_all("#wayfinding-breadcrumbs_feature_div a")
+    # カテゴリ - パンくずリストの最後をカテゴリとする
+    breadcrumbs = payload.get("breadcrumbs") or []
     if breadcrumbs:
-        # 最後のパンくずをカテゴリとする
-        last_crumb = breadcrumbs[-1]
-        product.category = (await last_crumb.inner_text()).strip()
-
-    # 画像URL
-    img_el = await page.query_selector("#landingImage, #imgBlkFront")
-    if img_el:
-        # data-old-hires が高解像度、なければ src
-        product.image_url = (
-            await img_el.get_attribute("data-old-hires")
-            or await img_el.get_attribute("src")
-        )
+        product.category = breadcrumbs[-1].strip()
+
+    # 画像URL - data-old-hires が高解像度、なければ src
+    product.image_url = payload.get("image_hires") or payload.get("image_src")
 
     # 評価
-    rating_el = await page.query_selector("#acrPopover span.a-icon-alt")
-    if rating_el:
-        rating_text = (await rating_el.inner_text()).strip()
-        rating_match = re.search(r"([\d.]+)", rating_text)
-        if rating_match:
-            product.rating = float(rating_match.group(1))
+    rating_text = payload.get("rating_text") or ""
+    rating_match = re.search(r"([\d.]+)", rating_text)
+    if rating_match:
+        product.rating = float(rating_match.group(1))
 
     # レビュー数
-    review_el = await page.query_selector("#acrCustomerReviewText")
-    if review_el:
-        review_text = (await review_el.inner_text()).strip()
-        review_match = re.search(r"[\d,]+", review_text)
-        if review_match:
-            product.review_count = int(review_match.group().replace(",", ""))
+    review_match = re.search(r"[\d,]+", payload.get("review_text") or "")
+    if review_match:
+        product.review_count = int(review_match.group().replace(",", ""))
 
     return product
 
 
-async def _parse_offers_page(page: Page) -> list[CompetitorOffer]:
-    """出品者一覧ページから競合価格を取得"""
-    offers = []
-
-    offer_items = await page.query_selector_all(
-        "#aod-offer, .olpOffer, div[id^='aod-price']"
-    )
+def _offers_from_payload(payload: dict) -> list[CompetitorOffer]:
+    """出品者一覧の生データを CompetitorOffer のリストに変換
 
-    # Alternative: aod (All Offers Display) パターン
-    if not offer_items:
-        offer_items = await page.query_selector_all(
-            "#all-offers-display-scroller .a-section.a-spacing-none"
-        )
+    payload の形（ブラウザ版・HTML版で共通）:
+      pinned_price_text: Amazon本体の価格 / offers: 各出品カードの
+      price_text, condition_text, seller_text, shipping_text, fulfillment_text
+    """
+    offers = []
 
     # pinned offer（Amazonが販売の場合）
-    pinned = await page.query_selector("#aod-pinned-offer")
-    if pinned:
-        price_el = await pinned.query_selector(".a-offscreen")
-        if price_el:
-            price_text = (await price_el.inner_text()).strip()
-            price_match = re.search(r"[\d,]+", price_text.replace("￥", ""))
-            if price_match:
-                offers.append(
-                    CompetitorOffer(
-                        price=int(price_match.group().replace(",", "")),
-                        condition="新品",
-                        seller_name="Amazon.co.jp",
-                        is_fba=True,
-                    )
-                )
+    pinned_price = _price_from_text(payload.get("pinned_price_text"))
+    if pinned_price is not None:
+        offers.append(
+            CompetitorOffer(
+                price=pinned_price,
+                condition="新品",
+                seller_name="Amazon.co.jp",
+                is_fba=True,
+            )
+        )
 
     # 各出品者のオファー
-    offer_cards = await page.query_selector_all("#aod-offer")
-    for card in offer_cards:
+    for card in payload.get("offers") or []:
         try:
-            # 価格
-            price_el = await card.query_selector(".a-offscreen")
-            if not price_el:
-                continue
-            price_text = (await price_el.inner_text()).strip()
-            price_match = re.search(r"[\d,]+", price_text.replace("￥", ""))
-            if not price_match:
+            price = _price_from_text(card.get("price_text"))
+            if price is None:
                 continue
-            price = int(price_match.group().replace(",", ""))
-
-            # コンディション
-            condition = "新品"
-            cond_el = await card.query_selector("#aod-offer-heading h5")
-            if cond_el:
-                cond_text = (await cond_el.inner_text()).strip()
-                if "中古" in cond_text:
-                    condition = "中古"
-
-            # 出品者名
-            seller_name = None
-            seller_el = await card.query_selector("#aod-offer-soldBy a")
-            if seller_el:
-                seller_name = (await seller_el.inner_text()).strip()
-
-            # 送料
+
+            condition = "中古" if "中古" in (card.get("condition_text") or "") else "新品"
+            seller_name = (card.get("seller_text") or "").strip() or None
+
             shipping_cost = 0
-            ship_el = await card.query_selector(
-                "#aod-offer-shippingMessage .a-color-base"
-            )
-            if ship_el:
-                ship_text = (await ship_el.inner_text()).strip()
-                ship_match = re.search(r"[\d,]+", ship_text)
-                if ship_match:
-                    shipping_cost = int(ship_match.group().replace(",", ""))
-
-            # FBA判定
-            is_fba = False
-            fulfillment_el = await card.query_selector("#aod-offer-shippingMessage")
-            if fulfillment_el:
-                ful_text = (await fulfillment_el.inner_text()).strip()
-                is_fba = "Amazon.co.jp" in ful_text and "発送" in ful_text
+            ship_match = re.search(r"[\d,]+", card.get("shipping_text") or "")
+            if ship_match:
+                shipping_cost = int(ship_match.group().replace(",", ""))
+
+            ful_text = card.get("fulfillment_text") or ""
+            is_fba = "Amazon.co.jp" in ful_text and "発送" in ful_text
 
             offers.append(
                 CompetitorOffer(
@@ -214,49 +305,200 @@ async def _parse_offers_page(page: Page) -> list[CompetitorOffer]:
     return offers
 
 
-async def get_amazon_product(asin: str) -> AmazonProduct | None:
-    """ASIN指定でAmazon商品情報を取得"""
-    url = AMAZON_PRODUCT_URL.format(asin=asin)
+async def _parse_product_page(page: Page, asin: str) -> AmazonProduct:
+    """Amazon商品ページから情報を抽出（1回のevaluateで一括取得）"""
+    payload = await page.evaluate(_EXTRACT_PRODUCT_JS, _PRICE_SELECTORS)
+    return _product_from_payload(payload, asin)
 
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(page, url)
-            if not success:
-                logger.error(f"Failed to load Amazon product page: {asin}")
-                return None
 
-            # ボット検知チェック
-            captcha = await page.query_selector(
-                "#captchacharacters, form[action*='validateCaptcha']"
-            )
-            if captcha:
-                logger.error(f"CAPTCHA detected for ASIN: {asin}")
-                return None
+async def _parse_offers_page(page: Page) -> list[CompetitorOffer]:
+    """出品者一覧ページから競合価格を取得（1回のevaluateで一括取得）"""
+    return _offers_from_payload(await page.evaluate(_EXTRACT_OFFERS_JS))
+
+
+def _first_text(root, xpath: str) -> str | None:
+    found = root.xpath(xpath)
+    return inner_text(found[0]) if found else None
+
+
+def parse_product_html(html: str, asin: str) -> AmazonProduct | None:
+    """商品ページHTMLから情報を抽出（CAPTCHA・商品タイトル無しなら None）"""
+    if _is_captcha_html(html):
+        return None
+    doc = parse_html(html)
+    if doc is None or not doc.xpath("//*[@id='productTitle']"):
+        return None
+
+    img = doc.xpath("//*[@id='landingImage' or @id='imgBlkFront']")
+    twister = doc.xpath("//input[@id='twister-plus-price-data-price']")
+    json_ld = []
+    for raw in doc.xpath("//script[@type='application/ld+json']/text()"):
+        try:
+            json_ld.append(json.loads(raw))
+        except ValueError:
+            continue  # 壊れたJSON-LDは無視
+    payload = {
+        "title": _first_text(doc, "//*[@id='productTitle']"),
+        "price_texts": [_first_text(doc, xp) for xp in _PRICE_XPATHS],
+        "byline": _first_text(doc, "//*[@id='bylineInfo']"),
+        "detail_rows": [inner_text(row) for row in doc.xpath(_DETAIL_ROW_XPATH)],
+        "breadcrumbs": [
+            inner_text(a) for a in doc.xpath("//*[@id='wayfinding-breadcrumbs_feature_div']//a")
+        ],
+        "image_hires": img[0].get("data-old-hires") if img else None,
+        "image_src": img[0].get("src") if img else None,
+        "rating_text": _first_text(
+            doc, f"//*[@id='acrPopover']//span[{xp_class('a-icon-alt')}]"
+        ),
+        "review_text": _first_text(doc, "//*[@id='acrCustomerReviewText']"),
+        "twister_price": twister[0].get("value") if twister else None,
+        "json_ld": json_ld,
+    }
+    return _product_from_payload(payload, asin)
+
+
+def parse_offers_html(html: str) -> list[CompetitorOffer] | None:
+    """出品者一覧HTMLから競合価格を取得（CAPTCHA・AODマークアップ無しなら None）"""
+    if _is_captcha_html(html):
+        return None
+    doc = parse_html(html)
+    if doc is None:
+        return None
+    pinned = doc.xpath("//*[@id='aod-pinned-offer']")
+    cards = doc.xpath("//*[@id='aod-offer']")
+    if not pinned and not cards:
+        return None
+
+    payload: dict = {"offers": []}
+    if pinned:
+        payload["pinned_price_text"] = _first_text(pinned[0], f".//*[{xp_class('a-offscreen')}]")
+    for card in cards:
+        payload["offers"].append({
+            "price_text": _first_text(card, f".//*[{xp_class('a-offscreen')}]"),
+            "condition_text": _first_text(card, ".//*[@id='aod-offer-heading']//h5"),
+            "seller_text": _first_text(card, ".//*[@id='aod-offer-soldBy']//a"),
+            "shipping_text": _first_text(
+                card, f".//*[@id='aod-offer-shippingMessage']//*[{xp_class('a-color-base')}]"
+            ),
+            "fulfillment_text": _first_text(card, ".//*[@id='aod-offer-shippingMessage']"),
+        })
+    return _offers_from_payload(payload)
+
+
+# Cookie無しのHTTP取得はAmazonに弾かれやすい。連続で弾かれたら暫くブラウザだけで取得する
+_http_probe_blocks = 0
+_http_probe_disabled_until = 0.0
+
+
+def _http_probe_enabled() -> bool:
+    return settings.scrape_http_first and time.monotonic() >= _http_probe_disabled_until
+
+
+def _record_http_probe(ok: bool) -> None:
+    global _http_probe_blocks, _http_probe_disabled_until
+    if ok:
+        _http_probe_blocks = 0
+        return
+    _http_probe_blocks += 1
+    if _http_probe_blocks >= settings.amazon_http_probe_max_blocks:
+        _http_probe_blocks = 0
+        _http_probe_disabled_until = (
+            time.monotonic() + settings.amazon_http_probe_cooldown_seconds
+        )
+        logger.warning(
+            f"Amazon HTTP fetch blocked repeatedly; browser only for "
+            f"{settings.amazon_http_probe_cooldown_seconds}s"
+        )
+
 
-            product = await _parse_product_page(page, asin)
-            logger.info(f"Scraped Amazon product: {product.title} ({asin})")
+async def _fetch_html_for(url: str, what: str) -> str | None:
+    """HTTP優先取得。弾かれたら None（ブラウザへ回す）
+
+    お試し取得なので結果は probe_limiter にだけ報告し、ブラウザ経路の
+    レート・ブレーカーは減速させない（ホストの減速はブラウザでもCAPTCHAの時だけ）。
+    """
+    if not _http_probe_enabled():
+        return None
+    html = await fetch_html(url, limiter=probe_limiter)
+    if html is None:
+        _record_http_probe(False)
+        return None
+    if _is_captcha_html(html):
+        logger.info(f"CAPTCHA over HTTP for {what}, falling back to browser")
+        _record_http_probe(False)
+        return None
+    _record_http_probe(True)
+    return html
+
+
+async def get_amazon_product(asin: str, fresh: bool = False) -> AmazonProduct | None:
+    """ASIN指定でAmazon商品情報を取得（同じASINの同時取得は1回にまとめる）
+
+    fresh=True なら永続キャッシュを読まずに取得する（価格リフレッシュ用。
+    キャッシュの古い価格に「今」の更新時刻を付けないため）。取得結果はキャッシュに保存する。
+    """
+    return await single_flight.do(
+        "amazon_product_fresh" if fresh else "amazon_product", asin,
+        lambda: scrape_cache.read_through(
+            "amazon_product", asin, AmazonProduct,
+            lambda: _get_amazon_product(asin),
+            refresh=fresh,
+        ),
+    )
+
+
+async def _get_amazon_product(asin: str) -> AmazonProduct | None:
+    url = AMAZON_PRODUCT_URL.format(asin=asin)
+
+    html = await _fetch_html_for(url, f"ASIN: {asin}")
+    if html is not None:
+        product = parse_product_html(html, asin)
+        if product is not None:
+            logger.info(f"Fetched Amazon product over HTTP: {product.title} ({asin})")
             return product
+        logger.info(f"No product markup over HTTP, falling back to browser: {asin}")
+
+    async with fetch_page(url) as page:
+        if page is None:
+            logger.error(f"Failed to load Amazon product page: {asin}")
+            return None
+
+        # ボット検知チェック（検知されたらホスト全体のレートを下げる）
+        captcha = await page.query_selector(_CAPTCHA_SELECTOR)
+        if captcha:
+            logger.error(f"CAPTCHA detected for ASIN: {asin}")
+            rate_limiter.record_throttle(url)
+            return None
+
+        product = await _parse_product_page(page, asin)
+        logger.info(f"Scraped Amazon product: {product.title} ({asin})")
+        return product
 
 
 async def get_competitor_offers(asin: str) -> list[CompetitorOffer]:
     """ASIN指定で競合出品者の価格一覧を取得"""
     url = AMAZON_OFFERS_URL.format(asin=asin)
 
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(page, url)
-            if not success:
-                logger.error(f"Failed to load offers page: {asin}")
-                return []
-
-            # ボット検知チェック
-            captcha = await page.query_selector(
-                "#captchacharacters, form[action*='validateCaptcha']"
-            )
-            if captcha:
-                logger.error(f"CAPTCHA detected on offers page: {asin}")
-                return []
-
-            offers = await _parse_offers_page(page)
-            logger.info(f"Found {len(offers)} offers for ASIN: {asin}")
+    html = await _fetch_html_for(url, f"offers of {asin}")
+    if html is not None:
+        offers = parse_offers_html(html)
+        if offers is not None:
+            logger.info(f"Found {len(offers)} offers over HTTP for ASIN: {asin}")
             return offers
+        logger.info(f"No offers markup over HTTP, falling back to browser: {asin}")
+
+    async with fetch_page(url) as page:
+        if page is None:
+            logger.error(f"Failed to load offers page: {asin}")
+            return []
+
+        # ボット検知チェック
+        captcha = await page.query_selector(_CAPTCHA_SELECTOR)
+        if captcha:
+            logger.error(f"CAPTCHA detected on offers page: {asin}")
+            rate_limiter.record_throttle(url)
+            return []
+
+        offers = await _parse_offers_page(page)
+        logger.info(f"Found {len(offers)} offers for ASIN: {asin}")
+        return offers
@@ -1,13 +1,15 @@
-"""Playwright基盤スクレイパー - stealth設定・遅延・リトライ付き"""
+"""Playwright基盤スクレイパー - stealth設定・レート制限・リトライ・ブラウザプール付き"""
 import asyncio
 import logging
 import random
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
-from playwright.async_api import Browser, Page, async_playwright
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
 from playwright_stealth import Stealth
 
 from app.config import settings
+from app.scrapers.ratelimit import THROTTLE_STATUSES, CircuitOpenError, rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -24,49 +26,235 @@ stealth = Stealth()
 _BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
 
 
-async def random_delay(min_sec: float | None = None, max_sec: float | None = None):
-    """ランダム遅延（デフォルト: Yahoo設定の3〜8秒）"""
-    min_val = min_sec if min_sec is not None else settings.yahoo_request_delay_min
-    max_val = max_sec if max_sec is not None else settings.yahoo_request_delay_max
-    delay = random.uniform(min_val, max_val)
-    logger.debug(f"Waiting {delay:.1f}s...")
-    await asyncio.sleep(delay)
-
-
-# ===== 共有ブラウザ（起動コストを1回に集約） =====
+# ===== ブラウザプール（起動・コンテキスト作成コストを使い回しで償却） =====
 
 _pw_cm = None          # stealth.use_async(async_playwright()) のコンテキストマネージャ
 _playwright = None     # その __aenter__ 戻り値
-_browser: Browser | None = None
-_browser_lock = asyncio.Lock()
-
-
-async def get_shared_browser() -> Browser:
-    """プロセス内で1つだけ起動するブラウザを返す（使い回し）"""
-    global _pw_cm, _playwright, _browser
-    if _browser is not None and _browser.is_connected():
-        return _browser
-    async with _browser_lock:
-        # ロック取得待ちの間に他タスクが初期化済みかもしれない
-        if _browser is not None and _browser.is_connected():
-            return _browser
+_playwright_lock = asyncio.Lock()
+
+
+async def _get_playwright():
+    """Playwright本体をプロセス内で1回だけ起動して返す"""
+    global _pw_cm, _playwright
+    if _playwright is not None:
+        return _playwright
+    async with _playwright_lock:
         if _playwright is None:
             _pw_cm = stealth.use_async(async_playwright())
             _playwright = await _pw_cm.__aenter__()
-        _browser = await _playwright.chromium.launch(headless=True)
-        logger.info("Shared browser launched")
-        return _browser
+        return _playwright
 
 
-async def close_shared_browser() -> None:
-    """共有ブラウザ・Playwrightを終了（lifespan shutdownで呼ぶ）"""
-    global _pw_cm, _playwright, _browser
-    if _browser is not None:
+async def _block_heavy_resources(route):
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@dataclass
+class _PooledPage:
+    """プールが管理する1枚のページ（専用コンテキスト付き）"""
+    browser_index: int
+    browser: Browser
+    context: BrowserContext
+    page: Page
+    uses: int = 0
+    crashed: bool = False
+
+    def is_healthy(self) -> bool:
+        return (
+            not self.crashed
+            and self.browser.is_connected()
+            and not self.page.is_closed()
+        )
+
+
+class BrowserPool:
+    """N個のChromiumプロセスに分散した、ルーティング設定済みページのプール
+
+    - ページ（=コンテキスト）は使い回し、max_uses 回使ったら作り直す（UAもここで入れ替わる）
+    - 利用中に例外・クラッシュしたページは返却時に破棄する
+    - 同時貸し出し数は browsers × pages_per_browser で頭打ち（超えた分は待つ）
+    """
+
+    def __init__(self, browsers: int, pages_per_browser: int, max_uses: int):
+        self.browsers = max(1, browsers)
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.max_uses = max(1, max_uses)
+        self._browsers: list[Browser | None] = [None] * self.browsers
+        self._live: list[int] = [0] * self.browsers   # ブラウザごとの生存ページ数（貸出中+待機）
+        self._idle: list[_PooledPage] = []
+        self._slots = asyncio.Semaphore(self.capacity)
+        self._launch_lock = asyncio.Lock()
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._recycled = 0
+        self._crashed = 0
+        self._leases = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.browsers * self.pages_per_browser
+
+    async def get_browser(self, index: int = 0) -> Browser:
+        """index番目のブラウザを返す（未起動・切断済みなら起動し直す）"""
+        browser = self._browsers[index]
+        if browser is not None and browser.is_connected():
+            return browser
+        async with self._launch_lock:
+            browser = self._browsers[index]
+            if browser is not None and browser.is_connected():
+                return browser
+            if browser is not None:
+                # プロセスが落ちた → そのブラウザの待機ページは全部無効
+                logger.warning(f"Browser #{index} disconnected, relaunching")
+                stale = [s for s in self._idle if s.browser_index == index]
+                self._idle = [s for s in self._idle if s.browser_index != index]
+                for slot in stale:
+                    await self._discard(slot)
+            pw = await _get_playwright()
+            browser = await pw.chromium.launch(headless=True)
+            self._browsers[index] = browser
+            logger.info(f"Pool browser #{index} launched")
+            return browser
+
+    async def _create(self) -> _PooledPage:
+        # 生存ページが最も少ないブラウザに割り当てる
+        index = min(range(self.browsers), key=lambda i: self._live[i])
+        self._live[index] += 1
+        try:
+            browser = await self.get_browser(index)
+            context = await browser.new_context(
+                user_agent=random.choice(USER_AGENTS),
+                viewport={"width": 1920, "height": 1080},
+                locale="ja-JP",
+                timezone_id="Asia/Tokyo",
+            )
+            await context.route("**/*", _block_heavy_resources)
+            page = await context.new_page()
+        except BaseException:
+            self._live[index] -= 1
+            raise
+        slot = _PooledPage(index, browser, context, page)
+        page.on("crash", lambda _: setattr(slot, "crashed", True))
+        self._created += 1
+        return slot
+
+    async def _discard(self, slot: _PooledPage) -> None:
+        self._live[slot.browser_index] = max(0, self._live[slot.browser_index] - 1)
         try:
-            await _browser.close()
+            await slot.context.close()
         except Exception:
             pass
-        _browser = None
+
+    async def _checkout(self) -> _PooledPage:
+        while self._idle:
+            slot = self._idle.pop()
+            if slot.is_healthy():
+                return slot
+            await self._discard(slot)
+        return await self._create()
+
+    async def _checkin(self, slot: _PooledPage) -> None:
+        if slot.crashed:
+            self._crashed += 1
+        if slot.is_healthy() and slot.uses < self.max_uses:
+            self._idle.append(slot)
+            return
+        self._recycled += 1
+        await self._discard(slot)
+
+    @asynccontextmanager
+    async def lease(self):
+        """ページを1枚借りる（返却時に再利用 or 作り直しを判定）"""
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            slot = await self._checkout()
+            self._in_use += 1
+            self._leases += 1
+            try:
+                yield slot.page
+            except BaseException:
+                # 途中で失敗したページは状態が不明なので作り直す
+                slot.crashed = True
+                raise
+            finally:
+                self._in_use -= 1
+                slot.uses += 1
+                await self._checkin(slot)
+        finally:
+            self._slots.release()
+
+    async def warm(self) -> None:
+        """空いている枠の分だけページを事前に作成しておく（初回リクエストの待ちを無くす）
+
+        作成中に貸し出しと競合して上限を超えないよう、空き枠を確保してから作る。
+        """
+        held = 0
+        try:
+            while not self._slots.locked():
+                await self._slots.acquire()
+                held += 1
+            for _ in range(held - len(self._idle)):
+                self._idle.append(await self._create())
+        finally:
+            for _ in range(held):
+                self._slots.release()
+        logger.info(f"Browser pool warmed ({len(self._idle)} idle pages)")
+
+    def stats(self) -> dict:
+        """プールの混雑状況"""
+        return {
+            "browsers": self.browsers,
+            "browsers_connected": sum(
+                1 for b in self._browsers if b is not None and b.is_connected()
+            ),
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiting": self._waiting,
+            "utilization": round(self._in_use / self.capacity, 2),
+            "leases": self._leases,
+            "created": self._created,
+            "recycled": self._recycled,
+            "crashed": self._crashed,
+        }
+
+    async def close(self) -> None:
+        """全ページ・全ブラウザを閉じる"""
+        for slot in self._idle:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        for i, browser in enumerate(self._browsers):
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+            self._browsers[i] = None
+            self._live[i] = 0
+
+
+browser_pool = BrowserPool(
+    browsers=settings.browser_pool_browsers,
+    pages_per_browser=settings.browser_pool_pages_per_browser,
+    max_uses=settings.browser_pool_max_uses,
+)
+
+
+async def close_shared_browser() -> None:
+    """ブラウザプール・Playwrightを終了（lifespan shutdownで呼ぶ）"""
+    global _pw_cm, _playwright
+    await browser_pool.close()
     if _pw_cm is not None:
         try:
             await _pw_cm.__aexit__(None, None, None)
@@ -78,63 +266,65 @@ async def close_shared_browser() -> None:
 
 
 @asynccontextmanager
-async def get_browser():
-    """後方互換: 共有ブラウザをコンテキストマネージャー形式で返す（閉じない）"""
-    browser = await get_shared_browser()
-    yield browser
-
+async def get_page():
+    """プールからページを借りる（UA回転+日本語設定+重いリソースのブロック済み）"""
+    async with browser_pool.lease() as page:
+        yield page
 
-async def _block_heavy_resources(route):
-    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
-        await route.abort()
-    else:
-        await route.continue_()
 
+async def _goto(
+    page: Page, url: str, attempt: int, started_at: float | None = None
+) -> tuple[bool, bool]:
+    """1回分のページ読み込み。(成功したか, 再試行する価値があるか) を返す
 
-@asynccontextmanager
-async def get_page(browser: Browser):
-    """ページを提供（UA回転+日本語設定+重いリソースのブロック）"""
-    ua = random.choice(USER_AGENTS)
-    context = await browser.new_context(
-        user_agent=ua,
-        viewport={"width": 1920, "height": 1080},
-        locale="ja-JP",
-        timezone_id="Asia/Tokyo",
-    )
-    await context.route("**/*", _block_heavy_resources)
-    page = await context.new_page()
+    結果はレートリミッターへ報告する（429/503 は減速、成功は加速）。
+    started_at は acquire() がトークンを渡した時刻（ブレーカーの復帰判定に使う）。
+    """
     try:
-        yield page
-    finally:
-        await page.close()
-        await context.close()
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+    except Exception as e:
+        logger.warning(f"Attempt {attempt + 1}: {e}")
+        rate_limiter.record_failure(url)
+        return False, True
+    if response and response.ok:
+        rate_limiter.record_success(url, started_at)
+        return True, False
+    status = response.status if response else None
+    logger.warning(f"Attempt {attempt + 1}: HTTP {status} for {url}")
+    if status in THROTTLE_STATUSES:
+        rate_limiter.record_throttle(url)
+        return False, True
+    # 4xx（404等）は再試行しても無駄なので即中断（ホスト側の不調ではない）
+    if status is not None and 400 <= status < 500:
+        return False, False
+    rate_limiter.record_failure(url)
+    return False, True
 
 
-async def fetch_with_retry(
-    page: Page,
-    url: str,
-    max_retries: int = 3,
-    delay_min: float | None = None,
-    delay_max: float | None = None,
-) -> bool:
-    """リトライ付きページ読み込み。成功時True、失敗時False
+@asynccontextmanager
+async def fetch_page(url: str, max_retries: int = 3):
+    """レート制限→ページ貸出→読み込みをリトライ付きで行い、読み込み済みページを渡す
 
-    delay_min/max を指定すると事前待機を上書きできる（対話検索は短く、巡回は長く）。
+    失敗時（リトライ切れ・404・ブレーカー作動中）は None を渡す。
+    トークン待ちとリトライ間の待機はページを借りる前/返した後に行うので、
+    待っている間もプールのページを占有しない。
     """
     for attempt in range(max_retries):
         try:
-            await random_delay(delay_min, delay_max)
-            response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            if response and response.ok:
-                return True
-            status = response.status if response else None
-            logger.warning(f"Attempt {attempt + 1}: HTTP {status} for {url}")
-            # 4xx（404等）は再試行しても無駄なので即中断
-            if status is not None and 400 <= status < 500:
-                return False
-        except Exception as e:
-            logger.warning(f"Attempt {attempt + 1}: {e}")
+            started_at = await rate_limiter.acquire(url)
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            break
+        async with get_page() as page:
+            ok, retryable = await _goto(page, url, attempt, started_at)
+            if ok:
+                yield page
+                return
+        if not retryable:
+            break
         if attempt < max_retries - 1:
             await asyncio.sleep(5 * (attempt + 1))
-    logger.error(f"Failed after {max_retries} attempts: {url}")
-    return False
+    else:
+        logger.error(f"Failed after {max_retries} attempts: {url}")
+    yield None
+
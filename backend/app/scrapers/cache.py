@@ -0,0 +1,175 @@
+"""件数・バイト数上限付きのLRUキャッシュ（stale-while-revalidate対応）
+
+長時間動かすサーバーでキーワードが増え続けてもメモリを食い潰さないよう、
+エントリ数とおおよそのバイト数（pickle後のサイズ）の両方で上限を設け、
+超えたら最も長く使われていないものから捨てる。
+
+TTLを過ぎたエントリも stale_ttl の間は「古い値」として即座に返し、
+裏で再取得（revalidate）を走らせる。対話的な検索の応答を待たせないため。
+再取得に失敗したキーは retry_after 秒間は再取得しない（障害・ブロック中の連打防止）。
+"""
+import asyncio
+import logging
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    stored_at: float
+    ttl: float
+
+
+def _sizeof(value: Any) -> int:
+    """値のおおよそのバイト数"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """TTL・LRU・バイト予算付きのメモリキャッシュ"""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        stale_ttl: float = 0,
+        retry_after: float = 60,
+    ):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_after = retry_after
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self._failed_at: dict[Hashable, float] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def get(self, key: Hashable) -> tuple[Any, bool] | None:
+        """(値, 新鮮か) を返す。無い・stale期間も過ぎた場合は None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        age = time.monotonic() - entry.stored_at
+        if age >= entry.ttl + self.stale_ttl:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        fresh = age < entry.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry.value, fresh
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """値を格納し、上限を超えた分を古い順に追い出す"""
+        size = _sizeof(value)
+        self._failed_at.pop(key, None)
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            # 1件で予算を超える値は入れない（他を全部追い出すのを避ける）
+            logger.debug(f"Cache {self.name}: value too large ({size} bytes), not cached")
+            return
+        self._entries[key] = _Entry(
+            value=value, size=size, stored_at=time.monotonic(),
+            ttl=self.ttl if ttl is None else ttl,
+        )
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._failed_at.clear()
+        self._bytes = 0
+
+    def mark_failed(self, key: Hashable) -> None:
+        """再取得の失敗を記録する（retry_after 秒間は revalidate しない）"""
+        self._failed_at[key] = time.monotonic()
+
+    def revalidate(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> None:
+        """バックグラウンドで再取得を走らせる（同じキーの再取得は1本だけ）
+
+        refresh() 側で set() する。失敗してもログだけ残し、古い値は残す。
+        """
+        if key in self._refreshing:
+            return
+        failed_at = self._failed_at.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+            return
+        self.refreshes += 1
+        task = asyncio.ensure_future(refresh())
+        self._refreshing[key] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"Cache {self.name}: refresh failed for {key!r}: {t.exception()}")
+
+        task.add_done_callback(_done)
+
+    async def wait_refreshes(self) -> None:
+        """実行中の再取得が終わるまで待つ"""
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+
+    def cancel_refreshes(self) -> None:
+        """実行中の再取得をすべて止める（シャットダウン・テスト後始末用）"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "refreshing": len(self._refreshing),
+        }
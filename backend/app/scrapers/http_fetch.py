@@ -0,0 +1,141 @@
+"""ブラウザを使わないHTTP取得 + HTMLパース基盤
+
+サーバーサイドレンダリング済みのページ（ヤフオク検索/詳細/落札相場など）は
+Chromiumで描画しなくても、HTMLを直接取得してlxmlで読めば同じ情報が取れる。
+1ページ数百ms・数MBで済むため、ブラウザはマークアップが無い/ブロックされた時の
+フォールバックに回す。
+
+- HTTPクライアントはプロセス内で1つを共有（コネクションプール・Cookieを使い回す）
+- アクセスはブラウザ経由と同じホスト単位レートリミッターを通す
+"""
+import logging
+import re
+
+import httpx
+import lxml.html
+from lxml import etree
+
+from app.scrapers.base import USER_AGENTS
+from app.scrapers.ratelimit import THROTTLE_STATUSES, CircuitOpenError, HostRateLimiter, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """共有HTTPクライアントを返す（初回呼び出し時に作成）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers={
+                "User-Agent": USER_AGENTS[0],
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "ja-JP,ja;q=0.9,en;q=0.8",
+            },
+            timeout=20,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """共有HTTPクライアントを閉じる（lifespan shutdownで呼ぶ）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch_html(url: str, limiter: HostRateLimiter = rate_limiter) -> str | None:
+    """URLのHTMLを取得する。失敗・ブロック時は None（呼び出し側でブラウザへフォールバック）
+
+    リトライはしない（失敗したらブラウザ経路が自前のリトライ付きで取り直す）。
+    limiter: 結果を報告するレートリミッター（弾かれやすいお試し取得は別バケットを渡す）
+    """
+    try:
+        started_at = await limiter.acquire(url)
+    except CircuitOpenError as e:
+        logger.warning(str(e))
+        return None
+    try:
+        resp = await get_http_client().get(url)
+    except httpx.HTTPError as e:
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
+        limiter.record_failure(url)
+        return None
+    if resp.status_code in THROTTLE_STATUSES:
+        logger.warning(f"HTTP {resp.status_code} for {url}")
+        limiter.record_throttle(url)
+        return None
+    if not resp.is_success:
+        logger.warning(f"HTTP {resp.status_code} for {url}")
+        if resp.status_code >= 500:
+            limiter.record_failure(url)
+        return None
+    limiter.record_success(url, started_at)
+    return resp.text
+
+
+# ===== HTMLパースの小道具 =====
+
+_UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# innerText で改行を挟むブロック要素
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "caption", "dd", "div", "dl",
+    "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2",
+    "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p",
+    "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+
+def parse_html(text: str) -> lxml.html.HtmlElement | None:
+    """HTML文字列をパースする（空・壊れたHTMLは None）"""
+    if not text or not text.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(text.encode("utf-8"), parser=_UTF8_PARSER)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def xp_class(name: str) -> str:
+    """CSSの .name に相当するXPath述語"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _collect_text(node, out: list[str]) -> None:
+    if not isinstance(node.tag, str):
+        return  # コメント・処理命令
+    tag = node.tag.lower()
+    if tag in _SKIP_TAGS:
+        return
+    block = tag in _BLOCK_TAGS
+    if block or tag == "br":
+        out.append("\n")
+    if node.text:
+        out.append(node.text)
+    for child in node:
+        _collect_text(child, out)
+        if child.tail:
+            out.append(child.tail)
+    if block:
+        out.append("\n")
+
+
+def inner_text(el) -> str:
+    """ブラウザの innerText 相当のテキスト（ブロック要素ごとに改行、空行は詰める）
+
+    ブラウザ版のパーサーは inner_text() の改行位置を前提に正規表現を書いているので、
+    HTML版でも同じ形のテキストを作ってパース処理を共有する。
+    """
+    if el is None:
+        return ""
+    out: list[str] = []
+    _collect_text(el, out)
+    text = "".join(out).replace("\xa0", " ")
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
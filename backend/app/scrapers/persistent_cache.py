@@ -0,0 +1,230 @@
+"""スクレイピング結果の永続キャッシュ（サイドカーSQLiteファイル）
+
+メモリ上のキャッシュは再起動やuvicornの別ワーカーでは共有されないため、
+取得結果を (種別, 正規化キー) 単位で別ファイルのSQLiteに保存して読み返す。
+
+- 値は dataclass（またはそのリスト）を JSON → zlib 圧縮して保存
+- 種別ごとにTTLを持ち、期限切れはヒット扱いしない（書き込み時にまとめて掃除）
+- 壊れた・古い形式で戻せない値はミス扱いにして消す（取得し直して上書きされる）
+- アプリ本体のDB（aiosqlite）とは別ファイル・標準の sqlite3 を to_thread で使う
+  （WALモードなので複数プロセスから同時に読み書きできる）
+- path が空なら無効（常にミス）
+"""
+import asyncio
+import dataclasses
+import json
+import logging
+import sqlite3
+import threading
+import time
+import types
+import typing
+import zlib
+from datetime import datetime
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app.config import settings
+from app.scrapers.singleflight import normalize_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 書き込みこの回数ごとに期限切れ行を削除する
+_PURGE_EVERY = 200
+
+
+def to_jsonable(value: Any) -> Any:
+    """dataclass・リスト・datetime を JSON に載せられる形にする"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _is_datetime_type(tp: Any) -> bool:
+    if tp is datetime:
+        return True
+    if typing.get_origin(tp) in (typing.Union, types.UnionType):
+        return datetime in typing.get_args(tp)
+    return False
+
+
+def from_jsonable(cls: type[T], data: dict) -> T:
+    """to_jsonable で保存した dict を dataclass に戻す（datetime 型のフィールドは復元）"""
+    hints = typing.get_type_hints(cls)
+    kwargs = {}
+    for f in dataclasses.fields(cls):
+        if f.name not in data:
+            continue  # 保存後に追加されたフィールドは既定値のまま
+        v = data[f.name]
+        if v is not None and _is_datetime_type(hints.get(f.name)):
+            v = datetime.fromisoformat(v)
+        kwargs[f.name] = v
+    return cls(**kwargs)
+
+
+class PersistentCache:
+    """種別ごとTTL付きのSQLite永続キャッシュ"""
+
+    def __init__(self, path: str, ttls: dict[str, int]):
+        self.path = path
+        self.ttls = ttls
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_scrape_cache_expires ON scrape_cache (expires_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get_sync(self, kind: str, key: str) -> bytes | None:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM scrape_cache WHERE kind = ? AND key = ? AND expires_at > ?",
+                (kind, key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _delete_sync(self, kind: str, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM scrape_cache WHERE kind = ? AND key = ?", (kind, key))
+            conn.commit()
+
+    def _set_sync(self, kind: str, key: str, blob: bytes, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (kind, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (kind, key, blob, expires_at),
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                conn.execute("DELETE FROM scrape_cache WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+
+    async def get(
+        self, kind: str, key: str, cls: type | None = None, many: bool = False
+    ) -> Any | None:
+        """保存済みの値を返す。無い・期限切れ・無効なら None
+
+        cls を渡すと dataclass（many=True ならそのリスト）に戻して返す（無ければJSON化した形）。
+        展開・変換できない値（壊れた行・dataclass のフィールドが変わる前の行）はミスとして消す。
+        """
+        if not self.enabled or kind not in self.ttls:
+            return None
+        key = normalize_key(key)
+        try:
+            blob = await asyncio.to_thread(self._get_sync, kind, key)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning(f"Persistent cache read failed ({kind}): {e}")
+            return None
+        if blob is None:
+            self.misses += 1
+            return None
+        try:
+            data = json.loads(zlib.decompress(blob))
+            if cls is not None:
+                data = [from_jsonable(cls, d) for d in data] if many else from_jsonable(cls, data)
+        except (zlib.error, ValueError, TypeError, AttributeError) as e:
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"Discarding unreadable persistent cache entry ({kind}): {e!r}")
+            try:
+                await asyncio.to_thread(self._delete_sync, kind, key)
+            except (sqlite3.Error, OSError):
+                pass
+            return None
+        self.hits += 1
+        return data
+
+    async def set(self, kind: str, key: str, value: Any) -> None:
+        """値（dataclass / そのリスト）を保存する"""
+        if not self.enabled or kind not in self.ttls:
+            return
+        blob = zlib.compress(
+            json.dumps(to_jsonable(value), ensure_ascii=False).encode("utf-8")
+        )
+        expires_at = time.time() + self.ttls[kind]
+        try:
+            await asyncio.to_thread(self._set_sync, kind, normalize_key(key), blob, expires_at)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += 1
+            logger.warning(f"Persistent cache write failed ({kind}): {e}")
+
+    async def read_through(
+        self,
+        kind: str,
+        key: str,
+        cls: type,
+        load: Callable[[], Awaitable[Any]],
+        many: bool = False,
+        refresh: bool = False,
+    ) -> Any:
+        """キャッシュにあればそれを返し、無ければ load() して保存する
+
+        cls は値の dataclass（many=True ならそのリスト）。
+        refresh=True ならキャッシュを読まずに load() する（結果は保存する）。
+        None・空リスト（取得失敗の可能性がある）は保存しない。
+        """
+        if not refresh:
+            cached = await self.get(kind, key, cls, many)
+            if cached is not None:
+                return cached
+        value = await load()
+        if value:
+            await self.set(kind, key, value)
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "writes": self._writes,
+        }
+
+
+scrape_cache = PersistentCache(
+    settings.scrape_cache_path,
+    ttls={
+        "yahoo_search": settings.scrape_cache_ttl_search,
+        "yahoo_detail": settings.scrape_cache_ttl_detail,
+        "yahoo_history": settings.scrape_cache_ttl_history,
+        "amazon_product": settings.scrape_cache_ttl_amazon,
+    },
+)
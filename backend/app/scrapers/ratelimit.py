@@ -0,0 +1,233 @@
+"""ホスト単位の適応型レートリミッター + サーキットブレーカー
+
+プロセス全体で1つ共有し、同じサイトへの同時アクセスを合算で制御する。
+- トークンバケット: ホストごとに rate（req/秒）でトークンが貯まり、burst 個まで溜められる
+- AIMD: 成功するたびに rate を少しずつ上げ（設定レート×max_rate_ratio まで）、
+  429/503/CAPTCHA で半減させる
+- サーキットブレーカー: 連続失敗が閾値を超えたら cooldown 秒間そのホストへは即失敗。
+  cooldown 後は半開状態になり、試行を1つだけ通す（結果が出るまで他は即失敗）。
+  作動前から飛んでいたリクエストの成功では閉じず、cooldown 後に出した試行の成功でだけ閉じる
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# サイト側の「アクセス過多」を示すステータス（レートを下げて再試行する）
+THROTTLE_STATUSES = {429, 503}
+
+
+class CircuitOpenError(Exception):
+    """ブレーカー作動中のホストにアクセスしようとした"""
+
+
+def host_key(url: str) -> str:
+    """URLからレート制御の単位となるホスト名を得る
+
+    auctions.yahoo.co.jp と page.auctions.yahoo.co.jp のように
+    同じサイトのサブドメインは1つのバケットにまとめる。
+    """
+    host = (urlparse(url).hostname or url).lower()
+    labels = host.split(".")
+    keep = 3 if host.endswith(".co.jp") else 2
+    return ".".join(labels[-keep:])
+
+
+@dataclass
+class _HostState:
+    rate: float                  # 現在の許容レート（req/秒）
+    base_rate: float             # 設定上のレート（上限・下限の基準）
+    tokens: float                # 残りトークン（負 = 予約済みの待ち行列）
+    updated_at: float
+    consecutive_failures: int = 0
+    open_until: float = 0.0      # ブレーカーが閉じる時刻（monotonic）
+    opened_at: float = 0.0       # 最後にブレーカーが作動した時刻
+    probe_in_flight: bool = False  # 半開状態の試行が結果待ち
+    probe_started_at: float = 0.0
+    throttled: int = 0
+    successes: int = 0
+    rejected: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class HostRateLimiter:
+    """ホストごとのトークンバケット（AIMD調整・サーキットブレーカー付き）"""
+
+    def __init__(
+        self,
+        default_rate: float,
+        host_rates: dict[str, float] | None = None,
+        burst: int = 3,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        min_rate_ratio: float = 0.125,
+        max_rate_ratio: float = 1.0,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 300,
+    ):
+        self.default_rate = default_rate
+        self.host_rates = host_rates or {}
+        self.burst = max(1, burst)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.min_rate_ratio = min_rate_ratio
+        self.max_rate_ratio = max_rate_ratio
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._hosts: dict[str, _HostState] = {}
+
+    def _state(self, url: str) -> _HostState:
+        key = host_key(url)
+        state = self._hosts.get(key)
+        if state is None:
+            rate = self.host_rates.get(key, self.default_rate)
+            state = _HostState(
+                rate=rate, base_rate=rate, tokens=float(self.burst),
+                updated_at=time.monotonic(),
+            )
+            self._hosts[key] = state
+        return state
+
+    def _refill(self, state: _HostState, now: float) -> None:
+        elapsed = now - state.updated_at
+        state.tokens = min(float(self.burst), state.tokens + elapsed * state.rate)
+        state.updated_at = now
+
+    async def acquire(self, url: str) -> float:
+        """トークンを1つ取得する（足りなければ順番が来るまで待つ）
+
+        ブレーカー作動中は待たずに CircuitOpenError を送出する。cooldown 後の半開状態では
+        試行を1つだけ通し、その結果が record_success / record_throttle / record_failure で
+        報告されるまで他は CircuitOpenError にする（報告されないまま cooldown 秒経った試行は
+        見捨てて次の1つを通す）。
+        戻り値はリクエストを出してよくなった時刻（record_success に渡す）。
+        """
+        state = self._state(url)
+        async with state.lock:
+            now = time.monotonic()
+            if state.open_until > now:
+                state.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit open for {host_key(url)} "
+                    f"({state.open_until - now:.0f}s remaining)"
+                )
+            if state.open_until:
+                if (
+                    state.probe_in_flight
+                    and now - state.probe_started_at < self.cooldown_seconds
+                ):
+                    state.rejected += 1
+                    raise CircuitOpenError(
+                        f"Circuit half-open for {host_key(url)} (probe in flight)"
+                    )
+                state.probe_in_flight = True
+                state.probe_started_at = now
+            self._refill(state, now)
+            # 先にトークンを予約してから待つ（後続は予約分だけ後ろに並ぶ）
+            state.tokens -= 1
+            wait = -state.tokens / state.rate if state.tokens < 0 else 0.0
+        if wait > 0:
+            logger.debug(f"Rate limit: waiting {wait:.1f}s for {host_key(url)}")
+            await asyncio.sleep(wait)
+        return time.monotonic()
+
+    def record_success(self, url: str, started_at: float | None = None) -> None:
+        """成功: レートを加算的に戻し、ブレーカーをリセット
+
+        started_at がブレーカー作動より前（作動前から飛んでいた古いリクエスト）なら
+        ブレーカーは閉じない。
+        """
+        state = self._state(url)
+        state.successes += 1
+        if started_at is None or started_at >= state.opened_at:
+            state.consecutive_failures = 0
+            state.open_until = 0.0
+            state.probe_in_flight = False
+        state.rate = min(
+            state.base_rate * self.max_rate_ratio, state.rate + self.increase_step
+        )
+
+    def record_throttle(self, url: str) -> None:
+        """429/503/CAPTCHA: レートを乗算的に下げ、溜まったトークンも捨てる"""
+        state = self._state(url)
+        state.throttled += 1
+        state.rate = max(
+            state.base_rate * self.min_rate_ratio, state.rate * self.decrease_factor
+        )
+        self._refill(state, time.monotonic())
+        state.tokens = min(state.tokens, 0.0)
+        logger.warning(
+            f"Throttled by {host_key(url)}: rate -> {state.rate:.3f} req/s"
+        )
+        self._count_failure(url, state)
+
+    def record_failure(self, url: str) -> None:
+        """タイムアウト・5xx等: レートは変えずブレーカーの失敗回数だけ数える"""
+        self._count_failure(url, self._state(url))
+
+    def _count_failure(self, url: str, state: _HostState) -> None:
+        state.consecutive_failures += 1
+        if state.consecutive_failures >= self.failure_threshold:
+            state.opened_at = time.monotonic()
+            state.open_until = state.opened_at + self.cooldown_seconds
+            state.probe_in_flight = False
+            # 半開状態: cooldown 後の1回が成功すれば閉じ、失敗すれば即再作動
+            state.consecutive_failures = self.failure_threshold - 1
+            logger.error(
+                f"Circuit opened for {host_key(url)} ({self.cooldown_seconds:.0f}s)"
+            )
+
+    def reset(self) -> None:
+        """全ホストの状態を破棄する"""
+        self._hosts.clear()
+
+    def stats(self) -> dict:
+        """ホストごとの現在レート・ブレーカー状態"""
+        now = time.monotonic()
+        return {
+            key: {
+                "rate": round(s.rate, 3),
+                "base_rate": s.base_rate,
+                "tokens": round(
+                    min(float(self.burst), s.tokens + (now - s.updated_at) * s.rate), 2
+                ),
+                "circuit_open": s.open_until > now,
+                "consecutive_failures": s.consecutive_failures,
+                "successes": s.successes,
+                "throttled": s.throttled,
+                "rejected": s.rejected,
+            }
+            for key, s in self._hosts.items()
+        }
+
+
+rate_limiter = HostRateLimiter(
+    default_rate=settings.rate_limit_default_rps,
+    host_rates={
+        "yahoo.co.jp": settings.yahoo_rate_limit_rps,
+        "amazon.co.jp": settings.amazon_rate_limit_rps,
+    },
+    burst=settings.rate_limit_burst,
+    increase_step=settings.rate_limit_increase_step,
+    max_rate_ratio=settings.rate_limit_max_ratio,
+    failure_threshold=settings.circuit_breaker_threshold,
+    cooldown_seconds=settings.circuit_breaker_cooldown_seconds,
+)
+
+# ブラウザへフォールバックする前提のHTTPお試し取得用（Amazon）。
+# 弾かれても本番経路（ブラウザ）のレート・ブレーカーを巻き込まないよう別バケットにする
+probe_limiter = HostRateLimiter(
+    default_rate=settings.rate_limit_default_rps,
+    host_rates={"amazon.co.jp": settings.amazon_rate_limit_rps},
+    burst=settings.rate_limit_burst,
+    increase_step=settings.rate_limit_increase_step,
+    max_rate_ratio=settings.rate_limit_max_ratio,
+    failure_threshold=settings.circuit_breaker_threshold,
+    cooldown_seconds=settings.circuit_breaker_cooldown_seconds,
+)
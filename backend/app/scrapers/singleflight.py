@@ -0,0 +1,66 @@
+"""同一リクエストの相乗り（single-flight）
+
+同じキーワード検索・同じオークション詳細などが同時に要求された時、
+ページ読み込みを1回だけ行い、後から来た呼び出しは実行中の結果を待って共有する。
+キャッシュは完了後にしか効かないので、その「取得中」の隙間を埋める役割。
+
+- キーは (種別, 正規化キー)
+- 実行は独立したタスクで行い、最初の呼び出し元がキャンセルされても他の待ち手には影響しない
+- 完了（成功・例外とも）したらキーを外す（結果の保持はキャッシュ側の責務）
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(key: str) -> str:
+    """キーの正規化（前後空白除去・小文字化・連続空白を1つに）"""
+    return " ".join(key.split()).lower()
+
+
+class SingleFlight:
+    """実行中の同一キー呼び出しを1つのタスクにまとめる"""
+
+    def __init__(self):
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(
+        self, kind: str, key: str, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """(kind, key) が実行中ならその結果を待ち、無ければ fn() を実行する"""
+        flight_key = (kind, normalize_key(key))
+        self.calls += 1
+        task = self._inflight.get(flight_key)
+        if task is not None:
+            self.shared += 1
+            logger.debug(f"Joining in-flight {kind}: {key}")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda t: self._forget(flight_key, t))
+        # shield: 待ち手のキャンセルで共有タスク自体を止めない
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key: tuple[str, str], task: asyncio.Task) -> None:
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        if not task.cancelled():
+            # 待ち手が全員キャンセル済みでも "exception was never retrieved" を出さない
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+single_flight = SingleFlight()
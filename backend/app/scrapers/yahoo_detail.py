@@ -6,7 +6,11 @@ from datetime import datetime
 
 from playwright.async_api import Page
 
-from app.scrapers.base import fetch_with_retry, get_browser, get_page
+from app.config import settings
+from app.scrapers.base import fetch_page
+from app.scrapers.http_fetch import fetch_html, inner_text, parse_html
+from app.scrapers.persistent_cache import scrape_cache
+from app.scrapers.singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +38,73 @@ class AuctionDetail:
     url: str = ""
 
 
+@dataclass
+class AuctionPrice:
+    """終了間際の追跡用の軽量な価格情報（価格・入札数・終了日時・終了表示のみ）"""
+    auction_id: str
+    current_price: int | None = None
+    buy_now_price: int | None = None
+    bid_count: int | None = None
+    end_time: datetime | None = None
+    ended: bool = False
+
+
+# 終了済みの詳細ページに出る文言
+_ENDED_MARKERS = ("このオークションは終了しています",)
+
+
+# 詳細ページの必要なテキスト・属性を1回の page.evaluate でまとめて抜き出すJS
+# （dl/tr/img ごとに inner_text を await するとCDP往復が数百回になり遅いため）
+# 戻り値の形は _detail_from_payload の payload と同じ
+_EXTRACT_DETAIL_JS = r"""
+() => {
+  const text = (el) => (el ? el.innerText : null);
+  const h1 = document.querySelector('h1');
+  const bid = document.querySelector("a[href*='bid_hist']");
+  const seller = document.querySelector("a[href*='seller']");
+  const rows = [];
+  document.querySelectorAll('table tr').forEach((tr) => {
+    const ths = tr.querySelectorAll('th');
+    const tds = tr.querySelectorAll('td');
+    const n = Math.min(ths.length, tds.length);
+    for (let i = 0; i < n; i++) rows.push([ths[i].innerText, tds[i].innerText]);
+  });
+  return {
+    title: text(h1) || '',
+    dls: Array.from(document.querySelectorAll('dl'), (dl) => dl.innerText),
+    bid_text: text(bid),
+    seller_text: text(seller),
+    seller_href: seller ? seller.getAttribute('href') : null,
+    rows,
+    images: Array.from(
+      document.querySelectorAll("img[alt*='_画像']"), (img) => img.getAttribute('src')
+    ),
+  };
+}
+"""
+
+
+# 価格プローブ用: 価格（dl）・入札数・終了日時（table）と終了表示だけを抜き出すJS
+_EXTRACT_PRICE_JS = r"""
+(markers) => {
+  const bid = document.querySelector("a[href*='bid_hist']");
+  const rows = [];
+  document.querySelectorAll('table tr').forEach((tr) => {
+    const th = tr.querySelector('th');
+    const td = tr.querySelector('td');
+    if (th && td && th.innerText.trim() === '終了日時') rows.push([th.innerText, td.innerText]);
+  });
+  const body = document.body ? document.body.innerText : '';
+  return {
+    dls: Array.from(document.querySelectorAll('dl'), (dl) => dl.innerText),
+    bid_text: bid ? bid.innerText : null,
+    rows,
+    ended: markers.some((m) => body.includes(m)),
+  };
+}
+"""
+
+
 def _parse_price(text: str) -> int | None:
     """価格テキストから最初の数値を抽出（例: "1,000円（税0円）" → 1000）"""
     match = re.search(r"([\d,]+)円", text)
@@ -56,75 +127,52 @@ def _parse_datetime(text: str) -> datetime | None:
     return None
 
 
-async def parse_auction_detail(page: Page, auction_id: str) -> AuctionDetail | None:
-    """商品詳細ページから情報を抽出"""
+def _detail_from_payload(payload: dict, auction_id: str) -> AuctionDetail | None:
+    """ページから抜き出した生データ（テキスト・属性）を AuctionDetail に変換
+
+    payload の形（ブラウザ版・HTML版で共通）:
+      title: h1 のテキスト / dls: 各 dl の innerText
+      bid_text: 入札履歴リンクのテキスト / seller_text, seller_href: 出品者リンク
+      rows: table tr 内の (th, td) テキスト組 / images: 商品画像の src
+    """
     detail = AuctionDetail(
         auction_id=auction_id,
-        title="",
+        title=(payload.get("title") or "").strip(),
         url=YAHOO_DETAIL_URL.format(auction_id=auction_id),
     )
 
-    # タイトル
-    title_el = await page.query_selector("h1")
-    if title_el:
-        detail.title = (await title_el.inner_text()).strip()
-
     if not detail.title:
         logger.warning(f"Title not found for {auction_id}")
         return None
 
-    # 価格情報 - dl要素から取得
-    price_dls = await page.query_selector_all("dl")
-    for dl in price_dls:
-        text = (await dl.inner_text()).strip()
-        price_match = re.search(r"([\d,]+)円", text)
-        if not price_match:
-            continue
+    dl_texts = [t.strip() for t in payload.get("dls") or []]
 
-        if text.startswith("現在"):
-            detail.current_price = _parse_price(text)
-        elif text.startswith("即決"):
-            detail.buy_now_price = _parse_price(text)
-            # 即決のみのオークションでは現在価格=即決価格
-            if detail.current_price is None:
-                detail.current_price = detail.buy_now_price
+    # 価格情報 - dl要素から取得
+    detail.current_price, detail.buy_now_price = _prices_from_dls(dl_texts)
 
     # 入札数
-    bid_el = await page.query_selector("a[href*='bid_hist']")
-    if bid_el:
-        bid_text = (await bid_el.inner_text()).strip()
-        bid_nums = re.sub(r"[^\d]", "", bid_text)
-        if bid_nums:
-            detail.bid_count = int(bid_nums)
+    detail.bid_count = _parse_bid_count(payload.get("bid_text"))
 
     # 出品者
-    seller_el = await page.query_selector("a[href*='seller']")
-    if seller_el:
-        detail.seller_name = (await seller_el.inner_text()).strip()
-        href = await seller_el.get_attribute("href") or ""
-        match = re.search(r"/seller/([^/?]+)", href)
+    if payload.get("seller_text") is not None:
+        detail.seller_name = payload["seller_text"].strip()
+        match = re.search(r"/seller/([^/?]+)", payload.get("seller_href") or "")
         if match:
             detail.seller_id = match.group(1)
 
     # テーブルから開始価格・日時を取得
-    rows = await page.query_selector_all("table tr")
-    for row in rows:
-        ths = await row.query_selector_all("th")
-        tds = await row.query_selector_all("td")
-        for th, td in zip(ths, tds):
-            label = (await th.inner_text()).strip()
-            value = (await td.inner_text()).strip()
-
-            if label == "開始時の価格":
-                detail.start_price = _parse_price(value)
-            elif label == "開始日時":
-                detail.start_time = _parse_datetime(value)
-            elif label == "終了日時":
-                detail.end_time = _parse_datetime(value)
+    for label, value in payload.get("rows") or []:
+        label = label.strip()
+        value = value.strip()
+        if label == "開始時の価格":
+            detail.start_price = _parse_price(value)
+        elif label == "開始日時":
+            detail.start_time = _parse_datetime(value)
+        elif label == "終了日時":
+            detail.end_time = _parse_datetime(value)
 
     # カテゴリ・ブランド・商品状態 - dl要素から
-    for dl in price_dls:
-        text = (await dl.inner_text()).strip()
+    for text in dl_texts:
         if "カテゴリ" in text and "ブランド" in text:
             # カテゴリ
             cat_match = re.search(r"カテゴリ\n(.+?)(?:\n|ブランド)", text, re.DOTALL)
@@ -143,8 +191,7 @@ async def parse_auction_detail(page: Page, auction_id: str) -> AuctionDetail | N
             break
 
     # 送料情報 - 専用dl or カテゴリdl内から取得
-    for dl in price_dls:
-        text = (await dl.inner_text()).strip()
+    for text in dl_texts:
         if "送料" in text and ("落札者" in text or "出品者" in text or "無料" in text):
             # カテゴリdl内の「送料\n無料」パターン
             ship_match = re.search(r"送料\n(.+?)(?:\n|配送方法|$)", text)
@@ -156,9 +203,8 @@ async def parse_auction_detail(page: Page, auction_id: str) -> AuctionDetail | N
 
     # 画像URL - auctions.c.yimg.jp の画像を重複排除で取得
     seen_urls = set()
-    imgs = await page.query_selector_all("img[alt*='_画像']")
-    for img in imgs:
-        src = await img.get_attribute("src") or ""
+    for src in payload.get("images") or []:
+        src = src or ""
         if "auctions.c.yimg.jp" in src and src not in seen_urls:
             seen_urls.add(src)
             detail.image_urls.append(src)
@@ -166,20 +212,168 @@ async def parse_auction_detail(page: Page, auction_id: str) -> AuctionDetail | N
     return detail
 
 
+def _prices_from_dls(dl_texts: list[str]) -> tuple[int | None, int | None]:
+    """dl のテキストから (現在価格, 即決価格) を取り出す"""
+    current_price = None
+    buy_now_price = None
+    for text in dl_texts:
+        price_match = re.search(r"([\d,]+)円", text)
+        if not price_match:
+            continue
+
+        if text.startswith("現在"):
+            current_price = _parse_price(text)
+        elif text.startswith("即決"):
+            buy_now_price = _parse_price(text)
+            # 即決のみのオークションでは現在価格=即決価格
+            if current_price is None:
+                current_price = buy_now_price
+    return current_price, buy_now_price
+
+
+def _parse_bid_count(bid_text: str | None) -> int | None:
+    bid_nums = re.sub(r"[^\d]", "", (bid_text or "").strip())
+    return int(bid_nums) if bid_nums else None
+
+
+def _price_from_payload(payload: dict, auction_id: str) -> AuctionPrice | None:
+    """価格プローブの生データを AuctionPrice に変換（価格も終了表示も無ければ None）"""
+    price = AuctionPrice(auction_id=auction_id, ended=bool(payload.get("ended")))
+    price.current_price, price.buy_now_price = _prices_from_dls(
+        [t.strip() for t in payload.get("dls") or []]
+    )
+    price.bid_count = _parse_bid_count(payload.get("bid_text"))
+    for label, value in payload.get("rows") or []:
+        if label.strip() == "終了日時":
+            price.end_time = _parse_datetime(value.strip())
+    if price.current_price is None and not price.ended:
+        return None
+    return price
+
+
+async def parse_auction_detail(page: Page, auction_id: str) -> AuctionDetail | None:
+    """商品詳細ページから情報を抽出（1回のevaluateで一括取得）"""
+    payload = await page.evaluate(_EXTRACT_DETAIL_JS)
+    return _detail_from_payload(payload, auction_id)
+
+
+def parse_auction_detail_html(html: str, auction_id: str) -> AuctionDetail | None:
+    """商品詳細HTMLから情報を抽出（タイトルが取れなければ None）"""
+    doc = parse_html(html)
+    if doc is None:
+        return None
+
+    h1 = doc.xpath("//h1")
+    bid = doc.xpath("//a[contains(@href, 'bid_hist')]")
+    seller = doc.xpath("//a[contains(@href, 'seller')]")
+    rows = []
+    for tr in doc.xpath("//table//tr"):
+        ths = tr.xpath(".//th")
+        tds = tr.xpath(".//td")
+        rows.extend((inner_text(th), inner_text(td)) for th, td in zip(ths, tds))
+
+    payload = {
+        "title": inner_text(h1[0]) if h1 else "",
+        "dls": [inner_text(dl) for dl in doc.xpath("//dl")],
+        "bid_text": inner_text(bid[0]) if bid else None,
+        "seller_text": inner_text(seller[0]) if seller else None,
+        "seller_href": seller[0].get("href") if seller else None,
+        "rows": rows,
+        "images": [img.get("src") for img in doc.xpath("//img[contains(@alt, '_画像')]")],
+    }
+    return _detail_from_payload(payload, auction_id)
+
+
+async def parse_auction_price(page: Page, auction_id: str) -> AuctionPrice | None:
+    """詳細ページから価格・終了状態だけを抽出"""
+    payload = await page.evaluate(_EXTRACT_PRICE_JS, list(_ENDED_MARKERS))
+    return _price_from_payload(payload, auction_id)
+
+
+def parse_auction_price_html(html: str, auction_id: str) -> AuctionPrice | None:
+    """詳細HTMLから価格・終了状態だけを抽出"""
+    doc = parse_html(html)
+    if doc is None:
+        return None
+
+    bid = doc.xpath("//a[contains(@href, 'bid_hist')]")
+    rows = []
+    for tr in doc.xpath("//table//tr"):
+        th = tr.xpath(".//th")
+        td = tr.xpath(".//td")
+        if th and td and inner_text(th[0]) == "終了日時":
+            rows.append((inner_text(th[0]), inner_text(td[0])))
+
+    payload = {
+        "dls": [inner_text(dl) for dl in doc.xpath("//dl")],
+        "bid_text": inner_text(bid[0]) if bid else None,
+        "rows": rows,
+        "ended": any(m in html for m in _ENDED_MARKERS),
+    }
+    return _price_from_payload(payload, auction_id)
+
+
+async def get_auction_price(auction_id: str) -> AuctionPrice | None:
+    """終了間際の追跡用に価格だけを取得する
+
+    詳細の永続キャッシュは通さない（数十秒単位の最新値が必要なため）。
+    同じIDの同時取得は1回にまとめる。
+    """
+    return await single_flight.do(
+        "yahoo_price", auction_id, lambda: _get_auction_price(auction_id)
+    )
+
+
+async def _get_auction_price(auction_id: str) -> AuctionPrice | None:
+    url = YAHOO_DETAIL_URL.format(auction_id=auction_id)
+
+    result = None
+    if settings.scrape_http_first:
+        html = await fetch_html(url)
+        if html is not None:
+            result = parse_auction_price_html(html, auction_id)
+
+    if result is None:
+        async with fetch_page(url) as page:
+            if page is None:
+                logger.error(f"Failed to load price for: {auction_id}")
+                return None
+            result = await parse_auction_price(page, auction_id)
+
+    return result
+
+
 async def get_auction_detail(auction_id: str) -> AuctionDetail | None:
-    """オークションIDから商品詳細を取得"""
+    """オークションIDから商品詳細を取得（同じIDの同時取得は1回にまとめる）"""
+    return await single_flight.do(
+        "yahoo_detail", auction_id,
+        lambda: scrape_cache.read_through(
+            "yahoo_detail", auction_id, AuctionDetail,
+            lambda: _get_auction_detail(auction_id),
+        ),
+    )
+
+
+async def _get_auction_detail(auction_id: str) -> AuctionDetail | None:
     url = YAHOO_DETAIL_URL.format(auction_id=auction_id)
 
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(page, url)
-            if not success:
+    result = None
+    if settings.scrape_http_first:
+        html = await fetch_html(url)
+        if html is not None:
+            result = parse_auction_detail_html(html, auction_id)
+            if result is None:
+                logger.info(f"No detail markup over HTTP, falling back to browser: {auction_id}")
+
+    if result is None:
+        async with fetch_page(url) as page:
+            if page is None:
                 logger.error(f"Failed to load detail page for: {auction_id}")
                 return None
-
             result = await parse_auction_detail(page, auction_id)
-            if result:
-                logger.info(
-                    f"Detail fetched: {result.title} ({result.current_price}円)"
-                )
-            return result
+
+    if result:
+        logger.info(
+            f"Detail fetched: {result.title} ({result.current_price}円)"
+        )
+    return result
@@ -7,15 +7,47 @@ from urllib.parse import quote
 
 from playwright.async_api import Page
 
-from app.scrapers.base import fetch_with_retry, get_browser, get_page
+from app.config import settings
+from app.scrapers.base import fetch_page
+from app.scrapers.http_fetch import fetch_html, inner_text, parse_html, xp_class
+from app.scrapers.persistent_cache import scrape_cache
+from app.scrapers.singleflight import single_flight
+from app.scrapers.yahoo_search import is_no_results_page
 
 logger = logging.getLogger(__name__)
 
 YAHOO_CLOSED_URL = (
     "https://auctions.yahoo.co.jp/closedsearch/closedsearch"
-    "?p={keyword}&va={keyword}&exflg=1&b=1&n={count}"
+    "?p={keyword}&va={keyword}&exflg=1&b={start}&n={count}"
 )
 
+# 1ページの最大件数（ヤフオクの n パラメータ上限）
+MAX_PAGE_SIZE = 100
+
+# 落札済み商品を1回の page.evaluate でまとめて抽出するJS
+# （商品ごとに query_selector を回すとCDP往復が数百回になり遅いため）
+# 戻り値の各要素は _map_closed_items の raw と同じ形。
+# タイトルリンクの無い li.Product も空要素として残す（ページの件数判定に使うため）
+_EXTRACT_CLOSED_JS = r"""
+() => {
+  const out = [];
+  document.querySelectorAll('li.Product').forEach((item) => {
+    const link = item.querySelector('a.Product__titleLink');
+    if (!link) { out.push({}); return; }
+    const timeEl = item.querySelector('.Product__time');
+    const bidEl = item.querySelector('a.Product__bid');
+    out.push({
+      title: link.innerText,
+      href: link.getAttribute('href'),
+      price_texts: Array.from(item.querySelectorAll('.Product__price'), (el) => el.innerText),
+      time_text: timeEl ? timeEl.innerText : null,
+      bid_text: bidEl ? bidEl.innerText : null,
+    });
+  });
+  return out;
+}
+"""
+
 
 @dataclass
 class HistoryResult:
@@ -44,31 +76,27 @@ def _parse_closed_date(text: str) -> datetime | None:
     return None
 
 
-async def parse_closed_results(page: Page) -> list[HistoryResult]:
-    """落札履歴ページから結果をパース"""
-    results = []
+def _map_closed_items(raw: list[dict]) -> list[HistoryResult]:
+    """落札済み商品の生データを HistoryResult に変換
 
-    items = await page.query_selector_all("li.Product")
+    raw の各要素（ブラウザ版・HTML版で共通）:
+      title, href: タイトルリンク / price_texts: .Product__price のテキスト一覧
+      time_text: .Product__time のテキスト / bid_text: 入札数リンクのテキスト
+    """
+    results = []
 
-    for item in items:
+    for item in raw:
         try:
             # タイトルとオークションID
-            title_link = await item.query_selector("a.Product__titleLink")
-            if not title_link:
-                continue
-
-            title = (await title_link.inner_text()).strip()
-            href = await title_link.get_attribute("href") or ""
-            match = re.search(r"/auction/([a-zA-Z0-9]+)", href)
+            title = (item.get("title") or "").strip()
+            match = re.search(r"/auction/([a-zA-Z0-9]+)", item.get("href") or "")
             if not match:
                 continue
             auction_id = match.group(1)
 
             # 落札価格 - "落札" ラベルの価格を取得
             winning_price = None
-            price_els = await item.query_selector_all(".Product__price")
-            for price_el in price_els:
-                text = (await price_el.inner_text()).strip()
+            for text in item.get("price_texts") or []:
                 if "落札" in text:
                     price_match = re.search(r"([\d,]+)円", text)
                     if price_match:
@@ -79,20 +107,15 @@ async def parse_closed_results(page: Page) -> list[HistoryResult]:
                 continue
 
             # 終了日時
-            time_el = await item.query_selector(".Product__time")
             end_date = None
-            if time_el:
-                time_text = (await time_el.inner_text()).strip()
-                end_date = _parse_closed_date(time_text)
+            if item.get("time_text"):
+                end_date = _parse_closed_date(item["time_text"].strip())
 
             # 入札数
             bid_count = None
-            bid_el = await item.query_selector("a.Product__bid")
-            if bid_el:
-                bid_text = (await bid_el.inner_text()).strip()
-                bid_nums = re.sub(r"[^\d]", "", bid_text)
-                if bid_nums:
-                    bid_count = int(bid_nums)
+            bid_nums = re.sub(r"[^\d]", "", item.get("bid_text") or "")
+            if bid_nums:
+                bid_count = int(bid_nums)
 
             results.append(
                 HistoryResult(
@@ -110,20 +133,129 @@ async def parse_closed_results(page: Page) -> list[HistoryResult]:
     return results
 
 
+async def parse_closed_results(page: Page) -> list[HistoryResult]:
+    """落札履歴ページから結果をパース（1回のevaluateで一括取得）"""
+    return _map_closed_items(await page.evaluate(_EXTRACT_CLOSED_JS))
+
+
+def _extract_closed_html(html: str) -> list[dict] | None:
+    """_EXTRACT_CLOSED_JS と同じ形の生データをHTMLから取り出す
+
+    0件ページなら []、想定外のページなら None。
+    """
+    doc = parse_html(html)
+    if doc is None:
+        return None
+    items = doc.xpath(f"//li[{xp_class('Product')}]")
+    if not items:
+        return [] if is_no_results_page(doc) else None
+
+    raw = []
+    for item in items:
+        title_link = item.xpath(f".//a[{xp_class('Product__titleLink')}]")
+        if not title_link:
+            raw.append({})
+            continue
+        time_el = item.xpath(f".//*[{xp_class('Product__time')}]")
+        bid_el = item.xpath(f".//a[{xp_class('Product__bid')}]")
+        raw.append({
+            "title": inner_text(title_link[0]),
+            "href": title_link[0].get("href"),
+            "price_texts": [
+                inner_text(el) for el in item.xpath(f".//*[{xp_class('Product__price')}]")
+            ],
+            "time_text": inner_text(time_el[0]) if time_el else None,
+            "bid_text": inner_text(bid_el[0]) if bid_el else None,
+        })
+    return raw
+
+
+def parse_closed_html(html: str) -> list[HistoryResult] | None:
+    """落札履歴HTMLから結果をパース（0件なら []、想定外のページなら None）"""
+    raw = _extract_closed_html(html)
+    if raw is None:
+        return None
+    return _map_closed_items(raw)
+
+
+async def _fetch_closed_page(url: str) -> tuple[list[HistoryResult], int] | None:
+    """落札履歴1ページ分を HTTP優先 → ブラウザの順で取得（失敗時 None）
+
+    戻り値は (結果, ページ上の li.Product 数)。落札価格の無い項目などを除外する前の
+    件数を返すので、呼び出し側はこれで「最終ページか」を判定する。
+    """
+    raw = None
+    if settings.scrape_http_first:
+        html = await fetch_html(url)
+        if html is not None:
+            raw = _extract_closed_html(html)
+            if raw is None:
+                logger.info(f"No history markup over HTTP, falling back to browser: {url}")
+
+    if raw is None:
+        async with fetch_page(url) as page:
+            if page is None:
+                return None
+            raw = await page.evaluate(_EXTRACT_CLOSED_JS)
+    return _map_closed_items(raw), len(raw)
+
+
 async def search_auction_history(
-    keyword: str, count: int = 50
+    keyword: str, count: int = MAX_PAGE_SIZE, pages: int = 1
+) -> list[HistoryResult]:
+    """キーワードで落札履歴を検索
+
+    count: 1ページの件数（最大100） / pages: 取得ページ数（深い相場が必要な時に増やす）。
+    ページ上の商品が count 件に満たなければそこで打ち切る。
+    同じ条件の同時取得は1回にまとめる。
+    """
+    count = max(1, min(count, MAX_PAGE_SIZE))
+    pages = max(1, pages)
+    key = f"{keyword}|{count}|{pages}"
+    return await single_flight.do(
+        "yahoo_history", key, lambda: _load_history(key, keyword, count, pages)
+    )
+
+
+async def _load_history(
+    key: str, keyword: str, count: int, pages: int
 ) -> list[HistoryResult]:
-    """キーワードで落札履歴を検索"""
+    """永続キャッシュを読み、無ければ取得して保存する（途中のページで失敗した結果は保存しない）"""
+    stored = await scrape_cache.get("yahoo_history", key, HistoryResult, many=True)
+    if stored is not None:
+        return stored
+    results, complete = await _search_auction_history(keyword, count, pages)
+    if complete and results:
+        await scrape_cache.set("yahoo_history", key, results)
+    return results
+
+
+async def _search_auction_history(
+    keyword: str, count: int, pages: int
+) -> tuple[list[HistoryResult], bool]:
+    """(結果, 全ページ取得できたか) を返す"""
     encoded = quote(keyword)
-    url = YAHOO_CLOSED_URL.format(keyword=encoded, count=count)
-
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            success = await fetch_with_retry(page, url)
-            if not success:
-                logger.error(f"Failed to load history page for: {keyword}")
-                return []
-
-            results = await parse_closed_results(page)
-            logger.info(f"Found {len(results)} history results for '{keyword}'")
-            return results
+    results: list[HistoryResult] = []
+    seen: set[str] = set()
+    complete = True
+
+    for page_no in range(pages):
+        url = YAHOO_CLOSED_URL.format(
+            keyword=encoded, start=1 + page_no * count, count=count
+        )
+        fetched = await _fetch_closed_page(url)
+        if fetched is None:
+            logger.error(f"Failed to load history page {page_no + 1} for: {keyword}")
+            complete = False
+            break
+        page_results, item_count = fetched
+        for r in page_results:
+            if r.auction_id not in seen:
+                seen.add(r.auction_id)
+                results.append(r)
+        # 件数判定は除外前の商品数で行う（除外が1件あっただけで打ち切らない）
+        if item_count < count:
+            break
+
+    logger.info(f"Found {len(results)} history results for '{keyword}'")
+    return results, complete
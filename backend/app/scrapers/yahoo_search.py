@@ -1,21 +1,31 @@
 """ヤフオク検索スクレイパー - キーワードでオークション検索"""
 import logging
 import re
-import time
 from dataclasses import dataclass
 from urllib.parse import quote
 
 from playwright.async_api import Page
 
 from app.config import settings
-from app.scrapers.base import fetch_with_retry, get_browser, get_page
+from app.scrapers.base import fetch_page
+from app.scrapers.cache import LRUCache
+from app.scrapers.http_fetch import fetch_html, inner_text, parse_html, xp_class
+from app.scrapers.persistent_cache import scrape_cache
+from app.scrapers.singleflight import normalize_key, single_flight
 
 logger = logging.getLogger(__name__)
 
 YAHOO_SEARCH_URL = "https://auctions.yahoo.co.jp/search/search?p={keyword}&va={keyword}&exflg=1&b=1&n=50"
 
-# 検索結果のメモリキャッシュ: 正規化キーワード -> (結果, 取得時刻)
-_search_cache: dict[str, tuple[list["SearchResult"], float]] = {}
+# 検索結果のメモリキャッシュ: 正規化キーワード -> 結果
+_search_cache = LRUCache(
+    "yahoo_search",
+    max_entries=settings.yahoo_search_cache_max_entries,
+    max_bytes=settings.yahoo_search_cache_max_bytes,
+    ttl=settings.yahoo_search_cache_ttl,
+    stale_ttl=settings.yahoo_search_cache_stale_ttl,
+    retry_after=settings.yahoo_search_cache_retry_after,
+)
 
 
 @dataclass
@@ -67,10 +77,61 @@ def _to_int(value: str | None) -> int | None:
     return int(digits) if digits else None
 
 
-async def parse_search_results(page: Page) -> list[SearchResult]:
-    """検索結果ページから商品一覧をパース（1回のevaluateで一括取得）"""
-    raw = await page.evaluate(_EXTRACT_JS)
+# 0件ヒット時にヤフオクが出す案内文（検索・落札相場で共通）
+_NO_RESULT_MARKERS = ("該当する商品はありません", "一致する商品はありません")
+
+
+def is_no_results_page(doc) -> bool:
+    """正常な「0件」の検索結果ページか（ブロック・想定外のページとは区別する）
+
+    結果一覧のマークアップが変わった場合に [] で誤魔化さないよう、
+    コンテナの有無ではなく0件の案内文で判定する。
+    """
+    text = inner_text(doc.body) if doc.body is not None else ""
+    return any(marker in text for marker in _NO_RESULT_MARKERS)
+
+
+def _extract_from_html(html: str) -> list[dict] | None:
+    """_EXTRACT_JS と同じ形の生データをHTMLから取り出す
 
+    0件ページなら []、li.Product も0件の案内も無い（ブロック等）なら None。
+    """
+    doc = parse_html(html)
+    if doc is None:
+        return None
+    items = doc.xpath(f"//li[{xp_class('Product')}]")
+    if not items:
+        return [] if is_no_results_page(doc) else None
+
+    out = []
+    for item in items:
+        links = item.xpath(
+            f".//a[{xp_class('Product__titleLink')} or {xp_class('Product__imageLink')}]"
+        )
+        if not links:
+            continue
+        link = links[0]
+        auction_id = link.get("data-auction-id")
+        if not auction_id:
+            continue
+        bonus = item.xpath(f".//*[{xp_class('Product__bonus')}]")
+        img = item.xpath(f".//img[{xp_class('Product__imageData')}]")
+        time_el = item.xpath(f".//*[{xp_class('Product__time')}]")
+        bid_el = item.xpath(f".//*[{xp_class('Product__bid')}]")
+        out.append({
+            "auction_id": auction_id,
+            "title": link.get("data-auction-title") or "",
+            "price_str": link.get("data-auction-price"),
+            "buynow_str": bonus[0].get("data-auction-buynowprice") if bonus else None,
+            "image_url": img[0].get("src") if img else None,
+            "end_time_text": inner_text(time_el[0]) if time_el else None,
+            "bid_text": inner_text(bid_el[0]) if bid_el else None,
+        })
+    return out
+
+
+def _map_search_results(raw: list[dict]) -> list[SearchResult]:
+    """抽出した生データを SearchResult に変換"""
     results: list[SearchResult] = []
     for r in raw:
         try:
@@ -97,35 +158,83 @@ async def parse_search_results(page: Page) -> list[SearchResult]:
     return results
 
 
+async def parse_search_results(page: Page) -> list[SearchResult]:
+    """検索結果ページから商品一覧をパース（1回のevaluateで一括取得）"""
+    return _map_search_results(await page.evaluate(_EXTRACT_JS))
+
+
+def parse_search_html(html: str) -> list[SearchResult] | None:
+    """検索結果HTMLから商品一覧をパース（0件なら []、想定外のページなら None）"""
+    raw = _extract_from_html(html)
+    if raw is None:
+        return None
+    return _map_search_results(raw)
+
+
+async def _fetch_search_results(url: str) -> list[SearchResult] | None:
+    """HTTP優先で検索結果を取得し、取れなければブラウザで取り直す（失敗時 None）"""
+    if settings.scrape_http_first:
+        html = await fetch_html(url)
+        if html is not None:
+            results = parse_search_html(html)
+            if results is not None:
+                return results
+            logger.info(f"No search markup over HTTP, falling back to browser: {url}")
+
+    async with fetch_page(url) as page:
+        if page is None:
+            return None
+        return await parse_search_results(page)
+
+
 async def search_yahoo_auctions(keyword: str) -> list[SearchResult]:
     """ヤフオクをキーワードで検索し、結果一覧を返す"""
     # キャッシュヒット判定（正規化キーワード）
-    cache_key = keyword.strip().lower()
-    now = time.monotonic()
+    cache_key = normalize_key(keyword)
     cached = _search_cache.get(cache_key)
-    if cached and now - cached[1] < settings.yahoo_search_cache_ttl:
-        logger.info(f"Cache hit for '{keyword}' ({len(cached[0])} results)")
-        return cached[0]
+    if cached is not None:
+        results, fresh = cached
+        if fresh:
+            logger.info(f"Cache hit for '{keyword}' ({len(results)} results)")
+        else:
+            # 期限切れでも古い結果をすぐ返し、裏で取り直す
+            logger.info(f"Stale cache hit for '{keyword}', revalidating")
+            _search_cache.revalidate(cache_key, lambda: _fetch_shared(keyword, cache_key))
+        return results
+
+    return await _fetch_shared(keyword, cache_key)
+
+
+async def _fetch_shared(keyword: str, cache_key: str) -> list[SearchResult]:
+    # 同じキーワードの取得が実行中なら相乗りする
+    return await single_flight.do(
+        "yahoo_search", cache_key, lambda: _search_and_cache(keyword, cache_key)
+    )
+
+
+async def _search_and_cache(keyword: str, cache_key: str) -> list[SearchResult]:
+    """検索ページを取得してキャッシュに格納する（永続キャッシュにあればそれを使う）"""
+    results = await scrape_cache.get("yahoo_search", cache_key, SearchResult, many=True)
+    if results is not None:
+        _search_cache.set(cache_key, results)
+        return results
 
     encoded = quote(keyword)
     url = YAHOO_SEARCH_URL.format(keyword=encoded)
 
-    async with get_browser() as browser:
-        async with get_page(browser) as page:
-            # 対話検索なので事前待機は短く
-            success = await fetch_with_retry(
-                page,
-                url,
-                delay_min=settings.yahoo_search_delay_min,
-                delay_max=settings.yahoo_search_delay_max,
-            )
-            if not success:
-                logger.error(f"Failed to load search page for: {keyword}")
-                # 失敗（404等）も短時間キャッシュして連打を防ぐ
-                _search_cache[cache_key] = ([], now)
-                return []
-
-            results = await parse_search_results(page)
-            logger.info(f"Found {len(results)} results for '{keyword}'")
-            _search_cache[cache_key] = (results, now)
-            return results
+    results = await _fetch_search_results(url)
+    if results is None:
+        logger.error(f"Failed to load search page for: {keyword}")
+        # 失敗（404等）も短時間キャッシュして連打を防ぐ。
+        # 古い正常な結果があれば空で上書きせず、しばらく再取得を止める
+        if cache_key in _search_cache:
+            _search_cache.mark_failed(cache_key)
+        else:
+            _search_cache.set(cache_key, [])
+        return []
+
+    logger.info(f"Found {len(results)} results for '{keyword}'")
+    _search_cache.set(cache_key, results)
+    if results:
+        await scrape_cache.set("yahoo_search", cache_key, results)
+    return results
@@ -0,0 +1,273 @@
+"""Amazon価格リフレッシュ - ヤフオクの巡回とは別のパイプライン
+
+Amazonの取得は遅く（レート制限・CAPTCHA）、ヤフオクのチェックの中で待つと巡回全体が止まる。
+そこで独自の間隔・同時数を持つ別ジョブとし、監視中の商品を1商品1回にまとめた上で
+優先度の高い順に amazon_refresh_batch_size 件ずつ更新する。
+
+優先度 = 古さ × 利益の重み
+- 古さ: 最終更新からの経過 / amazon_refresh_interval_hours（上限3、未取得は3）
+- 利益の重み: 監視の最新状態（LinkState）の利益率がチャンス閾値に近いほど大きく、
+  閾値以上（チャンス中）はさらに上乗せ。利益率が無い商品は 1
+
+更新した商品に紐づく監視は、その場で利益・チャンスを計算し直す（price_intelligence）。
+
+Keepa APIキーがあれば、古い商品を（keepa_refresh_max_asins 件まで）100件ずつの
+Keepa バッチで更新し、価格が取れなかった商品だけをブラウザ取得にフォールバックする。
+
+ブラウザでも取れなかった商品は失敗を記録し、price_refresh_retry_at まで候補から外す
+（連続失敗ごとに待ちを倍にする）。
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select
+
+from app.config import settings
+from app.database import async_session
+from app.models import Auction, LinkState, Product, ProductAuctionLink
+from app.scrapers.amazon_product import get_amazon_product
+from app.services import keepa
+from app.services.jobqueue import enqueue
+from app.services.price_intelligence import reprice_product_links
+
+logger = logging.getLogger(__name__)
+
+# 古さの上限（未取得の商品もこの値として扱う）
+_MAX_STALENESS = 3.0
+# チャンス閾値以上の商品への上乗せ
+_CHANCE_BONUS = 0.5
+
+
+@dataclass
+class RefreshCandidate:
+    product_id: int
+    asin: str
+    price_updated_at: datetime | None
+    profit_rate: float | None  # 紐づく監視の最新状態のうち最大の利益率
+    priority: float = 0.0
+
+
+def refresh_priority(
+    price_updated_at: datetime | None, profit_rate: float | None, now: datetime
+) -> float:
+    """リフレッシュの優先度（大きいほど先に更新する）"""
+    interval_hours = max(settings.amazon_refresh_interval_hours, 1)
+    if price_updated_at is None:
+        staleness = _MAX_STALENESS
+    else:
+        age_hours = (now - price_updated_at).total_seconds() / 3600
+        staleness = min(max(age_hours / interval_hours, 0.0), _MAX_STALENESS)
+
+    weight = 1.0
+    if profit_rate is not None:
+        threshold = settings.chance_min_profit_rate
+        band = max(settings.polling_threshold_band, 0.1)
+        weight += max(0.0, 1 - abs(profit_rate - threshold) / (2 * band))
+        if profit_rate >= threshold:
+            weight += _CHANCE_BONUS
+    return staleness * weight
+
+
+async def select_refresh_candidates(
+    db, now: datetime, limit: int | None = None
+) -> list[RefreshCandidate]:
+    """監視中（active）のオークションに紐づく商品のうち、価格が古いものを優先度順に返す
+
+    同じ商品に複数の監視が紐づいていても1件にまとめる。
+    """
+    stale_before = now - timedelta(hours=settings.amazon_refresh_interval_hours)
+
+    rows = await db.execute(
+        select(
+            Product.id,
+            Product.asin,
+            Product.price_updated_at,
+            func.max(LinkState.profit_rate),
+        )
+        .join(ProductAuctionLink, ProductAuctionLink.product_id == Product.id)
+        .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+        .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
+        .where(
+            ProductAuctionLink.is_monitoring.is_(True),
+            Auction.status == "active",
+            or_(
+                Product.amazon_price.is_(None),
+                Product.price_updated_at.is_(None),
+                Product.price_updated_at <= stale_before,
+            ),
+            or_(
+                Product.price_refresh_retry_at.is_(None),
+                Product.price_refresh_retry_at <= now,
+            ),
+        )
+        .group_by(Product.id)
+    )
+
+    candidates = [
+        RefreshCandidate(
+            product_id=product_id,
+            asin=asin,
+            price_updated_at=updated_at,
+            profit_rate=profit_rate,
+            priority=refresh_priority(updated_at, profit_rate, now),
+        )
+        for product_id, asin, updated_at, profit_rate in rows.all()
+    ]
+    candidates.sort(key=lambda c: c.priority, reverse=True)
+    return candidates[: limit or settings.amazon_refresh_batch_size]
+
+
+async def refresh_stale_amazon_prices() -> int:
+    """優先度の高い商品から Amazon 価格を更新する（スケジューラーの tick）
+
+    Keepaが有効ならバッチ取得（ジョブキューが有効なら keepa_refresh ジョブを1件積む）。
+    無効なら amazon_refresh_batch_size 件をブラウザで取得する。
+    更新できた件数（ジョブを積んだ場合はその件数）を返す。
+    """
+    if not settings.amazon_refresh_enabled:
+        return 0
+    if keepa.is_enabled():
+        if settings.job_queue_enabled:
+            async with async_session() as db:
+                await enqueue(db, "keepa_refresh", dedupe_key="keepa_refresh")
+                await db.commit()
+            return 1
+        return await refresh_via_keepa()
+
+    async with async_session() as db:
+        candidates = await select_refresh_candidates(db, datetime.now())
+    return await _refresh_with_browser(candidates)
+
+
+async def refresh_via_keepa() -> int:
+    """古い商品を Keepa のバッチ取得で更新し、取れなかった分をブラウザで補う"""
+    async with async_session() as db:
+        candidates = await select_refresh_candidates(
+            db, datetime.now(), limit=settings.keepa_refresh_max_asins
+        )
+    if not candidates:
+        return 0
+
+    try:
+        prices = await keepa.fetch_current_prices([c.asin for c in candidates])
+    except Exception as e:
+        logger.warning(f"Keepa bulk refresh failed, falling back to browser: {e}")
+        prices = {}
+
+    if prices:
+        now = datetime.now()
+        async with async_session() as db:
+            products = (
+                await db.execute(select(Product).where(Product.asin.in_(list(prices))))
+            ).scalars().all()
+            for product in products:
+                product.amazon_price = prices[product.asin]
+                _mark_refreshed(product, now)
+                await reprice_product_links(db, product.id, now)
+            await db.commit()
+
+    # Keepaで取れなかった（データなし・トークン切れ）商品は優先度順にブラウザで
+    missing = [c for c in candidates if c.asin not in prices]
+    fallback = await _refresh_with_browser(missing[: settings.amazon_refresh_batch_size])
+    logger.info(
+        f"Amazon refresh via Keepa: {len(prices)} by Keepa, {fallback} by browser "
+        f"({len(candidates)} stale)"
+    )
+    return len(prices) + fallback
+
+
+async def _refresh_with_browser(candidates: list[RefreshCandidate]) -> int:
+    """ブラウザで1商品ずつ更新する（ジョブキューが有効なら商品ごとのジョブを積むだけ）"""
+    if not candidates:
+        return 0
+    if settings.job_queue_enabled:
+        async with async_session() as db:
+            for c in candidates:
+                await enqueue(
+                    db, "amazon_refresh", {"asin": c.asin},
+                    dedupe_key=f"amazon_refresh:{c.asin}",
+                )
+            await db.commit()
+        return len(candidates)
+
+    slots = asyncio.Semaphore(settings.scheduler_amazon_concurrency)
+
+    async def refresh(c: RefreshCandidate) -> bool:
+        async with slots:
+            try:
+                await refresh_amazon_price(c.asin)
+                return True
+            except Exception as e:
+                logger.warning(f"Amazon refresh failed for {c.asin}: {e}")
+                return False
+
+    results = await asyncio.gather(*(refresh(c) for c in candidates))
+    refreshed = sum(results)
+    logger.info(f"Amazon refresh: {refreshed}/{len(candidates)} products updated")
+    return refreshed
+
+
+async def refresh_amazon_price(asin: str) -> int:
+    """Amazon価格を再取得して商品に反映する
+
+    取得できなかった場合は失敗を記録して（しばらく候補から外す）例外にする
+    （ジョブとしてリトライさせる）。
+    """
+    try:
+        # キャッシュ（最大 scrape_cache_ttl_amazon 秒前の価格）は使わない
+        amzn = await get_amazon_product(asin, fresh=True)
+    except Exception:
+        await _record_failure(asin)
+        raise
+    if amzn is None or amzn.price is None:
+        await _record_failure(asin)
+        raise RuntimeError(f"Amazon price unavailable for {asin}")
+    async with async_session() as db:
+        product = (
+            await db.execute(select(Product).where(Product.asin == asin))
+        ).scalar_one_or_none()
+        if product is not None:
+            now = datetime.now()
+            _apply_amazon_price(product, amzn, now)
+            await reprice_product_links(db, product.id, now)
+            await db.commit()
+    return amzn.price
+
+
+def refresh_backoff(failures: int) -> timedelta:
+    """連続 failures 回失敗した商品を次に試すまでの待ち"""
+    minutes = settings.amazon_refresh_failure_backoff_minutes * 2 ** max(failures - 1, 0)
+    return timedelta(
+        minutes=min(minutes, settings.amazon_refresh_failure_max_backoff_hours * 60)
+    )
+
+
+async def _record_failure(asin: str) -> None:
+    """取得に失敗した商品を、待ちが明けるまで候補から外す"""
+    now = datetime.now()
+    async with async_session() as db:
+        product = (
+            await db.execute(select(Product).where(Product.asin == asin))
+        ).scalar_one_or_none()
+        if product is None:
+            return
+        product.price_refresh_failures = (product.price_refresh_failures or 0) + 1
+        product.price_refresh_retry_at = now + refresh_backoff(product.price_refresh_failures)
+        await db.commit()
+
+
+def _mark_refreshed(product: Product, now: datetime) -> None:
+    product.price_updated_at = now
+    product.price_refresh_failures = 0
+    product.price_refresh_retry_at = None
+
+
+def _apply_amazon_price(product: Product, amzn, now: datetime) -> None:
+    """再取得したAmazon価格を商品に反映する"""
+    product.amazon_price = amzn.price
+    _mark_refreshed(product, now)
+    if amzn.category and not product.category:
+        product.category = amzn.category
+    logger.info(f"Amazon price refreshed: {product.asin} = {amzn.price}")
@@ -0,0 +1,56 @@
+"""ジョブキューの実行内容（kind ごとのハンドラー）
+
+ワーカーと /api/jobs ルーターがこのモジュールを import して登録を済ませる。
+"""
+from app.services.amazon_refresh import refresh_amazon_price, refresh_via_keepa
+from app.services.jobqueue import handler
+from app.services.runs import RunInProgress, check_runs
+from app.services.scheduler import check_auction, track_closing_auctions
+
+
+@handler("check_auction")
+async def _check_auction(payload: dict) -> None:
+    await check_auction(int(payload["auction_pk"]))
+
+
+@handler("check_run")
+async def _check_run(payload: dict) -> dict:
+    # 「今すぐ実行」（全件のチェック）。進捗は check_runs テーブルで問い合わせる
+    from app.services.scheduler import check_monitored_auctions
+
+    run_id = payload["run_id"]
+    try:
+        run = await check_runs.run(
+            lambda progress: check_monitored_auctions(progress=progress),
+            trigger=payload.get("trigger", "manual"),
+            run_id=run_id,
+        )
+    except RunInProgress as e:
+        await check_runs.abandon(run_id, f"another run is in progress ({e.run_id})")
+        return {"run_id": run_id, "status": "skipped", "running_run_id": e.run_id}
+    return {"run_id": run_id, "status": run.status, "done": run.done, "failed": run.failed}
+
+
+@handler("track_closing")
+async def _track_closing(payload: dict) -> None:
+    await track_closing_auctions()
+
+
+@handler("amazon_refresh")
+async def _amazon_refresh(payload: dict) -> dict:
+    price = await refresh_amazon_price(payload["asin"])
+    return {"asin": payload["asin"], "amazon_price": price}
+
+
+@handler("keepa_refresh")
+async def _keepa_refresh(payload: dict) -> dict:
+    return {"refreshed": await refresh_via_keepa()}
+
+
+@handler("research_price_diff")
+async def _research_price_diff(payload: dict) -> dict:
+    # ルーター側のモデル・処理を共有する（循環 import を避けて遅延 import）
+    from app.routers.research import PriceDiffRequest, run_price_diff
+
+    response = await run_price_diff(PriceDiffRequest(**payload))
+    return response.model_dump()
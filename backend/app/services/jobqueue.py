@@ -0,0 +1,236 @@
+"""DBジョブキュー - 積む（enqueue）・リースする・完了/失敗を記録する
+
+API プロセスは enqueue だけを行い、実行は `python -m app.worker` のワーカーが担う。
+複数のワーカー（別プロセス・別マシン）が同じキューから取り出しても、
+リースは条件付き UPDATE で1件ずつ奪い合うので同じジョブを二重に実行しない。
+
+- リース期限（visibility timeout）内に完了しなかったジョブは再びリース可能になる
+  （実行中のワーカーは renew() で期限を延ばし続ける）
+- 失敗したジョブは attempts が max_attempts に達するまでバックオフ付きで再実行する
+- 実行内容は kind ごとに handler() で登録した非同期関数（payload の dict を受け取る）
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """ジョブ種別の実行関数を登録するデコレーター"""
+    def register(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def get_handler(kind: str) -> JobHandler | None:
+    return _handlers.get(kind)
+
+
+def registered_kinds() -> list[str]:
+    return sorted(_handlers)
+
+
+def _claimable(now: datetime):
+    """リースできるジョブの条件（実行待ち、またはリース切れの実行中）"""
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(
+            Job.status == "running",
+            Job.leased_until < now,
+            Job.attempts < Job.max_attempts,
+        ),
+    )
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: dict | None = None,
+    dedupe_key: str | None = None,
+    run_after: datetime | None = None,
+    max_attempts: int | None = None,
+) -> Job:
+    """ジョブを積む（コミットは呼び出し側）
+
+    dedupe_key が同じジョブが実行待ち・実行中ならそれを返し、新しくは積まない。
+    """
+    if dedupe_key is not None:
+        result = await db.execute(
+            select(Job).where(
+                Job.dedupe_key == dedupe_key,
+                Job.status.in_(("queued", "running")),
+            ).limit(1)
+        )
+        existing = result.scalar_one_or_none()
+        if existing is not None:
+            return existing
+
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        dedupe_key=dedupe_key,
+        run_after=run_after or datetime.now(),
+        max_attempts=max_attempts or settings.job_max_attempts,
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+async def lease(
+    db: AsyncSession,
+    owner: str,
+    limit: int = 1,
+    kinds: list[str] | None = None,
+) -> list[Job]:
+    """実行可能なジョブを最大 limit 件リースしてコミットする
+
+    候補を選んでから1件ずつ条件付き UPDATE で確保する。
+    他のワーカーが先に取った行は rowcount=0 になるので飛ばす。
+    """
+    now = datetime.now()
+    query = select(Job.id).where(_claimable(now))
+    if kinds:
+        query = query.where(Job.kind.in_(kinds))
+    # 他のワーカーと取り合って負けても limit 件埋まるよう多めに候補を取る
+    query = query.order_by(Job.run_after, Job.id).limit(limit * 2)
+    candidates = (await db.execute(query)).scalars().all()
+
+    leased_until = now + timedelta(seconds=settings.job_visibility_timeout_seconds)
+    claimed: list[int] = []
+    for job_id in candidates:
+        if len(claimed) >= limit:
+            break
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                lease_owner=owner,
+                leased_until=leased_until,
+                attempts=Job.attempts + 1,
+                started_at=now,
+            )
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    await db.commit()
+
+    if not claimed:
+        return []
+    result = await db.execute(select(Job).where(Job.id.in_(claimed)).order_by(Job.id))
+    return list(result.scalars().all())
+
+
+async def renew(db: AsyncSession, job_ids: list[int], owner: str) -> None:
+    """実行中ジョブのリース期限を延ばす（ワーカーのハートビート）"""
+    if not job_ids:
+        return
+    await db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.lease_owner == owner, Job.status == "running")
+        .values(
+            leased_until=datetime.now()
+            + timedelta(seconds=settings.job_visibility_timeout_seconds)
+        )
+    )
+    await db.commit()
+
+
+async def complete(db: AsyncSession, job_id: int, owner: str, result: Any = None) -> bool:
+    """完了を記録する。リースを失っていたら（他のワーカーに取られた）False"""
+    res = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner, Job.status == "running")
+        .values(
+            status="done",
+            result=json.dumps(result, ensure_ascii=False, default=str)
+            if result is not None else None,
+            leased_until=None,
+            finished_at=datetime.now(),
+        )
+    )
+    await db.commit()
+    if res.rowcount != 1:
+        logger.warning(f"Job {job_id}: lease lost before completion")
+        return False
+    return True
+
+
+async def fail(db: AsyncSession, job_id: int, owner: str, error: str) -> bool:
+    """失敗を記録する。回数が残っていればバックオフ後に再実行、尽きたら failed"""
+    job = await db.get(Job, job_id)
+    if job is None or job.lease_owner != owner or job.status != "running":
+        logger.warning(f"Job {job_id}: lease lost before failure was recorded")
+        return False
+
+    now = datetime.now()
+    job.last_error = error[:2000]
+    job.leased_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        job.finished_at = now
+        logger.error(f"Job {job_id} ({job.kind}) failed permanently: {error}")
+    else:
+        job.status = "queued"
+        job.lease_owner = None
+        backoff = settings.job_retry_backoff_seconds * 2 ** (job.attempts - 1)
+        job.run_after = now + timedelta(seconds=backoff)
+        logger.warning(
+            f"Job {job_id} ({job.kind}) failed (attempt {job.attempts}), retry in {backoff}s: {error}"
+        )
+    await db.commit()
+    return True
+
+
+async def reap(db: AsyncSession) -> int:
+    """後始末: 回数を使い切ったままリース切れのジョブを failed にし、古い完了分を消す"""
+    now = datetime.now()
+    exhausted = await db.execute(
+        update(Job)
+        .where(
+            Job.status == "running",
+            Job.leased_until < now,
+            Job.attempts >= Job.max_attempts,
+        )
+        .values(status="failed", finished_at=now, last_error="lease expired")
+    )
+    await db.execute(
+        delete(Job).where(
+            Job.status.in_(("done", "failed")),
+            Job.finished_at < now - timedelta(hours=settings.job_retention_hours),
+        )
+    )
+    await db.commit()
+    return exhausted.rowcount
+
+
+def job_to_dict(job: Job) -> dict:
+    """API応答用の辞書"""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "payload": json.loads(job.payload or "{}"),
+        "result": json.loads(job.result) if job.result else None,
+        "last_error": job.last_error,
+        "lease_owner": job.lease_owner,
+        "run_after": job.run_after.isoformat() if job.run_after else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
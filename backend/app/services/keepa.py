@@ -6,8 +6,18 @@
 Keepa API: https://keepa.com/#!api
 - 価格は「セント/最小単位」ではなく日本円の場合そのまま整数（-1 = データなし）
 - 時刻は keepaMinutes（分）= unixミリ秒/60000 - 21564000
+
+APIはプロセスで1つの KeepaClient（keepa_client）を通して呼ぶ:
+- HTTPクライアントを使い回す（コネクションプール、h2 が入っていれば HTTP/2）
+- 1ASINずつの同時呼び出しを短い時間窓でまとめ、複数ASINの1リクエストにする
+- 応答の tokensLeft / refillIn / refillRate からトークン残高を追い、足りなければ
+  回復を待つ（keepa_max_wait_seconds を超えるなら KeepaThrottled で断る）
 """
+import asyncio
+import importlib.util
 import logging
+import math
+import time
 from dataclasses import dataclass
 
 import httpx
@@ -18,6 +28,13 @@ logger = logging.getLogger(__name__)
 
 KEEPA_BASE = "https://api.keepa.com"
 _KEEPA_EPOCH_OFFSET_MIN = 21564000  # keepaMinutes -> unix変換用
+# /product の1リクエストで指定できるASINの上限（1ASIN = 1トークン）
+KEEPA_MAX_ASINS_PER_REQUEST = 100
+# stats.current のインデックス: 0 = Amazon本体, 1 = 新品最安（マケプレ含む）
+_CURRENT_AMAZON = 0
+_CURRENT_NEW = 1
+# HTTP/2 は h2 パッケージ（httpx[http2]）がある時だけ使う
+_HTTP2 = importlib.util.find_spec("h2") is not None
 
 
 def is_enabled() -> bool:
@@ -49,6 +66,180 @@ class KeepaIdentity:
     jan_codes: list[str]       # JAN/EAN（最高精度のクロスプラットフォーム識別子）
 
 
+@dataclass
+class KeepaTokens:
+    """Keepaのトークン残高（応答の tokensLeft / refillIn / refillRate から更新）
+
+    Keepaは1分ごとに refillRate ずつトークンを回復する（上限は refillRate の60倍）。
+    直近の応答から経過した時間分の回復を見込んで、今使えるトークン数を見積もる。
+    """
+    tokens_left: int | None = None  # 未取得（一度も呼んでいない）は None
+    refill_in_ms: int = 0           # 次の回復までのミリ秒
+    refill_rate: int = 0            # 1分あたりの回復量
+    updated_at: float = 0.0         # time.monotonic()
+
+    def update(self, data: dict) -> None:
+        if "tokensLeft" not in data:
+            return
+        self.tokens_left = int(data["tokensLeft"])
+        self.refill_in_ms = int(data.get("refillIn") or 0)
+        self.refill_rate = int(data.get("refillRate") or 0)
+        self.updated_at = time.monotonic()
+
+    def spend(self, cost: int) -> None:
+        """送信前に使う分を引いておく（同時リクエストで残高を二重に当てにしない）"""
+        if self.tokens_left is not None:
+            self.tokens_left -= cost
+
+    def available(self, now: float | None = None) -> int | None:
+        """今使えるトークン数の見積もり（未取得なら None = 制限しない）"""
+        if self.tokens_left is None:
+            return None
+        elapsed_ms = ((now if now is not None else time.monotonic()) - self.updated_at) * 1000
+        tokens = self.tokens_left
+        if self.refill_rate > 0 and elapsed_ms >= self.refill_in_ms:
+            refills = 1 + int((elapsed_ms - self.refill_in_ms) // 60000)
+            tokens = min(tokens + refills * self.refill_rate, max(self.refill_rate * 60, tokens))
+        return tokens
+
+    def wait_seconds(self, cost: int, now: float | None = None) -> float:
+        """cost 分のトークンが貯まるまでの秒数（回復しないなら inf）"""
+        now = now if now is not None else time.monotonic()
+        available = self.available(now)
+        if available is None or available >= cost:
+            return 0.0
+        if self.refill_rate <= 0:
+            return math.inf
+        elapsed_ms = (now - self.updated_at) * 1000
+        if elapsed_ms < self.refill_in_ms:
+            next_refill_ms = self.refill_in_ms - elapsed_ms
+        else:
+            next_refill_ms = 60000 - (elapsed_ms - self.refill_in_ms) % 60000
+        refills = math.ceil((cost - available) / self.refill_rate)
+        return (next_refill_ms + (refills - 1) * 60000) / 1000
+
+
+class KeepaThrottled(RuntimeError):
+    """トークンが足りず、待てる時間内にも回復しない（リクエストを断った）"""
+
+
+class KeepaClient:
+    """Keepa /product の呼び出し口（プロセスで1つを共有する）"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self._transport = transport
+        self._http: httpx.AsyncClient | None = None
+        self.tokens = KeepaTokens()
+        self._token_lock = asyncio.Lock()
+        # 時間窓でまとめ中の単品リクエスト: パラメータ -> [(asin, future)]
+        self._pending: dict[tuple, list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._batches: set[asyncio.Task] = set()
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=KEEPA_BASE,
+                timeout=30,
+                http2=_HTTP2,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._http
+
+    async def close(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for batch in self._pending.values():
+            for _, fut in batch:
+                if not fut.done():
+                    fut.cancel()
+        self._pending.clear()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _reserve(self, cost: int) -> None:
+        """cost 分のトークンを確保する（足りなければ回復を待つか KeepaThrottled）"""
+        async with self._token_lock:
+            wait = self.tokens.wait_seconds(cost)
+            if wait > settings.keepa_max_wait_seconds:
+                raise KeepaThrottled(
+                    f"Keepa tokens exhausted ({self.tokens.available()} left, need {cost})"
+                )
+            if wait > 0:
+                logger.info(f"Keepa tokens low, waiting {wait:.1f}s for refill")
+                await asyncio.sleep(wait)
+            self.tokens.spend(cost)
+
+    async def request_products(self, asins: list[str], **params) -> list[dict]:
+        """複数ASINを1回の /product で取得する（100件まで）"""
+        await self._reserve(len(asins))
+        resp = await self._client().get("/product", params={
+            "key": settings.keepa_api_key,
+            "domain": settings.keepa_domain,
+            "asin": ",".join(asins),
+            **params,
+        })
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {}
+        self.tokens.update(data)
+        if resp.status_code == 429:
+            raise KeepaThrottled("Keepa returned 429 (not enough tokens)")
+        resp.raise_for_status()
+        return data.get("products") or []
+
+    async def product(self, asin: str, **params) -> dict | None:
+        """1ASINを取得する。同時に来た同じパラメータの呼び出しとまとめて送る"""
+        key = tuple(sorted(params.items()))
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((asin, fut))
+        if len(batch) >= KEEPA_MAX_ASINS_PER_REQUEST:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(
+                settings.keepa_batch_window_ms / 1000, self._flush, key
+            )
+        return await fut
+
+    def _flush(self, key: tuple) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        task = asyncio.create_task(self._send(batch, dict(key)))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]], params: dict) -> None:
+        asins = list(dict.fromkeys(asin for asin, _ in batch))
+        try:
+            products = await self.request_products(asins, **params)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        by_asin = {p.get("asin"): p for p in products}
+        for asin, fut in batch:
+            if not fut.done():
+                fut.set_result(by_asin.get(asin))
+
+
+keepa_client = KeepaClient()
+
+
+async def close_keepa_client() -> None:
+    """共有Keepaクライアントを閉じる（lifespan shutdownで呼ぶ）"""
+    await keepa_client.close()
+
+
 async def fetch_product_identity(asin: str) -> KeepaIdentity | None:
     """ASINからブランド・型番・JAN(EAN)を取得（価格履歴は取らない=軽量）
 
@@ -58,22 +249,9 @@ async def fetch_product_identity(asin: str) -> KeepaIdentity | None:
     if not is_enabled():
         raise RuntimeError("Keepa API key is not configured")
 
-    params = {
-        "key": settings.keepa_api_key,
-        "domain": settings.keepa_domain,
-        "asin": asin,
-        "stats": 0,
-        "history": 0,
-    }
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(f"{KEEPA_BASE}/product", params=params)
-        resp.raise_for_status()
-        data = resp.json()
-
-    products = data.get("products") or []
-    if not products:
+    p = await keepa_client.product(asin, stats=0, history=0)
+    if not p:
         return None
-    p = products[0]
     model = p.get("model") or p.get("partNumber")
     jan = [str(e) for e in (p.get("eanList") or [])]
     return KeepaIdentity(
@@ -106,21 +284,62 @@ async def fetch_amazon_price_history(asin: str) -> list[KeepaPricePoint]:
     if not is_enabled():
         raise RuntimeError("Keepa API key is not configured")
 
-    params = {
-        "key": settings.keepa_api_key,
-        "domain": settings.keepa_domain,
-        "asin": asin,
-        "history": 1,
-    }
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(f"{KEEPA_BASE}/product", params=params)
-        resp.raise_for_status()
-        data = resp.json()
-
-    products = data.get("products") or []
-    if not products:
+    p = await keepa_client.product(asin, history=1)
+    if not p:
         return []
-    csv = products[0].get("csv") or []
+    csv = p.get("csv") or []
     # csv[0] = Amazon本体価格の履歴
     amazon_series = csv[0] if len(csv) > 0 else None
     return _parse_csv_series(amazon_series)
+
+
+def _current_price(product: dict) -> int | None:
+    """stats.current から現在価格を取る（Amazon本体 → 無ければ新品最安）"""
+    current = (product.get("stats") or {}).get("current") or []
+    for index in (_CURRENT_AMAZON, _CURRENT_NEW):
+        if len(current) > index and current[index] is not None and current[index] > 0:
+            return int(current[index])
+    return None
+
+
+async def fetch_current_prices(asins: list[str]) -> dict[str, int]:
+    """複数ASINの現在価格をまとめて取得する（100件ずつ /product を呼ぶ）
+
+    バックグラウンドの一括更新なので回復は待たず、トークン残高の見積もりが
+    足りない分は取得せずに打ち切る（keepa_min_tokens は画面からの照会用に残す）。
+    戻り値は価格が取れたASINだけの {asin: 円}。取れなかったASINは呼び出し側で
+    ブラウザ取得等にフォールバックする。
+    """
+    if not is_enabled():
+        raise RuntimeError("Keepa API key is not configured")
+
+    tokens = keepa_client.tokens
+    prices: dict[str, int] = {}
+    for start in range(0, len(asins), KEEPA_MAX_ASINS_PER_REQUEST):
+        chunk = asins[start:start + KEEPA_MAX_ASINS_PER_REQUEST]
+        available = tokens.available()
+        if available is not None:
+            usable = available - settings.keepa_min_tokens
+            if usable <= 0:
+                logger.info(
+                    f"Keepa tokens exhausted ({available} left, refill in "
+                    f"{tokens.refill_in_ms}ms); {len(asins) - start} ASINs deferred"
+                )
+                break
+            chunk = chunk[:usable]
+
+        try:
+            products = await keepa_client.request_products(chunk, stats=1, history=0)
+        except KeepaThrottled as e:
+            logger.warning(str(e))
+            break
+        for product in products:
+            price = _current_price(product)
+            if price is not None and product.get("asin"):
+                prices[product["asin"]] = price
+
+        if len(chunk) < min(KEEPA_MAX_ASINS_PER_REQUEST, len(asins) - start):
+            break  # トークンが足りず途中までしか取れなかった
+
+    logger.info(f"Keepa prices: {len(prices)}/{len(asins)} ASINs")
+    return prices
@@ -0,0 +1,124 @@
+"""リーダー選出 - 複数プロセスのうち1つだけがスケジューラーのジョブを実行する
+
+uvicorn --workers N で各プロセスの lifespan が start_scheduler() を呼んでも、
+DB上のリース（scheduler_leases の1行）を持っているプロセスだけが巡回を実行する。
+
+- 各プロセスはハートビートごとにリースの取得・延長を試みる（条件付き UPDATE）
+- リーダーが落ちてハートビートが止まると、期限切れ後に他のプロセスが引き継ぐ
+- 自分の最後の延長から期限が過ぎていたら（イベントループが詰まった等）、
+  DBを見なくてもリーダーではないとみなす（二重実行を避ける側に倒す）
+"""
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+
+def process_owner() -> str:
+    """このプロセスの識別子（ホスト名:PID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElection:
+    """DBリースによるリーダー選出"""
+
+    def __init__(self, name: str, owner: str | None = None):
+        self.name = name
+        self.owner = owner or process_owner()
+        self._expires_at: datetime | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._expires_at is not None and self._expires_at > datetime.now()
+
+    async def heartbeat(self) -> bool:
+        """リースを取得・延長する。リーダーなら True"""
+        was_leader = self.is_leader
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=settings.scheduler_lease_ttl_seconds)
+        try:
+            acquired = await self._try_acquire(now, expires_at)
+        except SQLAlchemyError as e:
+            logger.warning(f"Leader heartbeat failed ({self.name}): {e}")
+            acquired = False
+
+        self._expires_at = expires_at if acquired else None
+        if acquired and not was_leader:
+            logger.info(f"Became {self.name} leader: {self.owner}")
+        elif was_leader and not acquired:
+            logger.warning(f"Lost {self.name} leadership: {self.owner}")
+        return acquired
+
+    async def _try_acquire(self, now: datetime, expires_at: datetime) -> bool:
+        async with async_session() as db:
+            result = await db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(
+                        SchedulerLease.owner == self.owner,
+                        SchedulerLease.expires_at < now,
+                    ),
+                )
+                .values(owner=self.owner, expires_at=expires_at, heartbeat_at=now)
+            )
+            if result.rowcount == 1:
+                await db.commit()
+                return True
+            if await db.get(SchedulerLease, self.name) is not None:
+                return False  # 他のプロセスが保持中
+            db.add(
+                SchedulerLease(
+                    name=self.name, owner=self.owner,
+                    expires_at=expires_at, heartbeat_at=now,
+                )
+            )
+            try:
+                await db.commit()
+            except IntegrityError:
+                return False  # 同時に作られた（相手の勝ち）
+            return True
+
+    async def release(self) -> None:
+        """保持中のリースを手放す（停止時。他のプロセスがすぐ引き継げる）"""
+        if self._expires_at is None:
+            return
+        self._expires_at = None
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    update(SchedulerLease)
+                    .where(
+                        SchedulerLease.name == self.name,
+                        SchedulerLease.owner == self.owner,
+                    )
+                    .values(expires_at=datetime.now())
+                )
+                await db.commit()
+            logger.info(f"Released {self.name} leadership: {self.owner}")
+        except SQLAlchemyError as e:
+            logger.warning(f"Leader release failed ({self.name}): {e}")
+
+    async def holder(self, db: AsyncSession) -> dict | None:
+        """現在のリース保持者（期限切れなら None）"""
+        lease = await db.get(SchedulerLease, self.name)
+        if lease is None or lease.expires_at <= datetime.now():
+            return None
+        return {
+            "owner": lease.owner,
+            "expires_at": lease.expires_at.isoformat(),
+            "heartbeat_at": lease.heartbeat_at.isoformat(),
+        }
+
+
+scheduler_leader = LeaderElection("scheduler")
@@ -0,0 +1,62 @@
+"""監視オークションの次回チェック時刻の計算（優先度付きポーリング）
+
+全件を同じ間隔で回すと、3日後に終わる件と5分後に終わる件、1週間動きのない件と
+入札が続いている件に同じだけリクエストを使ってしまう。
+そこで1件ごとに「次にいつ見るか」を決め、スケジューラーは期限の来た件だけ取得する。
+
+- 基本間隔: 終了までの残り時間 / polling_deadline_divisor（終了が近いほど短い）
+- 直近 polling_active_window_hours 以内に価格が動いた件は半分に
+- 利益率がチャンス閾値の近く（±polling_threshold_band）なら半分に
+- 最短・最長間隔で丸め、終了時刻は跨がない（終了直後に1回見て終了を検知する）
+"""
+from datetime import datetime, timedelta
+
+from app.config import settings
+
+# 価格が動いている・閾値付近の件に掛ける係数
+_ACTIVE_FACTOR = 0.5
+_NEAR_THRESHOLD_FACTOR = 0.5
+
+
+def next_check_interval(
+    end_time: datetime | None,
+    price_changed_at: datetime | None,
+    profit_rate: float | None,
+    now: datetime,
+) -> timedelta:
+    """次回チェックまでの間隔"""
+    min_minutes = settings.polling_min_interval_minutes
+    max_minutes = settings.polling_max_interval_minutes
+
+    if end_time is None:
+        minutes = float(settings.scheduler_interval_minutes)
+    else:
+        remaining = max((end_time - now).total_seconds() / 60, 0.0)
+        minutes = remaining / settings.polling_deadline_divisor
+
+    if price_changed_at is not None and now - price_changed_at <= timedelta(
+        hours=settings.polling_active_window_hours
+    ):
+        minutes *= _ACTIVE_FACTOR
+
+    if (
+        profit_rate is not None
+        and abs(profit_rate - settings.chance_min_profit_rate)
+        <= settings.polling_threshold_band
+    ):
+        minutes *= _NEAR_THRESHOLD_FACTOR
+
+    return timedelta(minutes=min(max(minutes, min_minutes), max_minutes))
+
+
+def next_check_at(
+    end_time: datetime | None,
+    price_changed_at: datetime | None,
+    profit_rate: float | None,
+    now: datetime,
+) -> datetime:
+    """次回チェック時刻（終了時刻を跨ぐ場合は終了直後に寄せる）"""
+    at = now + next_check_interval(end_time, price_changed_at, profit_rate, now)
+    if end_time is not None and end_time > now:
+        at = min(at, end_time + timedelta(minutes=settings.polling_min_interval_minutes))
+    return at
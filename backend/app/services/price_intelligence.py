@@ -0,0 +1,222 @@
+"""価格差インテリジェンス - 監視ごとの利益計算・スナップショット・チャンス検出
+
+監視の最新状態（LinkState）の profit / profit_rate はチャンス一覧の索引を兼ねる。
+ヤフオク価格（スケジューラー）・Amazon価格（リフレッシュ・手動保存）が変わるたびに
+process_price_intelligence で計算し直し、手数料・チャンスの閾値の設定が変わった時は起動時に
+reindex_pricing がまとめて計算し直す（/api/monitor/chances は計算せず索引を引くだけ）。
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import desc, or_, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models import Auction, LinkState, Notification, PriceSnapshot, Product, ProductAuctionLink
+from app.services.pricing import AMAZON_FEE_RATES, calculate_pricing
+
+logger = logging.getLogger(__name__)
+
+
+def pricing_version() -> str:
+    """利益計算・チャンス判定に効く設定（手数料率・送料・閾値）の指紋。変わったら索引を作り直す"""
+    config = {
+        "fees": AMAZON_FEE_RATES,
+        "shipping": settings.chance_default_shipping,
+        "min_profit_rate": settings.chance_min_profit_rate,
+        "min_profit_amount": settings.chance_min_profit_amount,
+    }
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _calculate(yahoo_price, amazon_price, category) -> tuple[int | None, float | None]:
+    """(想定利益, 利益率)。どちらかの価格が無ければ (None, None)"""
+    if not (amazon_price and yahoo_price):
+        return None, None
+    calc = calculate_pricing(
+        selling_price=amazon_price,
+        expected_winning_price=yahoo_price,
+        category=category,
+        shipping_cost=settings.chance_default_shipping,
+    )
+    return calc.profit, calc.profit_rate
+
+
+def _meets_chance(profit: int | None, profit_rate: float | None) -> bool:
+    """利益・利益率がチャンスの閾値を満たすか"""
+    return (
+        profit_rate is not None
+        and profit is not None
+        and profit_rate >= settings.chance_min_profit_rate
+        and profit >= settings.chance_min_profit_amount
+    )
+
+
+def _apply_pricing(state: LinkState, category) -> None:
+    """状態の価格から profit / profit_rate / is_chance を計算し直す"""
+    state.profit, state.profit_rate = _calculate(state.yahoo_price, state.amazon_price, category)
+    state.is_chance = _meets_chance(state.profit, state.profit_rate)
+    state.pricing_version = pricing_version()
+
+
+async def _init_state(db, link_id: int, category) -> LinkState:
+    """最新状態の行を作る（既存の監視は直近のスナップショットから引き継ぐ）"""
+    latest = (
+        await db.execute(
+            select(PriceSnapshot)
+            .where(PriceSnapshot.link_id == link_id)
+            .order_by(desc(PriceSnapshot.captured_at), desc(PriceSnapshot.id))
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    state = LinkState(link_id=link_id, is_chance=False)
+    if latest is not None:
+        state.yahoo_price = latest.yahoo_price
+        state.amazon_price = latest.amazon_price
+        state.snapshot_id = latest.id
+    _apply_pricing(state, category)
+    db.add(state)
+    return state
+
+
+async def process_price_intelligence(
+    db, link, auction, product, state: LinkState | None, now
+) -> float | None:
+    """価格差インテリジェンス処理
+
+    1. 想定利益・利益率を計算
+    2. スナップショットを記録（グラフ用。値が前回と同じなら last_seen_at を進めるだけ）
+    3. 利益率が閾値を新たに超えたら「仕入れチャンス」通知を発火（エッジ検出）
+    4. 監視の最新状態（LinkState）を更新
+
+    前回の値は state から取る（スナップショットを遡らない）。
+    計算した利益率を返す（次回チェック時刻の計算用。計算できなければ None）。
+    """
+    yahoo_price = auction.current_price
+    amazon_price = product.amazon_price
+    profit, profit_rate = _calculate(yahoo_price, amazon_price, product.category)
+
+    if state is None:
+        state = await _init_state(db, link.id, product.category)
+    met_before = state.is_chance
+
+    if state.snapshot_id is not None and (
+        state.yahoo_price, state.amazon_price, state.profit_rate
+    ) == (yahoo_price, amazon_price, profit_rate):
+        await db.execute(
+            update(PriceSnapshot)
+            .where(PriceSnapshot.id == state.snapshot_id)
+            .values(last_seen_at=now)
+        )
+    else:
+        snapshot = PriceSnapshot(
+            link_id=link.id,
+            yahoo_price=yahoo_price,
+            amazon_price=amazon_price,
+            profit_rate=profit_rate,
+            captured_at=now,
+            last_seen_at=now,
+        )
+        db.add(snapshot)
+        await db.flush()
+        state.snapshot_id = snapshot.id
+
+    meets_now = _meets_chance(profit, profit_rate)
+    state.yahoo_price = yahoo_price
+    state.amazon_price = amazon_price
+    state.profit = profit
+    state.profit_rate = profit_rate
+    state.is_chance = meets_now
+    state.pricing_version = pricing_version()
+    state.checked_at = now
+
+    # 仕入れチャンス判定: 今回は閾値超え かつ 前回は閾値未満（新規発生時のみ通知）
+    if profit_rate is None or profit is None:
+        return None
+
+    if meets_now and not met_before:
+        db.add(
+            Notification(
+                type="price_gap",
+                title=f"仕入れチャンス: {product.title[:30]}",
+                message=(
+                    f"{product.title}\n"
+                    f"ヤフオク {yahoo_price:,}円 → Amazon {amazon_price:,}円\n"
+                    f"想定利益 {profit:,}円（利益率 {profit_rate}%）"
+                ),
+                link_url=f"/monitors/{link.id}",
+            )
+        )
+        logger.info(
+            f"Chance detected: link={link.id} profit={profit} rate={profit_rate}%"
+        )
+    return profit_rate
+
+
+async def reprice_product_links(db, product_id: int, now: datetime) -> int:
+    """商品のAmazon価格が変わった時、紐づく監視（active）を計算し直す
+
+    呼び出し側のトランザクションで反映する（コミットは呼び出し側）。計算し直した件数を返す。
+    """
+    rows = (
+        await db.execute(
+            select(ProductAuctionLink, Auction, Product, LinkState)
+            .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+            .join(Product, ProductAuctionLink.product_id == Product.id)
+            .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
+            .where(
+                ProductAuctionLink.product_id == product_id,
+                ProductAuctionLink.is_monitoring.is_(True),
+                Auction.status == "active",
+            )
+        )
+    ).all()
+    for link, auction, product, state in rows:
+        await process_price_intelligence(db, link, auction, product, state, now)
+    return len(rows)
+
+
+async def reindex_pricing() -> int:
+    """手数料・閾値の設定が変わった監視の profit / profit_rate / is_chance を計算し直す（起動時）
+
+    状態の行が無い監視（導入前からの監視）もここで作る。チャンス一覧の索引だけを直し、
+    スナップショット・通知は次のチェックに任せる（何プロセスが同時に実行しても結果は同じ）。
+    計算し直した件数を返す。
+    """
+    version = pricing_version()
+    async with async_session() as db:
+        # 状態の行がまだ無い監視（導入前からの監視）は直近のスナップショットから作る
+        missing = (
+            await db.execute(
+                select(ProductAuctionLink.id, Product.category)
+                .join(Product, ProductAuctionLink.product_id == Product.id)
+                .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
+                .where(ProductAuctionLink.is_monitoring.is_(True), LinkState.link_id.is_(None))
+            )
+        ).all()
+        for link_id, category in missing:
+            await _init_state(db, link_id, category)
+        await db.flush()
+
+        rows = (
+            await db.execute(
+                select(LinkState, Product.category)
+                .join(ProductAuctionLink, LinkState.link_id == ProductAuctionLink.id)
+                .join(Product, ProductAuctionLink.product_id == Product.id)
+                .where(
+                    or_(
+                        LinkState.pricing_version.is_(None),
+                        LinkState.pricing_version != version,
+                    )
+                )
+            )
+        ).all()
+        for state, category in rows:
+            _apply_pricing(state, category)
+        await db.commit()
+    count = len(missing) + len(rows)
+    if count:
+        logger.info(f"Reindexed pricing for {count} monitors (version {version})")
+    return count
@@ -0,0 +1,291 @@
+"""監視チェックの実行（run）の進捗管理と多重実行の防止
+
+「今すぐ実行」はバックグラウンドで走らせて run id を返し、進捗（件数・失敗・残り時間の目安）は
+別のAPIで問い合わせる。同時に走る run は常に1つだけ:
+
+- 同じプロセス内: current が埋まっていれば新しい run は始めない（実行中の run に相乗り）
+- プロセス間: DBリース（scheduler_leases の "check_run" 行）を持っている間だけ実行する
+
+進捗は check_runs テーブルにも数秒ごとに書き込むので、run を始めたプロセス以外
+（uvicorn の別ワーカー）からも問い合わせられる。他のプロセスが run 中なら、その run id を返す。
+ジョブキューが有効なら「今すぐ実行」は check_run ジョブを積むだけで、ワーカーが実行する。
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models import CheckRun, SchedulerLease
+from app.services.jobqueue import enqueue
+from app.services.leader import LeaderElection
+
+logger = logging.getLogger(__name__)
+
+# 保持しておく run の数（古いものから捨てる）
+_HISTORY_SIZE = 20
+# run ごとに保持するエラーメッセージの上限
+_MAX_ERRORS = 50
+# 実行中の進捗をDBへ書き込む間隔
+_PERSIST_INTERVAL_SECONDS = 2.0
+
+
+@dataclass
+class RunProgress:
+    """1回分の監視チェックの進捗"""
+    id: str
+    trigger: str                     # manual / scheduled
+    status: str = "running"          # queued / running / done / failed
+    total: int = 0
+    done: int = 0                    # 処理済み（成功 + 失敗）
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: datetime | None = None
+
+    @classmethod
+    def from_row(cls, row: CheckRun) -> "RunProgress":
+        return cls(
+            id=row.id,
+            trigger=row.trigger,
+            status=row.status,
+            total=row.total,
+            done=row.done,
+            failed=row.failed,
+            errors=json.loads(row.errors or "[]"),
+            started_at=row.started_at,
+            finished_at=row.finished_at,
+        )
+
+    def item_done(self, error: str | None = None) -> None:
+        self.done += 1
+        if error is not None:
+            self.failed += 1
+            if len(self.errors) < _MAX_ERRORS:
+                self.errors.append(error)
+
+    def eta_seconds(self) -> float | None:
+        """残り時間の目安（ここまでの1件あたりの平均から）"""
+        if self.status != "running" or self.done == 0 or self.total <= self.done:
+            return None
+        elapsed = (datetime.now() - self.started_at).total_seconds()
+        return round(elapsed / self.done * (self.total - self.done), 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "errors": self.errors,
+            "eta_seconds": self.eta_seconds(),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class RunInProgress(Exception):
+    """既に run が実行中（run_id は実行中の run。他プロセスの run が見つからなければ None）"""
+
+    def __init__(self, run_id: str | None):
+        super().__init__("A check run is already in progress")
+        self.run_id = run_id
+
+
+RunFn = Callable[[RunProgress], Awaitable[None]]
+
+
+class RunTracker:
+    """run の開始・進捗の保持・多重実行の防止"""
+
+    def __init__(self, lease_name: str = "check_run"):
+        self._runs: OrderedDict[str, RunProgress] = OrderedDict()
+        self._lease = LeaderElection(lease_name)
+        self._task: asyncio.Task | None = None
+        self.current: RunProgress | None = None
+
+    async def get(self, db: AsyncSession, run_id: str) -> RunProgress | None:
+        """run の進捗（このプロセスの run ならメモリ上の最新、他はDBから）"""
+        if run_id in self._runs:
+            return self._runs[run_id]
+        row = await db.get(CheckRun, run_id)
+        return RunProgress.from_row(row) if row is not None else None
+
+    async def recent(self, db: AsyncSession) -> list[RunProgress]:
+        """最近の run（全プロセス分、新しい順）"""
+        rows = (
+            await db.execute(
+                select(CheckRun).order_by(CheckRun.started_at.desc()).limit(_HISTORY_SIZE)
+            )
+        ).scalars().all()
+        return [self._runs.get(row.id) or RunProgress.from_row(row) for row in rows]
+
+    async def running(self, db: AsyncSession) -> RunProgress | None:
+        """実行中の run（どのプロセスの run でも。リースが切れた run は含めない）"""
+        if self.current is not None:
+            return self.current
+        row = (
+            await db.execute(
+                select(CheckRun)
+                .join(SchedulerLease, SchedulerLease.owner == CheckRun.owner)
+                .where(
+                    SchedulerLease.name == self._lease.name,
+                    SchedulerLease.expires_at > datetime.now(),
+                    CheckRun.status == "running",
+                )
+                .order_by(CheckRun.started_at.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        return RunProgress.from_row(row) if row is not None else None
+
+    async def enqueue(self, db: AsyncSession, trigger: str) -> tuple[str, bool]:
+        """run をジョブキューに積む（コミットは呼び出し側）。(run id, 既に実行中・実行待ちか)"""
+        running = await self.running(db)
+        if running is not None:
+            return running.id, True
+        run_id = uuid.uuid4().hex[:12]
+        job = await enqueue(
+            db, "check_run", {"run_id": run_id, "trigger": trigger}, dedupe_key="check_run"
+        )
+        queued_id = json.loads(job.payload)["run_id"]
+        if queued_id != run_id:
+            return queued_id, True
+        db.add(CheckRun(id=run_id, trigger=trigger, status="queued", started_at=datetime.now()))
+        return run_id, False
+
+    async def start(self, fn: RunFn, trigger: str, run_id: str | None = None) -> RunProgress:
+        """run をバックグラウンドで開始して進捗を返す（実行中なら RunInProgress）
+
+        run_id はジョブキューに積んだ時に払い出した id（無ければ新しく作る）。
+        """
+        if self.current is not None:
+            raise RunInProgress(self.current.id)
+        progress = RunProgress(id=run_id or uuid.uuid4().hex[:12], trigger=trigger)
+        # await より前に埋めて、同じプロセス内の同時呼び出しを確実に弾く
+        self.current = progress
+        if not await self._lease.heartbeat():
+            self.current = None
+            raise RunInProgress(await self._running_elsewhere())
+
+        self._runs[progress.id] = progress
+        while len(self._runs) > _HISTORY_SIZE:
+            self._runs.popitem(last=False)
+        await self._persist(progress)
+        self._task = asyncio.create_task(self._run(fn, progress))
+        return progress
+
+    async def run(self, fn: RunFn, trigger: str, run_id: str | None = None) -> RunProgress:
+        """run を開始して終わるまで待つ（定期実行・ジョブ用）"""
+        progress = await self.start(fn, trigger, run_id)
+        await self.wait()
+        return progress
+
+    async def abandon(self, run_id: str, reason: str) -> None:
+        """積まれたまま実行しなかった run を failed にする"""
+        async with async_session() as db:
+            await db.execute(
+                update(CheckRun)
+                .where(CheckRun.id == run_id, CheckRun.status == "queued")
+                .values(
+                    status="failed",
+                    errors=json.dumps([reason], ensure_ascii=False),
+                    finished_at=datetime.now(),
+                )
+            )
+            await db.commit()
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def cancel(self) -> None:
+        """実行中の run を止める（シャットダウン用）"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self, fn: RunFn, progress: RunProgress) -> None:
+        keepalive = asyncio.create_task(self._keep_lease())
+        persist = asyncio.create_task(self._keep_persisting(progress))
+        try:
+            await fn(progress)
+            progress.status = "done"
+        except Exception as e:
+            progress.status = "failed"
+            progress.errors.append(f"{type(e).__name__}: {e}")
+            logger.error(f"Check run {progress.id} failed: {e}")
+        except asyncio.CancelledError:
+            progress.status = "failed"
+            progress.errors.append("cancelled")
+            raise
+        finally:
+            keepalive.cancel()
+            persist.cancel()
+            progress.finished_at = datetime.now()
+            await self._persist(progress)
+            self.current = None
+            await self._lease.release()
+
+    async def _keep_lease(self) -> None:
+        """run の間リースを延長し続ける（他プロセスに run を始めさせない）"""
+        while True:
+            await asyncio.sleep(settings.scheduler_lease_heartbeat_seconds)
+            await self._lease.heartbeat()
+
+    async def _keep_persisting(self, progress: RunProgress) -> None:
+        while True:
+            await asyncio.sleep(_PERSIST_INTERVAL_SECONDS)
+            await self._persist(progress)
+
+    async def _persist(self, progress: RunProgress) -> None:
+        """進捗をDBに書き込む（失敗しても run は止めない）"""
+        try:
+            async with async_session() as db:
+                await db.merge(
+                    CheckRun(
+                        id=progress.id,
+                        trigger=progress.trigger,
+                        status=progress.status,
+                        owner=self._lease.owner,
+                        total=progress.total,
+                        done=progress.done,
+                        failed=progress.failed,
+                        errors=json.dumps(progress.errors, ensure_ascii=False),
+                        started_at=progress.started_at,
+                        finished_at=progress.finished_at,
+                    )
+                )
+                if progress.finished_at is not None:
+                    # 終わった run は履歴として一定時間だけ残す
+                    await db.execute(
+                        delete(CheckRun).where(
+                            CheckRun.finished_at
+                            < datetime.now() - timedelta(hours=settings.job_retention_hours)
+                        )
+                    )
+                await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not save progress of check run {progress.id}: {e}")
+
+    async def _running_elsewhere(self) -> str | None:
+        """リースを持っている他のプロセスの実行中 run id"""
+        try:
+            async with async_session() as db:
+                run = await self.running(db)
+        except SQLAlchemyError:
+            return None
+        return run.id if run is not None else None
+
+
+check_runs = RunTracker()
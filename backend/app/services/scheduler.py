@@ -1,261 +1,572 @@
 """監視ジョブスケジューラー - ヤフオク価格の定期チェック"""
+import asyncio
 import logging
 from datetime import datetime, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import desc, select
+from sqlalchemy import or_, select, update
 
 from app.config import settings
-from app.database import async_session
+from app.database import async_session, run_maintenance
 from app.models import (
     Auction,
+    LinkState,
     Notification,
-    PriceSnapshot,
     Product,
     ProductAuctionLink,
 )
-from app.scrapers.amazon_product import get_amazon_product
-from app.scrapers.yahoo_detail import get_auction_detail
-from app.services.pricing import calculate_pricing
+from app.scrapers.yahoo_detail import get_auction_detail, get_auction_price
+from app.services.amazon_refresh import refresh_stale_amazon_prices
+from app.services.jobqueue import enqueue
+from app.services.leader import scheduler_leader
+from app.services.polling import next_check_at
+from app.services.price_intelligence import process_price_intelligence
+from app.services.runs import RunInProgress, RunProgress, check_runs
+from app.services.snapshot_retention import compact_snapshots
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
 
-async def check_monitored_auctions():
-    """監視対象の全オークションの価格を更新"""
-    logger.info("Starting scheduled auction check...")
+# 巡回対象の読み込み列（ORMオブジェクトではなく値だけを読み、
+# 書き込みは1件ごとの短いセッションで行う = 大きな identity map を抱えない）
+_TARGET_COLUMNS = (
+    ProductAuctionLink.id.label("link_id"),
+    Auction.id.label("auction_pk"),
+    Auction.auction_id,
+    Product.id.label("product_id"),
+)
 
-    async with async_session() as db:
-        # 監視中 + activeのオークションを link・product と一緒に取得
-        result = await db.execute(
-            select(ProductAuctionLink, Auction, Product)
+
+def _targets_query():
+    """監視中 + active のオークション（巡回対象）の選択クエリ"""
+    return (
+        select(*_TARGET_COLUMNS)
+        .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+        .join(Product, ProductAuctionLink.product_id == Product.id)
+        .where(
+            ProductAuctionLink.is_monitoring.is_(True),
+            Auction.status == "active",
+        )
+    )
+
+
+async def _load_item(db, target):
+    """書き込み用に (link, auction, product, state) を1回の select で読み直す
+
+    途中で消えた・終了済みなら None。state は未作成なら None。
+    """
+    row = (
+        await db.execute(
+            select(ProductAuctionLink, Auction, Product, LinkState)
             .join(Auction, ProductAuctionLink.auction_id == Auction.id)
             .join(Product, ProductAuctionLink.product_id == Product.id)
-            .where(
-                ProductAuctionLink.is_monitoring.is_(True),
-                Auction.status == "active",
+            .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
+            .where(ProductAuctionLink.id == target.link_id)
+        )
+    ).one_or_none()
+    if row is None or row[1].status != "active":
+        return None
+    return tuple(row)
+
+
+async def check_due_auctions():
+    """次回チェック時刻を過ぎた監視オークションだけ更新（スケジューラーの tick）
+
+    ジョブキューが有効なら自分では取得せず、1件ずつ check_auction ジョブとして積む
+    （ワーカープロセスが並列に実行する）。
+    期限の来た件が無い tick は run として記録しない（run の履歴を空の定期実行で埋めない）。
+    """
+    if settings.job_queue_enabled:
+        await _enqueue_due_checks()
+        return
+    async with async_session() as db:
+        due = (
+            await db.execute(_monitor_query(datetime.now(), due_only=True).limit(1))
+        ).first()
+    if due is None:
+        return
+    try:
+        await check_runs.run(
+            lambda progress: check_monitored_auctions(due_only=True, progress=progress),
+            trigger="scheduled",
+        )
+    except RunInProgress:
+        # 手動実行などの run が走っている間の tick は見送る（次の tick で拾う）
+        logger.info("Check run already in progress, skipping this tick")
+
+
+async def closing_lane_tick():
+    """終了間際レーンの tick（ジョブキューが有効ならキューに積むだけ）"""
+    if settings.job_queue_enabled:
+        async with async_session() as db:
+            await enqueue(db, "track_closing", dedupe_key="track_closing")
+            await db.commit()
+    else:
+        await track_closing_auctions()
+
+
+def _monitor_query(now: datetime, due_only: bool):
+    """通常の巡回で見る対象の選択クエリ"""
+    query = _targets_query()
+    if settings.final_lane_enabled:
+        query = query.where(_outside_final_window(now))
+    if due_only:
+        # 未チェック（NULL）を先頭に、期限の古い順
+        query = (
+            query.where(
+                Auction.next_check_at.is_(None)
+                | (Auction.next_check_at <= now)
             )
+            .order_by(Auction.next_check_at.is_not(None), Auction.next_check_at)
+            .limit(settings.scheduler_max_checks_per_tick)
         )
-        rows = result.all()
+    return query
 
-        if not rows:
-            logger.info("No active monitored auctions to check")
+
+async def _enqueue_due_checks() -> None:
+    async with async_session() as db:
+        if await check_runs.running(db) is not None:
+            # run-now が全件を見ている間は積まない（次の tick で拾う）
+            logger.info("Check run in progress, not enqueueing due checks")
             return
+        targets = (await db.execute(_monitor_query(datetime.now(), due_only=True))).all()
+        # 同じオークションのチェックが積まれている・実行中なら重ねない
+        for target in targets:
+            await enqueue(
+                db, "check_auction", {"auction_pk": target.auction_pk},
+                dedupe_key=f"check_auction:{target.auction_pk}",
+            )
+        await db.commit()
+    if targets:
+        logger.info(f"Enqueued {len(targets)} auction checks")
 
-        logger.info(f"Checking {len(rows)} auctions...")
-        updated = 0
-        ended = 0
 
-        for link, auction, product in rows:
-            try:
-                detail = await get_auction_detail(auction.auction_id)
-                if not detail:
-                    logger.warning(f"Could not fetch detail for {auction.auction_id}")
-                    continue
-
-                now = datetime.now()
-
-                # 価格変動チェック
-                old_price = auction.current_price
-                new_price = detail.current_price
-
-                if old_price is not None and new_price is not None and old_price != new_price:
-                    auction.previous_price = old_price
-                    auction.price_changed = True
-
-                    # 通知を作成
-                    direction = "上昇" if new_price > old_price else "下落"
-                    diff = abs(new_price - old_price)
-                    notification = Notification(
-                        type="price_change",
-                        title=f"価格{direction}: {auction.title[:30]}",
-                        message=(
-                            f"{auction.title}\n"
-                            f"{old_price:,}円 → {new_price:,}円 ({direction}{diff:,}円)"
-                        ),
-                        link_url=f"/monitor/{auction.id}",
-                    )
-                    db.add(notification)
-                    logger.info(
-                        f"Price change for {auction.auction_id}: "
-                        f"{old_price} -> {new_price}"
-                    )
+async def check_auction(auction_pk: int) -> None:
+    """監視オークション1件をチェックする（ジョブキューのワーカーから呼ばれる）
 
-                # 価格更新
-                if detail.current_price is not None:
-                    auction.current_price = detail.current_price
-                if detail.buy_now_price is not None:
-                    auction.buy_now_price = detail.buy_now_price
-
-                # 終了チェック
-                if detail.end_time and detail.end_time < now:
-                    auction.status = "ended"
-                    ended += 1
-
-                    notification = Notification(
-                        type="auction_ended",
-                        title=f"オークション終了: {auction.title[:30]}",
-                        message=(
-                            f"{auction.title}\n"
-                            f"最終価格: {auction.current_price:,}円"
-                            if auction.current_price
-                            else f"{auction.title}\n終了"
-                        ),
-                        link_url=f"/monitor/{auction.id}",
-                    )
-                    db.add(notification)
+    run（run-now）が実行中なら何もしない。run が全件を見るので、重ねて取得しない。
+    """
+    async with async_session() as db:
+        if await check_runs.running(db) is not None:
+            logger.info(f"Check run in progress, skipping check of auction {auction_pk}")
+            return
+        target = (
+            await db.execute(_targets_query().where(Auction.id == auction_pk))
+        ).one_or_none()
+    if target is None:
+        return  # 監視解除・終了済み
+    run = _CheckRun()
+    await run.check(target)
+    if run.failed:
+        raise RuntimeError(f"Check failed for auction {target.auction_id}")
+
+
+async def check_monitored_auctions(
+    due_only: bool = False, progress: RunProgress | None = None
+):
+    """監視対象のオークションの価格を更新
+
+    due_only=True なら next_check_at を過ぎた件だけ、期限の古い順に
+    scheduler_max_checks_per_tick 件まで取得する（False なら全件 = 手動実行）。
+    ヤフオク詳細の取得は並列に行い、同時数は全体とヤフオク用の枠で絞る。
+    Amazon価格の更新は別パイプライン（amazon_refresh.py）で行い、ここでは待たない。
+    1件が遅い・失敗しても他の件は待たされない（1件ごとにタイムアウト）。
+    DBへの反映は1件ずつ短いトランザクションでコミットする（途中で落ちても済んだ分は残り、
+    API側の書き込みを長く待たせない）。
+    終了間際の件は終了間際レーン（track_closing_auctions）に任せてここでは見ない。
+    progress を渡すと1件ごとに進捗を記録する（run-now の進捗表示用）。
+    """
+    logger.info("Starting scheduled auction check...")
 
-                auction.last_checked = now
+    async with async_session() as db:
+        targets = (await db.execute(_monitor_query(datetime.now(), due_only))).all()
 
-                # Amazon価格リフレッシュ → スナップショット記録 → 価格差チャンス検出
-                await _process_price_intelligence(db, link, auction, product, now)
+    if not targets:
+        logger.info("No active monitored auctions to check")
+        return
 
-                updated += 1
+    logger.info(f"Checking {len(targets)} auctions...")
+    if progress is not None:
+        progress.total = len(targets)
+    run = _CheckRun(progress)
+    await asyncio.gather(*(run.check(target) for target in targets))
 
-            except Exception as e:
-                logger.error(f"Error checking auction {auction.auction_id}: {e}")
+    logger.info(
+        f"Check complete: {run.updated} updated, {run.ended} ended, {run.failed} failed"
+    )
 
-        await db.commit()
-        logger.info(
-            f"Check complete: {updated} updated, {ended} ended"
-        )
 
+class _CheckRun:
+    """1回分の監視チェック（並列実行の同時数制御とDB書き込みの直列化）"""
 
-async def _maybe_refresh_amazon_price(product: Product, now: datetime) -> None:
-    """Amazon価格が古い/未取得なら再スクレイピングして更新する"""
-    if not settings.amazon_refresh_enabled:
-        return
+    def __init__(self, progress: RunProgress | None = None):
+        self.progress = progress
+        self.slots = asyncio.Semaphore(settings.scheduler_check_concurrency)
+        self.yahoo_slots = asyncio.Semaphore(settings.scheduler_yahoo_concurrency)
+        # SQLite は書き込みが1本ずつなので、アプリ側でも並べてロック待ちを避ける
+        self.write_lock = asyncio.Lock()
+        self.updated = 0
+        self.ended = 0
+        self.failed = 0
 
-    fresh_enough = (
-        product.amazon_price is not None
-        and product.price_updated_at is not None
-        and product.price_updated_at
-        > now - timedelta(hours=settings.amazon_refresh_interval_hours)
+    async def check(self, target) -> None:
+        async with self.slots:
+            error = None
+            try:
+                error = await asyncio.wait_for(
+                    self._check(target),
+                    timeout=settings.scheduler_item_timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                self.failed += 1
+                error = f"{target.auction_id}: timed out"
+                await self._defer(target)
+                logger.error(f"Timed out checking auction {target.auction_id}")
+            except Exception as e:
+                self.failed += 1
+                error = f"{target.auction_id}: {e}"
+                await self._defer(target)
+                logger.error(f"Error checking auction {target.auction_id}: {e}")
+            if self.progress is not None:
+                self.progress.item_done(error)
+
+    async def _check(self, target) -> str | None:
+        """1件をチェックして反映する。取得できなかった場合は失敗に数えてその旨を返す"""
+        async with self.yahoo_slots:
+            detail = await get_auction_detail(target.auction_id)
+        if not detail:
+            logger.warning(f"Could not fetch detail for {target.auction_id}")
+            self.failed += 1
+            await self._defer(target)
+            return f"{target.auction_id}: detail unavailable"
+
+        now = datetime.now()
+        async with self.write_lock, async_session() as db:
+            item = await _load_item(db, target)
+            if item is None:
+                return
+            link, auction, product, state = item
+            if _apply_detail(db, auction, detail, now):
+                self.ended += 1
+            # スナップショット記録 → 価格差チャンス検出
+            profit_rate = await process_price_intelligence(
+                db, link, auction, product, state, now
+            )
+            if auction.status == "active":
+                auction.next_check_at = next_check_at(
+                    auction.end_time, auction.price_changed_at, profit_rate, now
+                )
+            await db.commit()
+            self.updated += 1
+
+    async def _defer(self, target) -> None:
+        """取得に失敗した件は最短間隔だけ後ろに回す（毎 tick 同じ件を叩き続けない）"""
+        try:
+            async with self.write_lock, async_session() as db:
+                await db.execute(
+                    update(Auction)
+                    .where(Auction.id == target.auction_pk)
+                    .values(
+                        next_check_at=datetime.now()
+                        + timedelta(minutes=settings.polling_min_interval_minutes)
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Could not defer auction {target.auction_id}: {e}")
+
+
+def _final_window_bounds(now: datetime) -> tuple[datetime, datetime]:
+    """終了間際レーンが受け持つ end_time の範囲 (下限, 上限)"""
+    return (
+        now - timedelta(minutes=settings.final_lane_max_overrun_minutes),
+        now + timedelta(minutes=settings.final_lane_window_minutes),
     )
-    if fresh_enough:
-        return
 
-    try:
-        amzn = await get_amazon_product(product.asin)
-        if amzn and amzn.price is not None:
-            product.amazon_price = amzn.price
-            product.price_updated_at = now
-            if amzn.category and not product.category:
-                product.category = amzn.category
-            logger.info(f"Amazon price refreshed: {product.asin} = {amzn.price}")
-    except Exception as e:
-        logger.warning(f"Amazon refresh failed for {product.asin}: {e}")
-
-
-async def _get_previous_profit_rate(db, link_id: int) -> float | None:
-    """直近のスナップショットの利益率を取得（チャンスのエッジ検出用）"""
-    result = await db.execute(
-        select(PriceSnapshot.profit_rate)
-        .where(PriceSnapshot.link_id == link_id)
-        .order_by(desc(PriceSnapshot.captured_at))
-        .limit(1)
+
+def _outside_final_window(now: datetime):
+    lower, upper = _final_window_bounds(now)
+    return or_(
+        Auction.end_time.is_(None),
+        Auction.end_time > upper,
+        Auction.end_time < lower,
     )
-    return result.scalar_one_or_none()
 
 
-async def _process_price_intelligence(db, link, auction, product, now) -> None:
-    """価格差インテリジェンス処理
+async def track_closing_auctions():
+    """終了間際レーン: 終了が近い監視オークションの価格を短い間隔で追う
 
-    1. Amazon価格をリフレッシュ
-    2. 想定利益・利益率を計算
-    3. スナップショットを記録（グラフ用）
-    4. 利益率が閾値を新たに超えたら「仕入れチャンス」通知を発火（エッジ検出）
+    通常の巡回（詳細ページ全体 + Amazon価格）とは別に、価格だけの軽いプローブで
+    最後の数分の入札を追い、終了を確認した時点の価格で確定させる。
+    同時取得数は final_lane_concurrency の別枠なので通常の巡回の枠を食わない。
     """
-    await _maybe_refresh_amazon_price(product, now)
-
-    yahoo_price = auction.current_price
-    amazon_price = product.amazon_price
-
-    profit = None
-    profit_rate = None
-    if amazon_price and yahoo_price:
-        calc = calculate_pricing(
-            selling_price=amazon_price,
-            expected_winning_price=yahoo_price,
-            category=product.category,
-            shipping_cost=settings.chance_default_shipping,
-        )
-        profit = calc.profit
-        profit_rate = calc.profit_rate
-
-    # エッジ検出のため「直近の利益率」を先に取得（新スナップショット追加前）
-    prev_rate = await _get_previous_profit_rate(db, link.id)
-
-    db.add(
-        PriceSnapshot(
-            link_id=link.id,
-            yahoo_price=yahoo_price,
-            amazon_price=amazon_price,
-            profit_rate=profit_rate,
-        )
-    )
-
-    # 仕入れチャンス判定: 今回は閾値超え かつ 前回は閾値未満（新規発生時のみ通知）
-    if profit_rate is None or profit is None:
+    if not settings.final_lane_enabled:
         return
+    now = datetime.now()
+    lower, upper = _final_window_bounds(now)
 
-    meets_now = (
-        profit_rate >= settings.chance_min_profit_rate
-        and profit >= settings.chance_min_profit_amount
-    )
-    met_before = prev_rate is not None and prev_rate >= settings.chance_min_profit_rate
-
-    if meets_now and not met_before:
-        db.add(
-            Notification(
-                type="price_gap",
-                title=f"仕入れチャンス: {product.title[:30]}",
-                message=(
-                    f"{product.title}\n"
-                    f"ヤフオク {yahoo_price:,}円 → Amazon {amazon_price:,}円\n"
-                    f"想定利益 {profit:,}円（利益率 {profit_rate}%）"
-                ),
-                link_url=f"/monitors/{link.id}",
+    async with async_session() as db:
+        targets = (
+            await db.execute(
+                _targets_query().where(
+                    Auction.end_time.is_not(None),
+                    Auction.end_time >= lower,
+                    Auction.end_time <= upper,
+                )
             )
+        ).all()
+    if not targets:
+        return
+
+    lane = _FinalLane()
+    await asyncio.gather(*(lane.track(target) for target in targets))
+    if lane.ended:
+        logger.info(f"Final lane: {lane.ended} auctions closed")
+
+
+class _FinalLane:
+    """終了間際レーン1回分（別枠の同時数とDB書き込みの直列化）"""
+
+    def __init__(self):
+        self.slots = asyncio.Semaphore(settings.final_lane_concurrency)
+        self.write_lock = asyncio.Lock()
+        self.ended = 0
+
+    async def track(self, target) -> None:
+        async with self.slots:
+            try:
+                probe = await asyncio.wait_for(
+                    get_auction_price(target.auction_id),
+                    timeout=settings.final_lane_timeout_seconds,
+                )
+            except Exception as e:
+                logger.warning(f"Final lane probe failed for {target.auction_id}: {e!r}")
+                return
+        if probe is None:
+            return
+
+        now = datetime.now()
+        try:
+            async with self.write_lock, async_session() as db:
+                item = await _load_item(db, target)
+                if item is None:
+                    return
+                link, auction, product, state = item
+                changed = _apply_price(db, auction, probe, now)
+                if probe.end_time is not None:
+                    # 終了間際の入札で自動延長されることがあるので毎回更新する
+                    auction.end_time = probe.end_time
+                auction.last_checked = now
+
+                settled = auction.end_time is not None and auction.end_time < now - timedelta(
+                    seconds=settings.final_lane_settle_seconds
+                )
+                ended = probe.ended or settled
+                if ended:
+                    _mark_ended(db, auction)
+                # スナップショットは価格が動いた時と確定時だけ（数十秒ごとに積まない）
+                if changed or ended:
+                    await process_price_intelligence(db, link, auction, product, state, now)
+                await db.commit()
+                if ended:
+                    self.ended += 1
+        except Exception as e:
+            logger.error(f"Final lane update failed for {target.auction_id}: {e}")
+
+
+def _apply_detail(db, auction: Auction, detail, now: datetime) -> bool:
+    """取得した詳細をオークションに反映し、価格変動・終了の通知を追加する
+
+    終了を検知したら True。
+    """
+    _apply_price(db, auction, detail, now)
+    if detail.end_time is not None:
+        auction.end_time = detail.end_time
+
+    auction.last_checked = now
+
+    # 終了チェック
+    if detail.end_time and detail.end_time < now:
+        _mark_ended(db, auction)
+        return True
+    return False
+
+
+def _apply_price(db, auction: Auction, detail, now: datetime) -> bool:
+    """取得した価格（AuctionDetail / AuctionPrice）を反映し、変動の通知を追加する
+
+    価格が変わったら True。
+    """
+    changed = False
+    old_price = auction.current_price
+    new_price = detail.current_price
+
+    if old_price is not None and new_price is not None and old_price != new_price:
+        auction.previous_price = old_price
+        auction.price_changed = True
+        auction.price_changed_at = now
+        changed = True
+
+        # 通知を作成
+        direction = "上昇" if new_price > old_price else "下落"
+        diff = abs(new_price - old_price)
+        notification = Notification(
+            type="price_change",
+            title=f"価格{direction}: {auction.title[:30]}",
+            message=(
+                f"{auction.title}\n"
+                f"{old_price:,}円 → {new_price:,}円 ({direction}{diff:,}円)"
+            ),
+            link_url=f"/monitor/{auction.id}",
         )
+        db.add(notification)
         logger.info(
-            f"Chance detected: link={link.id} profit={profit} rate={profit_rate}%"
+            f"Price change for {auction.auction_id}: "
+            f"{old_price} -> {new_price}"
         )
 
+    # 価格更新
+    if detail.current_price is not None:
+        auction.current_price = detail.current_price
+    if detail.buy_now_price is not None:
+        auction.buy_now_price = detail.buy_now_price
+    return changed
+
+
+def _mark_ended(db, auction: Auction) -> None:
+    """オークションを終了にして通知を追加する"""
+    auction.status = "ended"
+
+    notification = Notification(
+        type="auction_ended",
+        title=f"オークション終了: {auction.title[:30]}",
+        message=(
+            f"{auction.title}\n"
+            f"最終価格: {auction.current_price:,}円"
+            if auction.current_price
+            else f"{auction.title}\n終了"
+        ),
+        link_url=f"/monitor/{auction.id}",
+    )
+    db.add(notification)
+
+
+async def _leader_only(fn) -> None:
+    """リーダーのプロセスでだけ定期ジョブを実行する（他のプロセスでは何もしない）"""
+    if not scheduler_leader.is_leader:
+        return
+    await fn()
+
 
 def start_scheduler():
-    """スケジューラーを起動"""
+    """スケジューラーを起動
+
+    複数プロセスで起動しても、巡回を実行するのはリースを持つ1プロセスだけ
+    （leader_heartbeat ジョブでリースを取得・延長する）。
+    """
     if scheduler.running:
         logger.warning("Scheduler is already running")
         return
 
     scheduler.add_job(
-        check_monitored_auctions,
+        scheduler_leader.heartbeat,
         "interval",
-        minutes=settings.scheduler_interval_minutes,
+        seconds=settings.scheduler_lease_heartbeat_seconds,
+        id="leader_heartbeat",
+        next_run_time=datetime.now(),
+        replace_existing=True,
+    )
+
+    # 短い tick で「期限の来た件」だけを取得する（件ごとの間隔は polling.py で決まる）
+    scheduler.add_job(
+        _leader_only,
+        "interval",
+        args=[check_due_auctions],
+        seconds=settings.scheduler_tick_seconds,
         id="check_auctions",
+        # 前の tick が終わっていなければ重ねず、溜まった分は1回にまとめる
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    if settings.final_lane_enabled:
+        scheduler.add_job(
+            _leader_only,
+            "interval",
+            args=[closing_lane_tick],
+            seconds=settings.final_lane_interval_seconds,
+            id="track_closing",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+    if settings.amazon_refresh_enabled:
+        # Amazon価格はヤフオクの巡回とは別の間隔・同時数で更新する
+        scheduler.add_job(
+            _leader_only,
+            "interval",
+            args=[refresh_stale_amazon_prices],
+            minutes=settings.amazon_refresh_tick_minutes,
+            id="refresh_amazon",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+    # 古いスナップショットを時間・日単位に集約する
+    scheduler.add_job(
+        _leader_only,
+        "interval",
+        args=[compact_snapshots],
+        hours=settings.snapshot_retention_interval_hours,
+        id="compact_snapshots",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    # SQLite の WAL チェックポイント・統計の更新
+    scheduler.add_job(
+        _leader_only,
+        "interval",
+        args=[run_maintenance],
+        minutes=settings.sqlite_maintenance_interval_minutes,
+        id="sqlite_maintenance",
+        max_instances=1,
+        coalesce=True,
         replace_existing=True,
     )
     scheduler.start()
     logger.info(
-        f"Scheduler started (interval: {settings.scheduler_interval_minutes}min)"
+        f"Scheduler started (tick: {settings.scheduler_tick_seconds}s)"
     )
 
 
 def stop_scheduler():
-    """スケジューラーを停止"""
+    """スケジューラーを停止（リースの解放は release_scheduler_lease で行う）"""
     if scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("Scheduler stopped")
 
 
+async def release_scheduler_lease() -> None:
+    """リーダーのリースを手放し、他のプロセスがすぐ引き継げるようにする"""
+    await scheduler_leader.release()
+
+
 def get_scheduler_status() -> dict:
-    """スケジューラーの状態を取得"""
+    """スケジューラーの状態を取得
+
+    巡回は tick_seconds ごとに期限の来た件だけを取得し、件ごとの間隔は
+    min_interval_minutes〜max_interval_minutes の範囲で決まる（polling.py）。
+    """
     job = scheduler.get_job("check_auctions")
     return {
         "running": scheduler.running,
-        "interval_minutes": settings.scheduler_interval_minutes,
+        "tick_seconds": settings.scheduler_tick_seconds,
+        "min_interval_minutes": settings.polling_min_interval_minutes,
+        "max_interval_minutes": settings.polling_max_interval_minutes,
         "next_run": job.next_run_time.isoformat() if job and job.next_run_time else None,
+        "owner": scheduler_leader.owner,
+        "is_leader": scheduler_leader.is_leader,
     }
@@ -0,0 +1,318 @@
+"""価格スナップショットの保持期間と時間・日単位の集約
+
+スナップショットは値が変わった時だけ行が増えるが、長期の監視ではそれでも溜まり続ける。
+そこで古い行を段階的に粗くする:
+
+- 生の行: snapshot_raw_retention_days 日より古いものを時間単位の集約（min / max / close）にまとめて消す
+- 時間単位: snapshot_hourly_retention_days 日より古いものを日単位にまとめて消す
+- 日単位: 消さない（1監視あたり1日1行）
+
+監視ごとの最新の生の行は古くても残す（変化の判定・チャンスのエッジ検出が参照するため）。
+グラフ API は load_snapshot_series で表示日数に合った粒度の点列を受け取る。
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, desc, func, select
+
+from app.config import settings
+from app.database import async_session
+from app.models import PriceSnapshot, PriceSnapshotRollup
+
+logger = logging.getLogger(__name__)
+
+# 集約する値（列名の接頭辞）
+_FIELDS = ("yahoo", "amazon", "profit_rate")
+
+
+def bucket_start(dt: datetime, resolution: str) -> datetime:
+    """dt を含む時間・日の開始時刻"""
+    if resolution == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt
+
+
+@dataclass
+class SeriesPoint:
+    """グラフの1点（集約した区間なら close の値）"""
+    at: datetime
+    yahoo_price: int | None
+    amazon_price: int | None
+    profit_rate: float | None
+
+
+def series_resolution(days: int) -> str:
+    """表示日数に合った粒度（生の行が残っている範囲なら raw）"""
+    if days <= settings.snapshot_raw_retention_days:
+        return "raw"
+    if days <= settings.snapshot_hourly_retention_days:
+        return "hour"
+    return "day"
+
+
+def _raw_values(s: PriceSnapshot) -> dict:
+    return {"yahoo": s.yahoo_price, "amazon": s.amazon_price, "profit_rate": s.profit_rate}
+
+
+def _merge(rollup: PriceSnapshotRollup, values: dict, at: datetime, samples: int,
+           lows: dict | None = None, highs: dict | None = None) -> None:
+    """集約行に値を取り込む（lows/highs が無ければ values を1点として扱う）"""
+    lows = lows or values
+    highs = highs or values
+    for field in _FIELDS:
+        low, high = lows[field], highs[field]
+        if low is not None:
+            cur = getattr(rollup, f"{field}_min")
+            setattr(rollup, f"{field}_min", low if cur is None else min(cur, low))
+        if high is not None:
+            cur = getattr(rollup, f"{field}_max")
+            setattr(rollup, f"{field}_max", high if cur is None else max(cur, high))
+    if rollup.last_captured_at is None or at >= rollup.last_captured_at:
+        rollup.last_captured_at = at
+        for field in _FIELDS:
+            setattr(rollup, f"{field}_close", values[field])
+    rollup.samples = (rollup.samples or 0) + samples
+
+
+async def _get_rollup(db, cache: dict, link_id: int, resolution: str,
+                      start: datetime) -> PriceSnapshotRollup:
+    """集約行を取得（無ければ作る）。同じ実行内の行は cache で使い回す"""
+    key = (resolution, start)
+    if key in cache:
+        return cache[key]
+    rollup = (
+        await db.execute(
+            select(PriceSnapshotRollup).where(
+                PriceSnapshotRollup.link_id == link_id,
+                PriceSnapshotRollup.resolution == resolution,
+                PriceSnapshotRollup.bucket_start == start,
+            )
+        )
+    ).scalar_one_or_none()
+    if rollup is None:
+        rollup = PriceSnapshotRollup(
+            link_id=link_id, resolution=resolution, bucket_start=start, samples=0
+        )
+        db.add(rollup)
+    cache[key] = rollup
+    return rollup
+
+
+async def _rollup_raw(db, link_id: int, cutoff: datetime) -> int:
+    """cutoff より前の生の行を時間単位に集約して消す（最新の1行は残す）"""
+    latest_id = (
+        await db.execute(
+            select(func.max(PriceSnapshot.id)).where(PriceSnapshot.link_id == link_id)
+        )
+    ).scalar_one_or_none()
+    rows = (
+        await db.execute(
+            select(PriceSnapshot)
+            .where(
+                PriceSnapshot.link_id == link_id,
+                PriceSnapshot.captured_at < cutoff,
+                PriceSnapshot.id != latest_id,
+            )
+            .order_by(PriceSnapshot.captured_at, PriceSnapshot.id)
+        )
+    ).scalars().all()
+    cache: dict = {}
+    for s in rows:
+        rollup = await _get_rollup(db, cache, link_id, "hour", bucket_start(s.captured_at, "hour"))
+        _merge(rollup, _raw_values(s), s.captured_at, 1)
+    if rows:
+        await db.execute(
+            delete(PriceSnapshot).where(PriceSnapshot.id.in_([s.id for s in rows]))
+        )
+    return len(rows)
+
+
+async def _rollup_hourly(db, link_id: int, cutoff: datetime) -> int:
+    """cutoff より前の時間単位の集約を日単位にまとめて消す"""
+    rows = (
+        await db.execute(
+            select(PriceSnapshotRollup)
+            .where(
+                PriceSnapshotRollup.link_id == link_id,
+                PriceSnapshotRollup.resolution == "hour",
+                PriceSnapshotRollup.bucket_start < cutoff,
+            )
+            .order_by(PriceSnapshotRollup.bucket_start)
+        )
+    ).scalars().all()
+    cache: dict = {}
+    for r in rows:
+        daily = await _get_rollup(db, cache, link_id, "day", bucket_start(r.bucket_start, "day"))
+        _merge(
+            daily,
+            {f: getattr(r, f"{f}_close") for f in _FIELDS},
+            r.last_captured_at,
+            r.samples,
+            lows={f: getattr(r, f"{f}_min") for f in _FIELDS},
+            highs={f: getattr(r, f"{f}_max") for f in _FIELDS},
+        )
+    for r in rows:
+        await db.delete(r)
+    return len(rows)
+
+
+async def compact_snapshots(now: datetime | None = None) -> dict:
+    """保持期間を過ぎたスナップショットを集約する（スケジューラーの定期ジョブ）
+
+    監視ごとに短いトランザクションで処理する。集約した件数を返す。
+    """
+    now = now or datetime.now()
+    # 区切りは時間・日の境目に揃える（途中までの区間を作らない）
+    raw_cutoff = bucket_start(
+        now - timedelta(days=settings.snapshot_raw_retention_days), "hour"
+    )
+    hourly_cutoff = bucket_start(
+        now - timedelta(days=settings.snapshot_hourly_retention_days), "day"
+    )
+
+    async with async_session() as db:
+        raw_links = (
+            await db.execute(
+                select(PriceSnapshot.link_id)
+                .where(PriceSnapshot.captured_at < raw_cutoff)
+                .distinct()
+            )
+        ).scalars().all()
+    stats = {"raw": 0, "hourly": 0}
+    for link_id in raw_links:
+        async with async_session() as db:
+            stats["raw"] += await _rollup_raw(db, link_id, raw_cutoff)
+            await db.commit()
+
+    async with async_session() as db:
+        hourly_links = (
+            await db.execute(
+                select(PriceSnapshotRollup.link_id)
+                .where(
+                    PriceSnapshotRollup.resolution == "hour",
+                    PriceSnapshotRollup.bucket_start < hourly_cutoff,
+                )
+                .distinct()
+            )
+        ).scalars().all()
+    for link_id in hourly_links:
+        async with async_session() as db:
+            stats["hourly"] += await _rollup_hourly(db, link_id, hourly_cutoff)
+            await db.commit()
+
+    if stats["raw"] or stats["hourly"]:
+        logger.info(
+            f"Snapshot compaction: {stats['raw']} raw rows -> hourly, "
+            f"{stats['hourly']} hourly rows -> daily"
+        )
+    return stats
+
+
+async def _latest_raw(db, link_id: int, before: datetime | None = None) -> PriceSnapshot | None:
+    """監視の最新の生の行（before があればそれより前で最新の行）"""
+    query = select(PriceSnapshot).where(PriceSnapshot.link_id == link_id)
+    if before is not None:
+        query = query.where(PriceSnapshot.captured_at < before)
+    return (
+        await db.execute(
+            query.order_by(desc(PriceSnapshot.captured_at), desc(PriceSnapshot.id)).limit(1)
+        )
+    ).scalar_one_or_none()
+
+
+async def _carried_in(db, link_id: int, since: datetime,
+                      latest: PriceSnapshot | None) -> SeriesPoint | None:
+    """表示期間の始まり（since）時点の値
+
+    値が変わった時だけ行が増えるので、期間より前の最後の値（生の行・集約）が
+    期間の始まりでも続いている。その値を since の位置の点にする。
+    """
+    raw = latest if latest is not None and latest.captured_at < since else (
+        await _latest_raw(db, link_id, before=since)
+    )
+    rollup = (
+        await db.execute(
+            select(PriceSnapshotRollup)
+            .where(
+                PriceSnapshotRollup.link_id == link_id,
+                PriceSnapshotRollup.last_captured_at < since,
+            )
+            .order_by(desc(PriceSnapshotRollup.last_captured_at))
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    if rollup is not None and (raw is None or rollup.last_captured_at > raw.captured_at):
+        return SeriesPoint(since, rollup.yahoo_close, rollup.amazon_close, rollup.profit_rate_close)
+    if raw is not None:
+        return SeriesPoint(since, raw.yahoo_price, raw.amazon_price, raw.profit_rate)
+    return None
+
+
+async def load_snapshot_series(db, link_id: int, days: int,
+                               now: datetime | None = None) -> list[SeriesPoint]:
+    """表示日数ぶんの価格推移（古い順）
+
+    生の行・時間単位・日単位の集約を合わせ、表示日数に合った粒度の区間ごとに
+    最後の値（close）を1点にする。期間より前から続いている値は期間の始まりの点にし、
+    最新の値は last_seen_at まで延ばす（価格が変わらない監視でもグラフが空にならない）。
+    """
+    now = now or datetime.now()
+    since = now - timedelta(days=days)
+    resolution = series_resolution(days)
+
+    raw = (
+        await db.execute(
+            select(PriceSnapshot)
+            .where(PriceSnapshot.link_id == link_id, PriceSnapshot.captured_at >= since)
+            .order_by(PriceSnapshot.captured_at, PriceSnapshot.id)
+        )
+    ).scalars().all()
+    rollups = (
+        await db.execute(
+            select(PriceSnapshotRollup)
+            .where(
+                PriceSnapshotRollup.link_id == link_id,
+                PriceSnapshotRollup.bucket_start >= bucket_start(since, "day"),
+            )
+            .order_by(PriceSnapshotRollup.last_captured_at)
+        )
+    ).scalars().all()
+    # 監視ごとの最新の生の行は集約しても残るので、これが現在の値
+    latest = raw[-1] if raw else await _latest_raw(db, link_id)
+
+    points = [
+        SeriesPoint(r.bucket_start, r.yahoo_close, r.amazon_close, r.profit_rate_close)
+        for r in rollups
+        if r.last_captured_at >= since
+    ]
+    points += [
+        SeriesPoint(s.captured_at, s.yahoo_price, s.amazon_price, s.profit_rate)
+        for s in raw
+    ]
+    points.sort(key=lambda p: p.at)
+
+    start = await _carried_in(db, link_id, since, latest)
+    if start is not None:
+        points.insert(0, start)
+    if latest is not None and latest.last_seen_at and (
+        not points or latest.last_seen_at > points[-1].at
+    ):
+        points.append(
+            SeriesPoint(
+                min(latest.last_seen_at, now),
+                latest.yahoo_price, latest.amazon_price, latest.profit_rate,
+            )
+        )
+
+    if resolution == "raw":
+        return points
+
+    # 区間ごとに最後の値だけを残す（点は時刻順なので後勝ち）
+    buckets: dict[datetime, SeriesPoint] = {}
+    for p in points:
+        start = bucket_start(p.at, resolution)
+        buckets[start] = SeriesPoint(start, p.yahoo_price, p.amazon_price, p.profit_rate)
+    return list(buckets.values())
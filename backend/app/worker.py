@@ -0,0 +1,164 @@
+"""ジョブキューのワーカープロセス
+
+    python -m app.worker [--concurrency N] [--kinds check_auction,amazon_refresh]
+
+DBのジョブキューからリースしたジョブを実行する。APIプロセスとは別のイベントループ・
+別プロセスで動くので、スクレイピングがAPIの応答を遅らせない。
+ワーカーは何個（別マシンでも）起動してよい。リースで同じジョブの二重実行は起きない。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+
+from app.config import settings
+from app.database import async_session, engine
+from app.migrations import run_migrations
+from app.models import Base, Job
+from app.services import job_handlers  # noqa: F401  ハンドラーの登録
+from app.services.jobqueue import complete, fail, get_handler, lease, reap, renew
+from app.services.leader import process_owner
+
+logger = logging.getLogger(__name__)
+
+# 後始末（リース切れの回収・古いジョブの削除）の間隔
+_REAP_INTERVAL_SECONDS = 60
+
+
+class Worker:
+    """ジョブをリースして同時に最大 concurrency 件まで実行する"""
+
+    def __init__(
+        self,
+        owner: str | None = None,
+        concurrency: int | None = None,
+        kinds: list[str] | None = None,
+    ):
+        self.owner = owner or process_owner()
+        self.concurrency = max(1, concurrency or settings.worker_concurrency)
+        self.kinds = kinds
+        self._running: dict[int, asyncio.Task] = {}
+        self.done = 0
+        self.failed = 0
+
+    async def poll(self) -> int:
+        """空きスロット分のジョブをリースして実行を開始する。開始した件数を返す"""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        async with async_session() as db:
+            jobs = await lease(db, self.owner, limit=free, kinds=self.kinds)
+        for job in jobs:
+            task = asyncio.create_task(self._execute(job))
+            self._running[job.id] = task
+            task.add_done_callback(lambda _t, job_id=job.id: self._running.pop(job_id, None))
+        return len(jobs)
+
+    async def _execute(self, job: Job) -> None:
+        fn = get_handler(job.kind)
+        try:
+            if fn is None:
+                raise RuntimeError(f"No handler for job kind: {job.kind}")
+            result = await fn(json.loads(job.payload or "{}"))
+        except Exception as e:
+            self.failed += 1
+            async with async_session() as db:
+                await fail(db, job.id, self.owner, f"{type(e).__name__}: {e}")
+            return
+        self.done += 1
+        async with async_session() as db:
+            await complete(db, job.id, self.owner, result)
+
+    async def heartbeat(self) -> None:
+        """実行中ジョブのリースを延長する"""
+        if self._running:
+            async with async_session() as db:
+                await renew(db, list(self._running), self.owner)
+
+    async def drain(self) -> None:
+        """実行中のジョブが全て終わるまで待つ"""
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """stop がセットされるまでキューを処理し続ける"""
+        loop = asyncio.get_running_loop()
+        renew_every = max(settings.job_visibility_timeout_seconds / 3, 1)
+        last_renew = last_reap = loop.time()
+        logger.info(f"Worker {self.owner} started (concurrency={self.concurrency})")
+
+        while not stop.is_set():
+            try:
+                started = await self.poll()
+                now = loop.time()
+                if now - last_renew >= renew_every:
+                    await self.heartbeat()
+                    last_renew = now
+                if now - last_reap >= _REAP_INTERVAL_SECONDS:
+                    async with async_session() as db:
+                        await reap(db)
+                    last_reap = now
+            except Exception as e:
+                # DBロック等の一時的な失敗でワーカーごと落ちないようにする
+                logger.error(f"Worker loop error: {e}")
+                started = 0
+            if started == 0:
+                try:
+                    await asyncio.wait_for(
+                        stop.wait(), timeout=settings.worker_poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+        logger.info(f"Worker {self.owner} stopping, waiting for {len(self._running)} jobs...")
+        await self.drain()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C は KeyboardInterrupt で止まる
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] if args.kinds else None
+    worker = Worker(concurrency=args.concurrency, kinds=kinds)
+    try:
+        await worker.run(stop)
+    finally:
+        from app.scrapers.base import close_shared_browser
+        from app.scrapers.http_fetch import close_http_client
+        from app.scrapers.persistent_cache import scrape_cache
+        from app.services.keepa import close_keepa_client
+        await close_shared_browser()
+        await close_http_client()
+        await close_keepa_client()
+        scrape_cache.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sedori job queue worker")
+    parser.add_argument("--concurrency", type=int, default=None, help="同時実行ジョブ数")
+    parser.add_argument("--kinds", default="", help="処理するジョブ種別（カンマ区切り、既定は全て）")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
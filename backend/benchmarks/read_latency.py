@@ -0,0 +1,197 @@
+"""API読み取りのレイテンシ計測（スケジューラーの書き込み中）
+
+一時ファイルの SQLite に監視を登録し、別プロセス（ワーカー・リーダーのスケジューラー相当）が
+スケジューラーと同じ1件ごとの短いトランザクション（オークション更新 + スナップショット +
+最新状態）を書き続ける間に、GET /api/monitor/list と /api/monitor/chances を並行して叩いて
+レイテンシを比べる。
+
+    cd backend
+    python -m benchmarks.read_latency --monitors 500 --requests 300
+
+プロファイル（legacy = SQLite 既定・エンジン共有 / wal = WAL + 読み書き分離）ごとに
+p50 / p95 / p99 / 最大（ミリ秒）と、計測中の書き込み件数/秒を出力する。
+書き込みは --write-rate 件/秒に揃える（--write-rate 0 で全速 = 書き込みの詰まり具合も比べる）。
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import create_engines, get_db, get_read_db
+from app.main import app
+from app.models import Auction, Base, LinkState, Product, ProductAuctionLink
+from app.services.price_intelligence import process_price_intelligence
+
+ENDPOINTS = ("/api/monitor/list?status=active", "/api/monitor/chances")
+
+
+async def _seed(session_factory, monitors: int) -> list[int]:
+    async with session_factory() as db:
+        link_ids = []
+        for i in range(monitors):
+            product = Product(asin=f"B{i:09d}", title=f"商品{i}", amazon_price=20000)
+            auction = Auction(
+                auction_id=f"bench{i}", title=f"出品{i}",
+                current_price=random.randint(3000, 19000), status="active",
+            )
+            db.add_all([product, auction])
+            await db.flush()
+            link = ProductAuctionLink(product_id=product.id, auction_id=auction.id)
+            db.add(link)
+            await db.flush()
+            await process_price_intelligence(db, link, auction, product, None, datetime.now())
+            link_ids.append(link.id)
+        await db.commit()
+    return link_ids
+
+
+async def _write_loop(
+    url: str, profile: str, link_ids: list[int], write_rate: float, stop, written
+) -> None:
+    """スケジューラーの巡回と同じ形の書き込み（1件ごとにコミット）を止めるまで続ける
+
+    write_rate（件/秒）を上限にする（0 なら全速）。プロファイル間で同じ書き込み負荷をかけるため。
+    """
+    interval = 1 / write_rate if write_rate > 0 else 0.0
+    next_at = time.perf_counter()
+    writer, _ = create_engines(url, profile)
+    session_factory = async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+    while not stop.is_set():
+        for link_id in link_ids:
+            if stop.is_set():
+                break
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with session_factory() as db:
+                link, auction, product, state = (
+                    await db.execute(
+                        select(ProductAuctionLink, Auction, Product, LinkState)
+                        .join(Auction, ProductAuctionLink.auction_id == Auction.id)
+                        .join(Product, ProductAuctionLink.product_id == Product.id)
+                        .outerjoin(LinkState, LinkState.link_id == ProductAuctionLink.id)
+                        .where(ProductAuctionLink.id == link_id)
+                    )
+                ).one()
+                auction.current_price = random.randint(3000, 19000)
+                now = datetime.now()
+                auction.last_checked = now
+                await process_price_intelligence(db, link, auction, product, state, now)
+                await db.commit()
+            with written.get_lock():
+                written.value += 1
+    await writer.dispose()
+
+
+def _writer_process(url, profile, link_ids, write_rate, stop, written) -> None:
+    asyncio.run(_write_loop(url, profile, link_ids, write_rate, stop, written))
+
+
+async def _read_loop(requests: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    slots = asyncio.Semaphore(concurrency)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i: int) -> None:
+            async with slots:
+                start = time.perf_counter()
+                resp = await client.get(ENDPOINTS[i % len(ENDPOINTS)])
+                resp.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+async def run_profile(
+    profile: str, monitors: int, requests: int, concurrency: int, write_rate: float
+) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        writer, reader = create_engines(url, profile)
+        write_session = async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+        read_session = async_sessionmaker(reader, class_=AsyncSession, expire_on_commit=False)
+        async with writer.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        link_ids = await _seed(write_session, monitors)
+
+        async def _write_db():
+            async with write_session() as session:
+                yield session
+
+        async def _read_db():
+            async with read_session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = _write_db
+        app.dependency_overrides[get_read_db] = _read_db
+        ctx = multiprocessing.get_context("spawn")
+        stop = ctx.Event()
+        written = ctx.Value("i", 0)
+        proc = ctx.Process(
+            target=_writer_process,
+            args=(url, profile, link_ids, write_rate, stop, written),
+        )
+        proc.start()
+        try:
+            # 書き込み側が走り出すまで待つ
+            while written.value == 0 and proc.is_alive():
+                await asyncio.sleep(0.05)
+            before = written.value
+            started = time.perf_counter()
+            latencies = await _read_loop(requests, concurrency)
+            elapsed = time.perf_counter() - started
+            writes = written.value - before
+        finally:
+            stop.set()
+            proc.join()
+            app.dependency_overrides.clear()
+            await writer.dispose()
+            await reader.dispose()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "max": latencies[-1],
+        "writes_per_sec": writes / elapsed,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    print(
+        f"monitors={args.monitors} requests={args.requests} "
+        f"concurrency={args.concurrency} write_rate={args.write_rate}/s"
+    )
+    print(f"{'profile':<8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'writes/s':>9}")
+    for profile in args.profiles:
+        r = await run_profile(
+            profile, args.monitors, args.requests, args.concurrency, args.write_rate
+        )
+        print(
+            f"{r['profile']:<8} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+            f"{r['max']:>8.1f} {r['writes_per_sec']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--monitors", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--write-rate", type=float, default=20.0, help="書き込み件数/秒（0 = 全速）")
+    parser.add_argument("--profiles", nargs="+", default=["legacy", "wal"])
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
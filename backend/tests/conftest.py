@@ -40,10 +40,11 @@ async def _override_get_db():
 
 @pytest.fixture(autouse=True, scope="session")
 def _apply_db_override():
-    """セッション開始時にappのget_db依存関係をテスト用DBにオーバーライド"""
+    """セッション開始時にappのget_db / get_read_db依存関係をテスト用DBにオーバーライド"""
     from app.main import app
-    from app.database import get_db
+    from app.database import get_db, get_read_db
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_read_db] = _override_get_db
     yield
     app.dependency_overrides.clear()
 
@@ -56,3 +57,42 @@ async def _setup_test_db():
     yield
     async with _test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limiter():
+    """プロセス共有のレートリミッター状態をテスト間で持ち越さない"""
+    from app.scrapers import amazon_product
+    from app.scrapers.ratelimit import probe_limiter, rate_limiter
+    rate_limiter.reset()
+    probe_limiter.reset()
+    amazon_product._http_probe_blocks = 0
+    amazon_product._http_probe_disabled_until = 0.0
+    yield
+    rate_limiter.reset()
+    probe_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def _browser_only_scraping(monkeypatch):
+    """既存のスクレイパーテストはブラウザ経路をモックするので、HTTP優先取得は既定で切る"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "scrape_http_first", False)
+
+
+@pytest.fixture(autouse=True)
+def _no_persistent_scrape_cache(monkeypatch):
+    """永続キャッシュはテストでは無効（ファイルを作らず、テスト間で結果を持ち越さない）"""
+    from app.scrapers.persistent_cache import scrape_cache
+    monkeypatch.setattr(scrape_cache, "path", "")
+
+
+@pytest.fixture(autouse=True)
+def _clear_search_cache():
+    """検索結果キャッシュをテスト間で持ち越さない"""
+    from app.scrapers.yahoo_search import _search_cache
+    _search_cache.clear()
+    yield
+    # 裏で走る再取得がモックの外で本物のブラウザを起動しないよう止める
+    _search_cache.cancel_refreshes()
+    _search_cache.clear()
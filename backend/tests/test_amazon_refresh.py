@@ -0,0 +1,210 @@
+"""Amazon価格リフレッシュ（別パイプライン）のテスト"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.models import Auction, LinkState, Notification, Product, ProductAuctionLink
+from app.scrapers.amazon_product import AmazonProduct
+from app.services.amazon_refresh import (
+    refresh_amazon_price,
+    refresh_backoff,
+    refresh_priority,
+    refresh_stale_amazon_prices,
+    select_refresh_candidates,
+)
+from tests.conftest import _test_session_factory
+
+
+async def _seed(asin, price_updated_at=None, amazon_price=None, auctions=1, profit_rate=None):
+    """商品1件と、それに紐づく監視オークションを auctions 件登録する"""
+    async with _test_session_factory() as db:
+        product = Product(
+            asin=asin, title=asin, amazon_price=amazon_price,
+            price_updated_at=price_updated_at,
+        )
+        db.add(product)
+        await db.flush()
+        for i in range(auctions):
+            auction = Auction(auction_id=f"{asin}-{i}", title="t", status="active")
+            db.add(auction)
+            await db.flush()
+            link = ProductAuctionLink(product_id=product.id, auction_id=auction.id)
+            db.add(link)
+            await db.flush()
+            if profit_rate is not None:
+                db.add(LinkState(link_id=link.id, yahoo_price=1000, profit_rate=profit_rate))
+        await db.commit()
+
+
+class TestRefreshPriority:
+    NOW = datetime(2026, 3, 1, 12, 0)
+
+    def test_older_prices_first(self):
+        old = refresh_priority(self.NOW - timedelta(days=2), None, self.NOW)
+        recent = refresh_priority(self.NOW - timedelta(hours=13), None, self.NOW)
+        assert old > recent
+        assert refresh_priority(None, None, self.NOW) >= old
+
+    def test_near_threshold_and_chances_first(self):
+        updated = self.NOW - timedelta(days=1)
+        threshold = settings.chance_min_profit_rate
+        far = refresh_priority(updated, threshold - 40, self.NOW)
+        near = refresh_priority(updated, threshold - 1, self.NOW)
+        chance = refresh_priority(updated, threshold + 1, self.NOW)
+        assert far < near < chance
+
+
+def test_refresh_backoff_doubles_up_to_cap(monkeypatch):
+    monkeypatch.setattr(settings, "amazon_refresh_failure_backoff_minutes", 60)
+    monkeypatch.setattr(settings, "amazon_refresh_failure_max_backoff_hours", 6)
+    assert refresh_backoff(1) == timedelta(hours=1)
+    assert refresh_backoff(2) == timedelta(hours=2)
+    assert refresh_backoff(10) == timedelta(hours=6)
+
+
+class TestRefreshCandidates:
+
+    @pytest.mark.asyncio
+    async def test_dedupes_products_and_skips_fresh(self):
+        now = datetime.now()
+        await _seed("B000SHARED", auctions=3)
+        await _seed("B000FRESH1", price_updated_at=now, amazon_price=5000)
+
+        async with _test_session_factory() as db:
+            candidates = await select_refresh_candidates(db, now)
+
+        assert [c.asin for c in candidates] == ["B000SHARED"]
+
+    @pytest.mark.asyncio
+    async def test_orders_by_priority(self):
+        now = datetime.now()
+        stale = now - timedelta(days=1)
+        await _seed("B000FAR001", price_updated_at=stale, amazon_price=5000, profit_rate=-30)
+        await _seed("B000CHANCE", price_updated_at=stale, amazon_price=5000, profit_rate=20)
+        await _seed("B000NEVER1")
+
+        async with _test_session_factory() as db:
+            candidates = await select_refresh_candidates(db, now)
+
+        assert [c.asin for c in candidates] == ["B000CHANCE", "B000NEVER1", "B000FAR001"]
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limits_candidates(self, monkeypatch):
+        monkeypatch.setattr(settings, "amazon_refresh_batch_size", 2)
+        for i in range(3):
+            await _seed(f"B00000000{i}")
+        async with _test_session_factory() as db:
+            assert len(await select_refresh_candidates(db, datetime.now())) == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_updates_prices_and_tolerates_failures():
+    await _seed("B000000OK1")
+    await _seed("B000000NG1")
+
+    async def fake_get(asin, fresh=False):
+        if asin == "B000000NG1":
+            return None
+        return AmazonProduct(asin=asin, title="t", price=12345, category="家電")
+
+    with patch("app.services.amazon_refresh.async_session", _test_session_factory), \
+            patch("app.services.amazon_refresh.get_amazon_product", AsyncMock(side_effect=fake_get)):
+        assert await refresh_stale_amazon_prices() == 1
+
+    async with _test_session_factory() as db:
+        products = {p.asin: p for p in (await db.execute(select(Product))).scalars()}
+    assert products["B000000OK1"].amazon_price == 12345
+    assert products["B000000OK1"].category == "家電"
+    assert products["B000000NG1"].amazon_price is None
+
+
+@pytest.mark.asyncio
+async def test_keepa_refresh_falls_back_to_browser_for_missing(monkeypatch):
+    monkeypatch.setattr(settings, "keepa_api_key", "test-key")
+    await _seed("B000KEEPA1")
+    await _seed("B000KEEPA2")
+    await _seed("B000NOKEEP")
+
+    fetch = AsyncMock(return_value={"B000KEEPA1": 1980, "B000KEEPA2": 2980})
+    browser = AsyncMock(
+        return_value=AmazonProduct(asin="B000NOKEEP", title="t", price=3980)
+    )
+    with patch("app.services.amazon_refresh.async_session", _test_session_factory), \
+            patch("app.services.keepa.fetch_current_prices", fetch), \
+            patch("app.services.amazon_refresh.get_amazon_product", browser):
+        assert await refresh_stale_amazon_prices() == 3
+
+    # Keepaには全件を1回でまとめて問い合わせ、ブラウザは取れなかった1件だけ
+    fetch.assert_awaited_once()
+    assert sorted(fetch.call_args.args[0]) == ["B000KEEPA1", "B000KEEPA2", "B000NOKEEP"]
+    browser.assert_awaited_once_with("B000NOKEEP", fresh=True)
+
+    async with _test_session_factory() as db:
+        products = {p.asin: p for p in (await db.execute(select(Product))).scalars()}
+    assert products["B000KEEPA1"].amazon_price == 1980
+    assert products["B000KEEPA1"].price_updated_at is not None
+    assert products["B000NOKEEP"].amazon_price == 3980
+
+
+@pytest.mark.asyncio
+async def test_refresh_reprices_monitors_of_product():
+    """Amazon価格が変わった商品の監視は、その場で利益・チャンスが計算し直される"""
+    await _seed("B000CHANCE")
+    async with _test_session_factory() as db:
+        auction = (await db.execute(select(Auction))).scalar_one()
+        auction.current_price = 3000
+        await db.commit()
+
+    browser = AsyncMock(return_value=AmazonProduct(asin="B000CHANCE", title="t", price=20000))
+    with patch("app.services.amazon_refresh.async_session", _test_session_factory), \
+            patch("app.services.amazon_refresh.get_amazon_product", browser):
+        assert await refresh_stale_amazon_prices() == 1
+
+    async with _test_session_factory() as db:
+        state = (await db.execute(select(LinkState))).scalar_one()
+        notifications = (await db.execute(select(Notification))).scalars().all()
+    assert state.amazon_price == 20000
+    assert state.profit > 0
+    assert state.is_chance is True
+    assert [n.type for n in notifications] == ["price_gap"]
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_backs_off_until_success(monkeypatch):
+    """取れなかった商品は待ちが明けるまで候補から外れ、他の商品の枠を食わない"""
+    monkeypatch.setattr(settings, "amazon_refresh_batch_size", 1)
+    await _seed("B000000NG1")
+    await _seed("B000000OK1", price_updated_at=datetime.now() - timedelta(days=1), amazon_price=1000)
+
+    browser = AsyncMock(return_value=None)
+    with patch("app.services.amazon_refresh.async_session", _test_session_factory), \
+            patch("app.services.amazon_refresh.get_amazon_product", browser):
+        # 未取得の商品が先に選ばれて失敗する
+        assert await refresh_stale_amazon_prices() == 0
+        browser.return_value = AmazonProduct(asin="B000000OK1", title="t", price=1500)
+        # 次の tick では失敗した商品を飛ばして残りを更新する
+        assert await refresh_stale_amazon_prices() == 1
+    assert [c.args[0] for c in browser.await_args_list] == ["B000000NG1", "B000000OK1"]
+
+    async with _test_session_factory() as db:
+        products = {p.asin: p for p in (await db.execute(select(Product))).scalars()}
+        ng = products["B000000NG1"]
+        assert ng.price_refresh_failures == 1
+        assert ng.price_refresh_retry_at > datetime.now()
+        assert ng.price_updated_at is None
+
+        # 待ちが明ければ再び候補になり、成功すれば失敗の記録を消す
+        later = ng.price_refresh_retry_at + timedelta(seconds=1)
+        assert [c.asin for c in await select_refresh_candidates(db, later)] == ["B000000NG1"]
+
+    ok = AsyncMock(return_value=AmazonProduct(asin="B000000NG1", title="t", price=2000))
+    with patch("app.services.amazon_refresh.async_session", _test_session_factory), \
+            patch("app.services.amazon_refresh.get_amazon_product", ok):
+        assert await refresh_amazon_price("B000000NG1") == 2000
+    async with _test_session_factory() as db:
+        ng = (await db.execute(select(Product).where(Product.asin == "B000000NG1"))).scalar_one()
+    assert ng.price_refresh_failures == 0
+    assert ng.price_refresh_retry_at is None
@@ -3,6 +3,8 @@ import pytest
 from httpx import ASGITransport, AsyncClient
 
 from app.main import app
+from app.models import Auction, LinkState, Product, ProductAuctionLink
+from tests.conftest import _test_session_factory
 
 
 @pytest.mark.asyncio
@@ -34,6 +36,36 @@ async def test_monitor_add_and_list():
         items = resp.json()["items"]
         assert len(items) == 1
         assert items[0]["id"] == link_id
+        # Amazon価格が無ければ利益は計算できない
+        assert items[0]["profit_rate"] is None
+        assert items[0]["is_chance"] is False
+
+
+@pytest.mark.asyncio
+async def test_monitor_list_includes_latest_state():
+    """一覧にスケジューラーが記録した最新状態（利益・チャンス）が載る"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.post(
+            "/api/monitor/add",
+            json={
+                "asin": "B09TEST123",
+                "product_title": "テスト商品",
+                "auction_id": "a123456789",
+                "auction_title": "ヤフオクテスト",
+                "current_price": 5000,
+            },
+        )
+        link_id = resp.json()["id"]
+        async with _test_session_factory() as db:
+            state = await db.get(LinkState, link_id)
+            state.amazon_price, state.profit, state.is_chance = 20000, 9000, True
+            await db.commit()
+
+        resp = await client.get("/api/monitor/list?status=active")
+        item = resp.json()["items"][0]
+        assert item["amazon_price"] == 20000
+        assert item["profit"] == 9000
+        assert item["is_chance"] is True
 
 
 @pytest.mark.asyncio
@@ -141,3 +173,65 @@ async def test_monitor_list_invalid_status():
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         resp = await client.get("/api/monitor/list?status=invalid")
     assert resp.status_code == 422
+
+
+async def _seed_chance(index: int, profit_rate: float, profit: int, status="active"):
+    """チャンス一覧の索引（LinkState）付きの監視を1件登録する"""
+    async with _test_session_factory() as db:
+        product = Product(asin=f"B0CHANCE{index:02d}", title=f"商品{index}")
+        auction = Auction(auction_id=f"c{index}", title=f"出品{index}", status=status)
+        db.add_all([product, auction])
+        await db.flush()
+        link = ProductAuctionLink(product_id=product.id, auction_id=auction.id)
+        db.add(link)
+        await db.flush()
+        db.add(LinkState(
+            link_id=link.id, yahoo_price=5000, amazon_price=20000,
+            profit=profit, profit_rate=profit_rate, is_chance=True,
+        ))
+        await db.commit()
+        return link.id
+
+
+@pytest.mark.asyncio
+async def test_chances_filtered_and_sorted():
+    """閾値を満たす active の監視だけを利益率の高い順に返す"""
+    high = await _seed_chance(1, 40.0, 8000)
+    mid = await _seed_chance(2, 20.0, 4000)
+    await _seed_chance(3, 5.0, 1000)                     # 利益率が閾値未満
+    await _seed_chance(4, 30.0, 500)                     # 利益額が閾値未満
+    await _seed_chance(5, 50.0, 9000, status="ended")    # 終了済み
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/api/monitor/chances?min_profit_rate=15&min_profit_amount=1000")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [i["link_id"] for i in data["items"]] == [high, mid]
+    assert data["total"] == 2
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_chances_keyset_pagination():
+    """next_cursor で続きを取得でき、同じ利益率でも重複・欠落しない"""
+    ids = [await _seed_chance(i, 30.0 if i < 3 else 20.0, 5000) for i in range(5)]
+
+    seen = []
+    cursor = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        while True:
+            url = "/api/monitor/chances?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = (await client.get(url)).json()
+            assert data["total"] == 5
+            seen += [i["link_id"] for i in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+    assert seen == sorted(ids[:3], reverse=True) + sorted(ids[3:], reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_chances_invalid_cursor():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        resp = await client.get("/api/monitor/chances?cursor=bogus")
+    assert resp.status_code == 400
@@ -59,8 +59,10 @@ async def test_scheduler_status():
         assert resp.status_code == 200
         data = resp.json()
         assert "running" in data
-        assert "interval_minutes" in data
+        assert "tick_seconds" in data
+        assert data["min_interval_minutes"] <= data["max_interval_minutes"]
         assert isinstance(data["running"], bool)
+        assert data["leader"] is None
 
 
 @pytest.mark.asyncio
@@ -79,8 +81,12 @@ async def test_scheduler_start_stop():
     def mock_status():
         return {
             "running": mock_running["value"],
-            "interval_minutes": 10,
+            "tick_seconds": 60,
+            "min_interval_minutes": 2,
+            "max_interval_minutes": 360,
             "next_run": None,
+            "owner": "test:1",
+            "is_leader": mock_running["value"],
         }
 
     with (
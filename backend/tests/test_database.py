@@ -0,0 +1,112 @@
+"""SQLite のストレージプロファイル（WAL・読み書きのエンジン分離）のテスト"""
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as SATimeoutError
+
+from app import database
+from app.config import settings
+from app.database import create_engines, get_db, is_busy_error, run_maintenance
+from tests.conftest import _override_get_db
+
+
+@pytest.mark.asyncio
+async def test_wal_profile_splits_reader_and_writer(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer, reader = create_engines(url, "wal")
+    assert writer is not reader
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            # NORMAL = 1
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+            await conn.execute(text("CREATE TABLE t (v INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT v FROM t"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.parametrize("url, profile", [
+    ("sqlite+aiosqlite:///:memory:", "wal"),
+    ("sqlite+aiosqlite:///./unused.db", "legacy"),
+])
+def test_single_engine_without_split(url, profile):
+    writer, reader = create_engines(url, profile)
+    assert writer is reader
+
+
+@pytest.mark.asyncio
+async def test_writers_take_lock_at_begin(tmp_path, monkeypatch):
+    """書き込みは BEGIN IMMEDIATE で始まり、他の書き込み中なら BEGIN の時点で失敗する"""
+    monkeypatch.setattr(settings, "sqlite_busy_timeout_ms", 50)
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    # 別プロセスの書き込み側に見立てた2つのエンジン
+    first, first_reader = create_engines(url, "wal")
+    second, second_reader = create_engines(url, "wal")
+    try:
+        async with first.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (v INTEGER)"))
+        async with first.begin() as conn:
+            # まだ何も書いていないが、書き込みロックは取れている
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(OperationalError) as exc:
+                async with second.begin() as other:
+                    await other.execute(text("SELECT 1"))
+            assert "BEGIN IMMEDIATE" in str(exc.value)
+            assert is_busy_error(exc.value)
+    finally:
+        for engine in (first, first_reader, second, second_reader):
+            await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_writer_pool_timeout_is_busy_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_writer_pool_timeout_seconds", 0.05)
+    writer, reader = create_engines(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", "wal")
+    try:
+        async with writer.connect():
+            with pytest.raises(SATimeoutError) as exc:
+                async with writer.connect():
+                    pass
+        assert is_busy_error(exc.value)
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_runs_outside_transaction(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer, reader = create_engines(url, "wal")
+    monkeypatch.setattr(settings, "database_url", url)
+    monkeypatch.setattr(database, "engine", writer)
+    try:
+        await run_maintenance()
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_busy_database_returns_503():
+    from app.main import app
+
+    async def busy_db():
+        raise SATimeoutError("QueuePool limit of size 1 overflow 0 reached")
+        yield
+
+    app.dependency_overrides[get_db] = busy_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/notifications/read-all")
+    finally:
+        app.dependency_overrides[get_db] = _override_get_db
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
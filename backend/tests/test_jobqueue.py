@@ -0,0 +1,183 @@
+"""ジョブキュー・ワーカーのテスト"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models import Job
+from app.services.jobqueue import complete, enqueue, fail, handler, lease, reap
+from app.worker import Worker
+from tests.conftest import _test_session_factory
+
+
+async def _enqueue(kind="noop", payload=None, **kwargs) -> int:
+    async with _test_session_factory() as db:
+        job = await enqueue(db, kind, payload, **kwargs)
+        await db.commit()
+        return job.id
+
+
+async def _get(job_id) -> Job:
+    async with _test_session_factory() as db:
+        return await db.get(Job, job_id)
+
+
+class TestJobQueue:
+    """リース・完了・リトライ"""
+
+    @pytest.mark.asyncio
+    async def test_lease_is_exclusive(self):
+        job_id = await _enqueue()
+
+        async with _test_session_factory() as db:
+            first = await lease(db, "w1", limit=5)
+        async with _test_session_factory() as db:
+            second = await lease(db, "w2", limit=5)
+
+        assert [j.id for j in first] == [job_id]
+        assert second == []
+        job = await _get(job_id)
+        assert job.status == "running"
+        assert job.lease_owner == "w1"
+        assert job.attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_complete_stores_result(self):
+        job_id = await _enqueue()
+        async with _test_session_factory() as db:
+            await lease(db, "w1")
+            assert await complete(db, job_id, "w1", {"ok": True})
+
+        job = await _get(job_id)
+        assert job.status == "done"
+        assert job.result == '{"ok": true}'
+
+    @pytest.mark.asyncio
+    async def test_failure_retries_with_backoff_then_fails(self, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "job_retry_backoff_seconds", 0)
+        job_id = await _enqueue(max_attempts=2)
+
+        async with _test_session_factory() as db:
+            await lease(db, "w1")
+            await fail(db, job_id, "w1", "boom")
+        job = await _get(job_id)
+        assert job.status == "queued"
+        assert job.last_error == "boom"
+
+        async with _test_session_factory() as db:
+            assert [j.id for j in await lease(db, "w2")] == [job_id]
+            await fail(db, job_id, "w2", "boom again")
+        job = await _get(job_id)
+        assert job.status == "failed"
+        assert job.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_backoff_delays_next_lease(self):
+        job_id = await _enqueue()
+        async with _test_session_factory() as db:
+            await lease(db, "w1")
+            await fail(db, job_id, "w1", "boom")
+            assert await lease(db, "w1") == []
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(self):
+        """リース期限切れ（ワーカー停止）のジョブは他のワーカーが取れる"""
+        job_id = await _enqueue()
+        async with _test_session_factory() as db:
+            await lease(db, "dead")
+            job = await db.get(Job, job_id)
+            job.leased_until = datetime.now() - timedelta(seconds=1)
+            await db.commit()
+
+        async with _test_session_factory() as db:
+            assert [j.id for j in await lease(db, "w2")] == [job_id]
+            # 元の持ち主の完了報告は無視される
+            assert not await complete(db, job_id, "dead")
+        assert (await _get(job_id)).lease_owner == "w2"
+
+    @pytest.mark.asyncio
+    async def test_reap_fails_exhausted_expired_jobs(self):
+        job_id = await _enqueue(max_attempts=1)
+        async with _test_session_factory() as db:
+            await lease(db, "dead")
+            job = await db.get(Job, job_id)
+            job.leased_until = datetime.now() - timedelta(seconds=1)
+            await db.commit()
+            assert await reap(db) == 1
+        assert (await _get(job_id)).status == "failed"
+
+    @pytest.mark.asyncio
+    async def test_dedupe_key(self):
+        first = await _enqueue(dedupe_key="check_auction:1")
+        second = await _enqueue(dedupe_key="check_auction:1")
+        assert first == second
+
+
+class TestWorker:
+    """ワーカーの実行ループ"""
+
+    @pytest.mark.asyncio
+    async def test_worker_runs_registered_handler(self):
+        calls = []
+
+        @handler("test_echo")
+        async def _echo(payload):
+            calls.append(payload)
+            return {"echo": payload["x"]}
+
+        job_id = await _enqueue("test_echo", {"x": 1})
+        with patch("app.worker.async_session", _test_session_factory):
+            worker = Worker(owner="w1", concurrency=2)
+            assert await worker.poll() == 1
+            await worker.drain()
+
+        assert calls == [{"x": 1}]
+        job = await _get(job_id)
+        assert job.status == "done"
+        assert job.result == '{"echo": 1}'
+
+    @pytest.mark.asyncio
+    async def test_worker_records_handler_failure(self):
+        @handler("test_broken")
+        async def _broken(payload):
+            raise ValueError("bad payload")
+
+        job_id = await _enqueue("test_broken")
+        with patch("app.worker.async_session", _test_session_factory):
+            worker = Worker(owner="w1")
+            await worker.poll()
+            await worker.drain()
+
+        job = await _get(job_id)
+        assert job.status == "queued"
+        assert "bad payload" in job.last_error
+        assert worker.failed == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_due_checks_are_enqueued_when_queue_enabled(mock_detail, monkeypatch):
+    """ジョブキュー有効時、tick は取得せずオークションごとのジョブを積む"""
+    from app.config import settings
+    from app.models import Auction, Product, ProductAuctionLink
+    from app.services.scheduler import check_due_auctions
+
+    monkeypatch.setattr(settings, "job_queue_enabled", True)
+    async with _test_session_factory() as db:
+        product = Product(asin="B000000001", title="p")
+        auction = Auction(auction_id="a1", title="a", current_price=100, status="active")
+        db.add_all([product, auction])
+        await db.flush()
+        db.add(ProductAuctionLink(product_id=product.id, auction_id=auction.id))
+        await db.commit()
+
+    with patch("app.services.scheduler.async_session", _test_session_factory):
+        await check_due_auctions()
+        await check_due_auctions()
+
+    mock_detail.assert_not_called()
+    async with _test_session_factory() as db:
+        from sqlalchemy import select
+        jobs = (await db.execute(select(Job))).scalars().all()
+    assert [j.kind for j in jobs] == ["check_auction"]
@@ -0,0 +1,125 @@
+"""Keepa連携（共有クライアント・バッチ価格取得・トークン残高）のテスト"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import keepa
+from app.services.keepa import (
+    KeepaClient,
+    KeepaThrottled,
+    KeepaTokens,
+    _current_price,
+    fetch_current_prices,
+    fetch_product_identity,
+)
+
+
+def _client(monkeypatch, respond) -> KeepaClient:
+    """MockTransport で応答する KeepaClient を共有クライアントとして差し込む"""
+    client = KeepaClient(transport=httpx.MockTransport(respond))
+    monkeypatch.setattr(keepa, "keepa_client", client)
+    monkeypatch.setattr(settings, "keepa_api_key", "test-key")
+    return client
+
+
+class TestKeepaTokens:
+
+    def test_unknown_budget_is_unlimited(self):
+        assert KeepaTokens().available() is None
+
+    def test_refill_after_refill_in(self):
+        tokens = KeepaTokens()
+        tokens.update({"tokensLeft": 5, "refillIn": 30000, "refillRate": 20})
+        start = tokens.updated_at
+        assert tokens.available(start + 10) == 5
+        assert tokens.available(start + 31) == 25
+        assert tokens.available(start + 91) == 45
+
+    def test_wait_seconds_until_enough_refills(self):
+        tokens = KeepaTokens()
+        tokens.update({"tokensLeft": 0, "refillIn": 20000, "refillRate": 5})
+        start = tokens.updated_at
+        assert tokens.wait_seconds(5, start) == 20
+        assert tokens.wait_seconds(12, start) == 140
+        tokens.refill_rate = 0
+        assert tokens.wait_seconds(1, start) == float("inf")
+
+
+class TestCurrentPrice:
+
+    def test_prefers_amazon_then_new(self):
+        assert _current_price({"stats": {"current": [1980, 1500]}}) == 1980
+        assert _current_price({"stats": {"current": [-1, 1500]}}) == 1500
+        assert _current_price({"stats": {"current": [-1, -1]}}) is None
+        assert _current_price({}) is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_current_prices_batches_and_respects_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "keepa_min_tokens", 0)
+    requested: list[list[str]] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        asins = request.url.params["asin"].split(",")
+        requested.append(asins)
+        body = {
+            # 1回目の応答で残り50トークン（回復は当分なし）
+            "tokensLeft": 50, "refillIn": 60000, "refillRate": 5,
+            "products": [{"asin": a, "stats": {"current": [1000, -1]}} for a in asins],
+        }
+        return httpx.Response(200, content=json.dumps(body))
+
+    _client(monkeypatch, respond)
+    prices = await fetch_current_prices([f"B{i:09d}" for i in range(250)])
+
+    # 1回目は100件、残りトークン50なので2回目は50件で打ち切る
+    assert [len(r) for r in requested] == [100, 50]
+    assert len(prices) == 150
+    assert prices["B000000000"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_batched(monkeypatch):
+    requested: list[list[str]] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        asins = request.url.params["asin"].split(",")
+        requested.append(asins)
+        body = {
+            "tokensLeft": 100, "refillIn": 60000, "refillRate": 5,
+            "products": [
+                {"asin": a, "eanList": [f"49{a[-3:]}"]} for a in asins if a != "B000MISSNG"
+            ],
+        }
+        return httpx.Response(200, content=json.dumps(body))
+
+    client = _client(monkeypatch, respond)
+    asins = ["B000000001", "B000000002", "B000000003", "B000MISSNG"]
+    idents = await asyncio.gather(*(fetch_product_identity(a) for a in asins))
+    await client.close()
+
+    assert len(requested) == 1
+    assert sorted(requested[0]) == sorted(asins)
+    assert idents[0].jan_codes == ["49001"]
+    assert idents[3] is None
+    assert client.tokens.tokens_left == 100
+
+
+@pytest.mark.asyncio
+async def test_sheds_when_refill_is_too_far(monkeypatch):
+    monkeypatch.setattr(settings, "keepa_max_wait_seconds", 1.0)
+    calls = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, content=json.dumps({"products": []}))
+
+    client = _client(monkeypatch, respond)
+    client.tokens.update({"tokensLeft": 0, "refillIn": 30000, "refillRate": 5})
+    with pytest.raises(KeepaThrottled):
+        await fetch_product_identity("B000000001")
+    await client.close()
+    assert calls == []
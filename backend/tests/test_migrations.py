@@ -0,0 +1,52 @@
+"""軽量マイグレーション（カラム・インデックスの追加と削除）のテスト"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.migrations import run_migrations
+from app.models import Base
+
+
+async def _indexes(conn) -> set[str]:
+    result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    return {row[0] for row in result.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_indexes_created_and_dropped_idempotently():
+    """既存DBに無いインデックスを作り、モデルから外したものを消す（2回目は何もしない）"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # 導入前のDBを再現: 新しいインデックスが無く、古いインデックスが残っている
+        await conn.execute(text("DROP INDEX ix_notifications_is_read_created_at"))
+        await conn.execute(text("DROP INDEX ix_price_snapshots_link_id_captured_at"))
+        await conn.execute(
+            text("CREATE INDEX ix_price_snapshots_link_id ON price_snapshots (link_id)")
+        )
+
+        await run_migrations(conn)
+        after = await _indexes(conn)
+        assert "ix_notifications_is_read_created_at" in after
+        assert "ix_price_snapshots_link_id_captured_at" in after
+        assert "ix_price_snapshots_link_id" not in after
+
+        await run_migrations(conn)
+        assert await _indexes(conn) == after
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_missing_columns_added():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("DROP INDEX ix_auctions_next_check_at"))
+        await conn.execute(text("ALTER TABLE auctions DROP COLUMN next_check_at"))
+
+        await run_migrations(conn)
+
+        columns = {row[1] for row in (await conn.execute(text("PRAGMA table_info(auctions)"))).fetchall()}
+        assert "next_check_at" in columns
+        assert "ix_auctions_next_check_at" in await _indexes(conn)
+    await engine.dispose()
@@ -0,0 +1,138 @@
+"""価格差インテリジェンス（チャンス一覧の索引）のテスト"""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.models import Auction, LinkState, PriceSnapshot, Product, ProductAuctionLink
+from app.services.price_intelligence import pricing_version, reindex_pricing
+from tests.conftest import _test_session_factory
+
+
+@pytest.fixture
+def intel_db():
+    with patch("app.services.price_intelligence.async_session", _test_session_factory):
+        yield _test_session_factory
+
+
+async def _seed_link(session_factory) -> int:
+    async with session_factory() as db:
+        product = Product(asin="B000000001", title="テスト商品", amazon_price=20000)
+        auction = Auction(auction_id="a1", title="テスト", current_price=5000, status="active")
+        db.add_all([product, auction])
+        await db.flush()
+        link = ProductAuctionLink(product_id=product.id, auction_id=auction.id)
+        db.add(link)
+        await db.commit()
+        return link.id
+
+
+async def _state(session_factory, link_id) -> LinkState:
+    async with session_factory() as db:
+        return await db.get(LinkState, link_id)
+
+
+def test_pricing_version_follows_fee_config(monkeypatch):
+    before = pricing_version()
+    monkeypatch.setattr(settings, "chance_default_shipping", settings.chance_default_shipping + 100)
+    assert pricing_version() != before
+
+
+@pytest.mark.asyncio
+async def test_reindex_recomputes_on_fee_change(intel_db, monkeypatch):
+    """手数料の設定が変わったら profit / profit_rate を計算し直す"""
+    link_id = await _seed_link(intel_db)
+    async with intel_db() as db:
+        db.add(LinkState(
+            link_id=link_id, yahoo_price=5000, amazon_price=20000,
+            profit=1, profit_rate=0.1, pricing_version="old",
+        ))
+        await db.commit()
+
+    assert await reindex_pricing() == 1
+    state = await _state(intel_db, link_id)
+    assert state.profit > 1
+    assert state.pricing_version == pricing_version()
+    # 設定が同じなら何もしない
+    assert await reindex_pricing() == 0
+
+    monkeypatch.setattr(settings, "chance_default_shipping", settings.chance_default_shipping + 1000)
+    assert await reindex_pricing() == 1
+    assert (await _state(intel_db, link_id)).profit == state.profit - 1000
+
+
+@pytest.mark.asyncio
+async def test_reindex_backfills_missing_state(intel_db):
+    """状態の行が無い既存の監視は直近のスナップショットから作る"""
+    link_id = await _seed_link(intel_db)
+    async with intel_db() as db:
+        db.add(PriceSnapshot(link_id=link_id, yahoo_price=5000, amazon_price=20000, profit_rate=40.0))
+        await db.commit()
+
+    await reindex_pricing()
+
+    state = await _state(intel_db, link_id)
+    async with intel_db() as db:
+        snapshot = (await db.execute(select(PriceSnapshot))).scalar_one()
+    assert state.snapshot_id == snapshot.id
+    assert state.is_chance is True
+    assert state.profit is not None
+
+
+@pytest.mark.asyncio
+async def test_reindex_recomputes_is_chance(intel_db, monkeypatch):
+    """計算し直した利益でチャンスの判定も更新する（外れた監視・新たに満たす監視）"""
+    link_id = await _seed_link(intel_db)
+    async with intel_db() as db:
+        db.add(LinkState(
+            link_id=link_id, yahoo_price=5000, amazon_price=20000,
+            profit=1, profit_rate=0.1, is_chance=False, pricing_version="old",
+        ))
+        await db.commit()
+
+    await reindex_pricing()
+    assert (await _state(intel_db, link_id)).is_chance is True
+
+    # 送料が利益を食い尽くせばチャンスから外れる
+    monkeypatch.setattr(settings, "chance_default_shipping", 20000)
+    await reindex_pricing()
+    assert (await _state(intel_db, link_id)).is_chance is False
+
+
+@pytest.mark.asyncio
+async def test_reindex_follows_chance_thresholds(intel_db, monkeypatch):
+    """チャンスの閾値が変わったら version が変わり、is_chance を判定し直す"""
+    link_id = await _seed_link(intel_db)
+    async with intel_db() as db:
+        db.add(LinkState(link_id=link_id, yahoo_price=5000, amazon_price=20000))
+        await db.commit()
+    await reindex_pricing()
+    assert (await _state(intel_db, link_id)).is_chance is True
+
+    before = pricing_version()
+    monkeypatch.setattr(settings, "chance_min_profit_rate", 99.0)
+    assert pricing_version() != before
+    assert await reindex_pricing() == 1
+    assert (await _state(intel_db, link_id)).is_chance is False
+
+    monkeypatch.setattr(settings, "chance_min_profit_rate", 0.0)
+    monkeypatch.setattr(settings, "chance_min_profit_amount", 10**9)
+    assert await reindex_pricing() == 1
+    assert (await _state(intel_db, link_id)).is_chance is False
+
+
+@pytest.mark.asyncio
+async def test_backfill_applies_profit_threshold(intel_db, monkeypatch):
+    """状態を作る時も profit を計算し、利益額の閾値を含めて判定する"""
+    monkeypatch.setattr(settings, "chance_min_profit_amount", 10**9)
+    link_id = await _seed_link(intel_db)
+    async with intel_db() as db:
+        db.add(PriceSnapshot(link_id=link_id, yahoo_price=5000, amazon_price=20000, profit_rate=40.0))
+        await db.commit()
+
+    await reindex_pricing()
+
+    state = await _state(intel_db, link_id)
+    assert state.profit is not None
+    assert state.is_chance is False
@@ -0,0 +1,89 @@
+"""ホットなクエリの実行計画の監査（EXPLAIN QUERY PLAN で全件スキャンが無いこと）
+
+一覧・集計APIとスケジューラーの巡回クエリを実際に実行して発行された SELECT を集め、
+SQLite の実行計画にインデックスを使わない SCAN が含まれていたら失敗させる。
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, text
+
+from app.main import app
+from app.services.scheduler import _monitor_query, _targets_query
+from tests.conftest import _test_engine, _test_session_factory
+
+# インデックスを使わない全件スキャン（"SCAN t" / 古い SQLite の "SCAN TABLE t"）
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+@contextmanager
+def _capture_selects():
+    """この間に発行された SELECT 文（SQL, パラメータ）を集める"""
+    statements: list[tuple[str, tuple]] = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = _test_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+async def _full_scans(statements) -> list[str]:
+    """実行計画に全件スキャンを含む文を「テーブル: SQL」で返す"""
+    found = []
+    async with _test_engine.connect() as conn:
+        for sql, params in statements:
+            raw = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+            for row in raw.fetchall():
+                match = _FULL_SCAN.match(row[-1])
+                if match:
+                    found.append(f"{match.group(1)}: {' '.join(sql.split())}")
+    return found
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", [
+    "/api/monitor/list?status=active",
+    "/api/monitor/list?status=ended",
+    "/api/monitor/chances",
+    "/api/monitor/1/snapshots?days=7",
+    "/api/monitor/1/snapshots?days=365",
+    "/api/notifications/",
+    "/api/notifications/?unread_only=true",
+    "/api/stats/summary?period=month",
+    "/api/stats/summary?period=all",
+])
+async def test_api_queries_use_indexes(url):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        with _capture_selects() as statements:
+            resp = await client.get(url)
+    assert resp.status_code == 200
+    assert statements
+    assert await _full_scans(statements) == []
+
+
+@pytest.mark.asyncio
+async def test_scheduler_queries_use_indexes():
+    now = datetime.now()
+    async with _test_session_factory() as db:
+        with _capture_selects() as statements:
+            await db.execute(_monitor_query(now, due_only=True))
+            await db.execute(_targets_query())
+    assert await _full_scans(statements) == []
+
+
+@pytest.mark.asyncio
+async def test_full_scan_is_detected():
+    """監査自体が全件スキャンを検出できること"""
+    async with _test_engine.connect() as conn:
+        with _capture_selects() as statements:
+            await conn.execute(text("SELECT * FROM notifications WHERE message = 'x'"))
+    assert await _full_scans(statements) != []
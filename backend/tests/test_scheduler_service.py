@@ -1,36 +1,65 @@
 """スケジューラーサービスのユニットテスト"""
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-
-from app.scrapers.yahoo_detail import AuctionDetail
+from sqlalchemy import select
+
+from app.models import (
+    Auction,
+    LinkState,
+    Notification,
+    PriceSnapshot,
+    Product,
+    ProductAuctionLink,
+)
+from app.scrapers.yahoo_detail import AuctionDetail, AuctionPrice
+from app.services.polling import next_check_at, next_check_interval
 from app.services.scheduler import (
+    check_auction,
+    check_due_auctions,
     check_monitored_auctions,
     get_scheduler_status,
     start_scheduler,
     stop_scheduler,
+    track_closing_auctions,
 )
-
-
-def _make_mock_auction(auction_id="a123", title="テスト", current_price=5000, status="active"):
-    """モック用Auctionオブジェクト"""
-    mock = MagicMock()
-    mock.id = 1
-    mock.auction_id = auction_id
-    mock.title = title
-    mock.current_price = current_price
-    mock.buy_now_price = 8000
-    mock.status = status
-    mock.previous_price = None
-    mock.price_changed = False
-    mock.last_checked = None
-    return mock
-
-
-def _make_detail(current_price=6000, end_time=None):
+from tests.conftest import _test_session_factory
+
+
+async def _seed_monitor(
+    session_factory, auction_id="a123", current_price=5000, amazon_price=None,
+    next_check=None, end_time=None,
+):
+    """監視対象（Product + Auction + Link）を1件登録して Auction.id を返す"""
+    async with session_factory() as db:
+        product = Product(
+            asin=f"B0{auction_id.upper():0>8}"[:10], title="テスト商品",
+            amazon_price=amazon_price,
+            price_updated_at=datetime.now() if amazon_price else None,
+        )
+        auction = Auction(
+            auction_id=auction_id, title="テスト", current_price=current_price,
+            buy_now_price=8000, status="active", next_check_at=next_check,
+            end_time=end_time,
+        )
+        db.add_all([product, auction])
+        await db.flush()
+        db.add(ProductAuctionLink(product_id=product.id, auction_id=auction.id))
+        await db.commit()
+        return auction.id
+
+
+async def _load(session_factory, model, **where):
+    async with session_factory() as db:
+        result = await db.execute(select(model).filter_by(**where))
+        return result.scalars().all()
+
+
+def _make_detail(current_price=6000, end_time=None, auction_id="a123"):
     return AuctionDetail(
-        auction_id="a123",
+        auction_id=auction_id,
         title="テスト商品",
         current_price=current_price,
         buy_now_price=8000,
@@ -38,101 +67,566 @@ def _make_detail(current_price=6000, end_time=None):
     )
 
 
+@pytest.fixture
+def scheduler_db():
+    """スケジューラーのセッションをテスト用インメモリDBに向ける"""
+    with patch("app.services.scheduler.async_session", _test_session_factory), \
+            patch("app.services.leader.async_session", _test_session_factory), \
+            patch("app.services.runs.async_session", _test_session_factory):
+        yield _test_session_factory
+
+
 @pytest.mark.asyncio
-@patch("app.services.scheduler.async_session")
 @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
-async def test_check_no_auctions(mock_detail, mock_session_factory):
+async def test_check_no_auctions(mock_detail, scheduler_db):
     """監視対象なし → 何もしない"""
-    mock_db = AsyncMock()
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.all.return_value = []
-    mock_db.execute = AsyncMock(return_value=mock_result)
-    mock_db.commit = AsyncMock()
-
-    mock_session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
-    mock_session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
-
     await check_monitored_auctions()
     mock_detail.assert_not_called()
 
 
 @pytest.mark.asyncio
-@patch("app.services.scheduler.async_session")
 @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
-async def test_check_price_change(mock_detail, mock_session_factory):
+async def test_check_price_change(mock_detail, scheduler_db):
     """価格変動があれば通知を作成"""
-    auction = _make_mock_auction(current_price=5000)
+    await _seed_monitor(scheduler_db, current_price=5000)
     mock_detail.return_value = _make_detail(current_price=6000)
 
-    mock_db = AsyncMock()
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.all.return_value = [auction]
-    mock_db.execute = AsyncMock(return_value=mock_result)
-    mock_db.add = MagicMock()
-    mock_db.commit = AsyncMock()
-
-    mock_session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
-    mock_session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
-
     await check_monitored_auctions()
 
     # 価格が更新され、通知が追加される
+    auction = (await _load(scheduler_db, Auction))[0]
     assert auction.current_price == 6000
     assert auction.previous_price == 5000
     assert auction.price_changed is True
-    # db.add が呼ばれる（Notification追加）
-    assert mock_db.add.call_count >= 1
+    notifications = await _load(scheduler_db, Notification, type="price_change")
+    assert len(notifications) == 1
 
 
 @pytest.mark.asyncio
-@patch("app.services.scheduler.async_session")
 @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
-async def test_check_auction_ended(mock_detail, mock_session_factory):
+async def test_check_auction_ended(mock_detail, scheduler_db):
     """終了オークションを検知"""
-    auction = _make_mock_auction(current_price=5000)
+    await _seed_monitor(scheduler_db, current_price=5000)
     # 過去の end_time を返す
     mock_detail.return_value = _make_detail(
         current_price=5000,
         end_time=datetime(2020, 1, 1, 0, 0),
     )
 
-    mock_db = AsyncMock()
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.all.return_value = [auction]
-    mock_db.execute = AsyncMock(return_value=mock_result)
-    mock_db.add = MagicMock()
-    mock_db.commit = AsyncMock()
-
-    mock_session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
-    mock_session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
-
     await check_monitored_auctions()
 
+    auction = (await _load(scheduler_db, Auction))[0]
     assert auction.status == "ended"
     # auction_ended 通知が追加される
-    assert mock_db.add.call_count >= 1
+    assert len(await _load(scheduler_db, Notification, type="auction_ended")) == 1
 
 
 @pytest.mark.asyncio
-@patch("app.services.scheduler.async_session")
 @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
-async def test_check_detail_fetch_failed(mock_detail, mock_session_factory):
+async def test_check_detail_fetch_failed(mock_detail, scheduler_db):
     """詳細取得失敗 → スキップ"""
-    auction = _make_mock_auction()
+    await _seed_monitor(scheduler_db)
     mock_detail.return_value = None
 
-    mock_db = AsyncMock()
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.all.return_value = [auction]
-    mock_db.execute = AsyncMock(return_value=mock_result)
-    mock_db.commit = AsyncMock()
-
-    mock_session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
-    mock_session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
-
     await check_monitored_auctions()
     # 価格は変わらない
+    auction = (await _load(scheduler_db, Auction))[0]
     assert auction.current_price == 5000
+    assert auction.last_checked is None
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_check_auction_job_raises_on_fetch_failure(mock_detail, scheduler_db):
+    """ジョブキューの1件チェックは取得失敗で例外にする（キューが再試行する）"""
+    auction_pk = await _seed_monitor(scheduler_db)
+    mock_detail.return_value = None
+
+    with pytest.raises(RuntimeError):
+        await check_auction(auction_pk)
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_checks_run_concurrently(mock_detail, scheduler_db, monkeypatch):
+    """詳細取得は並列に走り、遅い・失敗した1件が他を止めない"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "scheduler_check_concurrency", 4)
+    monkeypatch.setattr(settings, "scheduler_yahoo_concurrency", 4)
+    monkeypatch.setattr(settings, "scheduler_item_timeout_seconds", 0.2)
+    for i in range(4):
+        await _seed_monitor(scheduler_db, auction_id=f"a{i}", current_price=1000)
+
+    running = 0
+    peak = 0
+
+    async def fetch(auction_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(0.01)
+            if auction_id == "a0":
+                await asyncio.sleep(5)  # タイムアウトで打ち切られる
+            if auction_id == "a1":
+                raise RuntimeError("boom")
+            return _make_detail(current_price=2000, auction_id=auction_id)
+        finally:
+            running -= 1
+
+    mock_detail.side_effect = fetch
+    await check_monitored_auctions()
+
+    assert peak == 4
+    prices = {a.auction_id: a.current_price for a in await _load(scheduler_db, Auction)}
+    assert prices == {"a0": 1000, "a1": 1000, "a2": 2000, "a3": 2000}
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_failed_write_keeps_other_items(mock_detail, scheduler_db):
+    """1件の書き込みが失敗しても、他の件の更新はコミット済みで残る"""
+    from app.services import scheduler as scheduler_module
+
+    await _seed_monitor(scheduler_db, auction_id="a0", current_price=1000)
+    await _seed_monitor(scheduler_db, auction_id="a1", current_price=1000)
+    mock_detail.side_effect = lambda auction_id: _make_detail(
+        current_price=2000, auction_id=auction_id
+    )
+    original = scheduler_module.process_price_intelligence
+
+    async def flaky(db, link, auction, product, state, now):
+        if auction.auction_id == "a1":
+            raise RuntimeError("disk I/O error")
+        return await original(db, link, auction, product, state, now)
+
+    with patch.object(scheduler_module, "process_price_intelligence", flaky):
+        await check_monitored_auctions()
+
+    auctions = {a.auction_id: a for a in await _load(scheduler_db, Auction)}
+    assert auctions["a0"].current_price == 2000
+    # 失敗した件はロールバックされ、次回チェックだけ後ろへ回る
+    assert auctions["a1"].current_price == 1000
+    assert auctions["a1"].next_check_at is not None
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_due_check_skips_not_yet_due(mock_detail, scheduler_db):
+    """tick では next_check_at を過ぎた件（と未チェックの件）だけ取得する"""
+    now = datetime.now()
+    await _seed_monitor(scheduler_db, auction_id="due", next_check=now - timedelta(minutes=1))
+    await _seed_monitor(scheduler_db, auction_id="new")
+    await _seed_monitor(scheduler_db, auction_id="later", next_check=now + timedelta(hours=1))
+    mock_detail.side_effect = lambda auction_id: _make_detail(auction_id=auction_id)
+
+    await check_due_auctions()
+
+    checked = sorted(c.args[0] for c in mock_detail.await_args_list)
+    assert checked == ["due", "new"]
+    auctions = {a.auction_id: a for a in await _load(scheduler_db, Auction)}
+    assert auctions["due"].next_check_at > now
+    assert auctions["new"].next_check_at > now
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_failed_check_is_deferred(mock_detail, scheduler_db):
+    """取得失敗した件は次の tick で再取得しない（最短間隔だけ後ろへ）"""
+    await _seed_monitor(scheduler_db)
+    mock_detail.return_value = None
+
+    await check_due_auctions()
+    await check_due_auctions()
+
+    assert mock_detail.await_count == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_snapshot_written_only_on_change(mock_detail, scheduler_db):
+    """値が変わらない間は新しい行を積まず、直近行の last_seen_at だけを進める"""
+    await _seed_monitor(scheduler_db, amazon_price=20000)
+    mock_detail.return_value = _make_detail(current_price=6000)
+
+    await check_monitored_auctions()
+    await check_monitored_auctions()
+    snapshots = await _load(scheduler_db, PriceSnapshot)
+    assert len(snapshots) == 1
+    assert snapshots[0].last_seen_at > snapshots[0].captured_at
+
+    mock_detail.return_value = _make_detail(current_price=6500)
+    await check_monitored_auctions()
+    assert len(await _load(scheduler_db, PriceSnapshot)) == 2
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_link_state_tracks_latest_and_chance_edge(mock_detail, scheduler_db):
+    """最新状態は毎回更新され、チャンス通知は閾値を新たに超えた時だけ出る"""
+    await _seed_monitor(scheduler_db, amazon_price=20000)
+
+    mock_detail.return_value = _make_detail(current_price=19000)
+    await check_monitored_auctions()
+    (state,) = await _load(scheduler_db, LinkState)
+    assert state.yahoo_price == 19000
+    assert state.is_chance is False
+    assert state.checked_at is not None
+
+    mock_detail.return_value = _make_detail(current_price=5000)
+    await check_monitored_auctions()
+    mock_detail.return_value = _make_detail(current_price=5100)
+    await check_monitored_auctions()
+
+    (state,) = await _load(scheduler_db, LinkState)
+    assert state.yahoo_price == 5100
+    assert state.is_chance is True
+    snapshots = await _load(scheduler_db, PriceSnapshot)
+    assert state.snapshot_id == max(s.id for s in snapshots)
+    assert len(await _load(scheduler_db, Notification, type="price_gap")) == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_link_state_initialized_from_latest_snapshot(mock_detail, scheduler_db):
+    """状態の行が無い既存の監視は直近のスナップショットから引き継ぐ（通知を重複させない）"""
+    await _seed_monitor(scheduler_db, current_price=5000, amazon_price=20000)
+    mock_detail.return_value = _make_detail(current_price=5000)
+    await check_monitored_auctions()
+    async with scheduler_db() as db:
+        await db.execute(LinkState.__table__.delete())
+        await db.commit()
+
+    await check_monitored_auctions()
+
+    assert len(await _load(scheduler_db, LinkState)) == 1
+    assert len(await _load(scheduler_db, PriceSnapshot)) == 1
+    assert len(await _load(scheduler_db, Notification, type="price_gap")) == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_price", new_callable=AsyncMock)
+@patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+async def test_final_lane_tracks_and_closes(mock_detail, mock_price, scheduler_db):
+    """終了間際の件は通常の巡回から外れ、レーンが最終価格で確定させる"""
+    end = datetime.now() + timedelta(minutes=5)
+    await _seed_monitor(scheduler_db, current_price=5000, amazon_price=20000, end_time=end)
+
+    await check_monitored_auctions()
+    mock_detail.assert_not_called()
+
+    mock_price.return_value = AuctionPrice(auction_id="a123", current_price=7000, end_time=end)
+    await track_closing_auctions()
+    auction = (await _load(scheduler_db, Auction))[0]
+    assert auction.current_price == 7000
+    assert auction.status == "active"
+
+    # 価格が動かない間はスナップショットを積まない
+    await track_closing_auctions()
+    assert len(await _load(scheduler_db, PriceSnapshot)) == 1
+
+    mock_price.return_value = AuctionPrice(
+        auction_id="a123", current_price=7500, end_time=end, ended=True
+    )
+    await track_closing_auctions()
+    auction = (await _load(scheduler_db, Auction))[0]
+    assert auction.current_price == 7500
+    assert auction.status == "ended"
+    assert len(await _load(scheduler_db, Notification, type="auction_ended")) == 1
+    assert len(await _load(scheduler_db, PriceSnapshot)) == 2
+
+
+@pytest.mark.asyncio
+@patch("app.services.scheduler.get_auction_price", new_callable=AsyncMock)
+async def test_final_lane_settles_without_ended_marker(mock_price, scheduler_db):
+    """終了表示が取れなくても終了時刻から一定時間過ぎたら確定する"""
+    end = datetime.now() - timedelta(minutes=5)
+    await _seed_monitor(scheduler_db, current_price=5000, end_time=end)
+    mock_price.return_value = AuctionPrice(auction_id="a123", current_price=5000, end_time=end)
+
+    await track_closing_auctions()
+
+    auction = (await _load(scheduler_db, Auction))[0]
+    assert auction.status == "ended"
+
+
+class TestPollingInterval:
+    """次回チェック間隔の計算"""
+
+    NOW = datetime(2026, 3, 1, 12, 0)
+
+    def test_ending_soon_is_checked_more_often(self):
+        soon = next_check_interval(self.NOW + timedelta(hours=1), None, None, self.NOW)
+        later = next_check_interval(self.NOW + timedelta(days=3), None, None, self.NOW)
+        assert soon < later
+
+    def test_clamped_to_min_and_max(self):
+        from app.config import settings
+
+        assert next_check_interval(
+            self.NOW + timedelta(minutes=1), None, None, self.NOW
+        ) == timedelta(minutes=settings.polling_min_interval_minutes)
+        assert next_check_interval(
+            self.NOW + timedelta(days=60), None, None, self.NOW
+        ) == timedelta(minutes=settings.polling_max_interval_minutes)
+
+    def test_recent_price_change_shortens_interval(self):
+        end = self.NOW + timedelta(days=1)
+        quiet = next_check_interval(end, self.NOW - timedelta(days=7), None, self.NOW)
+        active = next_check_interval(end, self.NOW - timedelta(minutes=30), None, self.NOW)
+        assert active == quiet / 2
+
+    def test_near_chance_threshold_shortens_interval(self):
+        from app.config import settings
+
+        end = self.NOW + timedelta(days=1)
+        far = next_check_interval(end, None, settings.chance_min_profit_rate - 30, self.NOW)
+        near = next_check_interval(end, None, settings.chance_min_profit_rate - 1, self.NOW)
+        assert near == far / 2
+
+    def test_does_not_skip_past_end_time(self):
+        """終了時刻を跨がず、終了直後に1回見る"""
+        from app.config import settings
+
+        end = self.NOW + timedelta(minutes=20)
+        at = next_check_at(end, None, None, self.NOW)
+        assert at <= end + timedelta(minutes=settings.polling_min_interval_minutes)
+
+
+class TestCheckRuns:
+    """run-now のバックグラウンド実行・進捗・多重実行防止"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+    async def test_run_now_returns_run_id_and_progress(self, mock_detail, scheduler_db):
+        from httpx import ASGITransport, AsyncClient
+
+        from app.main import app
+        from app.services.runs import check_runs
+
+        await _seed_monitor(scheduler_db, auction_id="a0")
+        await _seed_monitor(scheduler_db, auction_id="a1")
+        release = asyncio.Event()
+
+        async def fetch(auction_id):
+            await release.wait()
+            if auction_id == "a1":
+                return None
+            return _make_detail(auction_id=auction_id)
+
+        mock_detail.side_effect = fetch
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/scheduler/run-now")
+            assert resp.status_code == 202
+            run_id = resp.json()["run_id"]
+
+            # 実行中にもう一度押しても新しい run は始まらない
+            again = (await client.post("/api/scheduler/run-now")).json()
+            assert again["already_running"] is True
+            assert again["run_id"] == run_id
+
+            release.set()
+            await check_runs.wait()
+            progress = (await client.get(f"/api/scheduler/runs/{run_id}")).json()
+
+        assert progress["status"] == "done"
+        assert progress["total"] == 2
+        assert progress["done"] == 2
+        assert progress["failed"] == 1
+        assert progress["errors"] == ["a1: detail unavailable"]
+
+    @pytest.mark.asyncio
+    async def test_run_is_exclusive_across_processes(self, scheduler_db):
+        """別プロセス（別の RunTracker）で run 中なら始めない"""
+        from app.services.runs import RunInProgress, RunTracker
+
+        release = asyncio.Event()
+
+        async def slow(progress):
+            await release.wait()
+
+        a, b = RunTracker(), RunTracker()
+        b._lease.owner = "other-host:1"
+        run = await a.start(slow, "manual")
+        with pytest.raises(RunInProgress) as exc:
+            await b.start(slow, "manual")
+        # リースを持つプロセスの run id を返す
+        assert exc.value.run_id == run.id
+        async with scheduler_db() as db:
+            seen = await b.get(db, run.id)
+            assert seen.status == "running"
+            assert (await b.running(db)).id == run.id
+
+        release.set()
+        await a.wait()
+        # 終わればリースが解放され、他のプロセスも始められる
+        await b.start(slow, "manual")
+        await b.wait()
+
+    @pytest.mark.asyncio
+    @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+    async def test_run_now_uses_job_queue_when_enabled(self, mock_detail, scheduler_db, monkeypatch):
+        """ジョブキュー有効時は check_run ジョブを積み、ワーカーが同じ run id で実行する"""
+        from httpx import ASGITransport, AsyncClient
+
+        from app.config import settings
+        from app.main import app
+        from app.worker import Worker
+
+        monkeypatch.setattr(settings, "job_queue_enabled", True)
+        await _seed_monitor(scheduler_db, auction_id="a0")
+        mock_detail.return_value = _make_detail(auction_id="a0")
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = (await client.post("/api/scheduler/run-now")).json()
+            again = (await client.post("/api/scheduler/run-now")).json()
+            assert first["already_running"] is False
+            assert again == {**first, "already_running": True, "detail": "Check already running"}
+            mock_detail.assert_not_called()
+            queued = (await client.get(f"/api/scheduler/runs/{first['run_id']}")).json()
+            assert queued["status"] == "queued"
+
+            with patch("app.worker.async_session", scheduler_db):
+                worker = Worker(owner="w1")
+                assert await worker.poll() == 1
+                await worker.drain()
+
+            progress = (await client.get(f"/api/scheduler/runs/{first['run_id']}")).json()
+        assert progress["status"] == "done"
+        assert progress["done"] == 1
+        mock_detail.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_scheduled_tick_skips_while_run_in_progress(self, scheduler_db):
+        from app.services.runs import check_runs
+
+        release = asyncio.Event()
+
+        async def slow(progress):
+            await release.wait()
+
+        await _seed_monitor(scheduler_db, auction_id="a0")
+        await check_runs.start(slow, "manual")
+        with patch("app.services.scheduler.check_monitored_auctions", new_callable=AsyncMock) as check:
+            await check_due_auctions()
+            check.assert_not_called()
+        release.set()
+        await check_runs.wait()
+
+    @pytest.mark.asyncio
+    @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+    async def test_queued_checks_defer_to_run_in_progress(
+        self, mock_detail, scheduler_db, monkeypatch
+    ):
+        """ジョブキュー有効時も、run 中は check_auction を積まず、積まれた分も取得しない"""
+        from app.config import settings
+        from app.models import Job
+        from app.services.runs import RunTracker
+
+        monkeypatch.setattr(settings, "job_queue_enabled", True)
+        pk = await _seed_monitor(scheduler_db, auction_id="a0")
+        mock_detail.return_value = _make_detail(auction_id="a0")
+        release = asyncio.Event()
+
+        async def slow(progress):
+            await release.wait()
+
+        # 別プロセスの run-now が "check_run" リースを持っている
+        other = RunTracker()
+        other._lease.owner = "other-host:1"
+        await other.start(slow, "manual")
+
+        await check_due_auctions()
+        await check_auction(pk)
+        assert await _load(scheduler_db, Job) == []
+        mock_detail.assert_not_called()
+
+        release.set()
+        await other.wait()
+        await check_due_auctions()
+        assert [j.kind for j in await _load(scheduler_db, Job)] == ["check_auction"]
+        await check_auction(pk)
+        mock_detail.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("app.services.scheduler.get_auction_detail", new_callable=AsyncMock)
+    async def test_empty_tick_records_no_run(self, mock_detail, scheduler_db):
+        """期限の来た件が無い tick は run の履歴に残さない"""
+        from app.models import CheckRun
+
+        now = datetime.now()
+        await _seed_monitor(scheduler_db, auction_id="later", next_check=now + timedelta(hours=1))
+
+        await check_due_auctions()
+
+        mock_detail.assert_not_called()
+        assert await _load(scheduler_db, CheckRun) == []
+
+
+class TestLeaderElection:
+    """複数プロセスのうち1つだけがスケジューラーを実行する"""
+
+    @pytest.fixture(autouse=True)
+    def _leader_db(self):
+        with patch("app.services.leader.async_session", _test_session_factory):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_only_one_leader(self):
+        from app.services.leader import LeaderElection
+
+        a = LeaderElection("scheduler", owner="host:1")
+        b = LeaderElection("scheduler", owner="host:2")
+        assert await a.heartbeat() is True
+        assert await b.heartbeat() is False
+        # 保持者はハートビートで延長し続けられる
+        assert await a.heartbeat() is True
+        assert a.is_leader and not b.is_leader
+        async with _test_session_factory() as db:
+            assert (await b.holder(db))["owner"] == "host:1"
+
+    @pytest.mark.asyncio
+    async def test_failover_after_lease_expires(self):
+        from app.models import SchedulerLease
+        from app.services.leader import LeaderElection
+
+        a = LeaderElection("scheduler", owner="host:1")
+        b = LeaderElection("scheduler", owner="host:2")
+        await a.heartbeat()
+        # host:1 が落ちてハートビートが止まった
+        async with _test_session_factory() as db:
+            lease = await db.get(SchedulerLease, "scheduler")
+            lease.expires_at = datetime.now() - timedelta(seconds=1)
+            await db.commit()
+
+        assert await b.heartbeat() is True
+        assert await a.heartbeat() is False
+        async with _test_session_factory() as db:
+            assert (await a.holder(db))["owner"] == "host:2"
+
+    @pytest.mark.asyncio
+    async def test_release_hands_over_immediately(self):
+        from app.services.leader import LeaderElection
+
+        a = LeaderElection("scheduler", owner="host:1")
+        b = LeaderElection("scheduler", owner="host:2")
+        await a.heartbeat()
+        await a.release()
+        assert not a.is_leader
+        assert await b.heartbeat() is True
+
+    @pytest.mark.asyncio
+    async def test_jobs_skip_on_non_leader(self):
+        from app.services.scheduler import _leader_only
+
+        fn = AsyncMock()
+        with patch("app.services.scheduler.scheduler_leader") as leader:
+            leader.is_leader = False
+            await _leader_only(fn)
+            fn.assert_not_called()
+            leader.is_leader = True
+            await _leader_only(fn)
+            fn.assert_awaited_once()
 
 
 @patch("app.services.scheduler.scheduler")
@@ -140,7 +634,9 @@ def test_start_scheduler(mock_sched):
     """start_scheduler がジョブを追加して起動する"""
     mock_sched.running = False
     start_scheduler()
-    mock_sched.add_job.assert_called_once()
+    # リーダーのハートビート + 通常の巡回 + 終了間際レーン + Amazon価格リフレッシュ
+    # + スナップショットの集約 + SQLite のメンテナンス
+    assert mock_sched.add_job.call_count == 6
     mock_sched.start.assert_called_once()
 
 
@@ -171,6 +667,7 @@ def test_stop_scheduler_not_running(mock_sched):
 @patch("app.services.scheduler.scheduler")
 def test_get_scheduler_status(mock_sched):
     """get_scheduler_status がステータスを返す"""
+    from app.config import settings
     mock_sched.running = True
     mock_job = MagicMock()
     mock_job.next_run_time = datetime(2026, 2, 23, 15, 0)
@@ -179,6 +676,10 @@ def test_get_scheduler_status(mock_sched):
     status = get_scheduler_status()
     assert status["running"] is True
     assert "2026-02-23" in status["next_run"]
+    assert status["tick_seconds"] == settings.scheduler_tick_seconds
+    assert status["min_interval_minutes"] == settings.polling_min_interval_minutes
+    assert status["max_interval_minutes"] == settings.polling_max_interval_minutes
+    assert "interval_minutes" not in status
 
 
 @patch("app.services.scheduler.scheduler")
@@ -1,4 +1,6 @@
 """スクレイパーヘルパー関数のユニットテスト"""
+import asyncio
+import time
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -66,49 +68,251 @@ class TestParseClosedDate:
         assert _parse_closed_date("") is None
 
 
-class TestRandomDelay:
-    """random_delay のテスト"""
+class TestConfigSettings:
+    """config.py のテスト"""
+
+    def test_cors_origins_list(self):
+        from app.config import settings
+        origins = settings.cors_origins_list
+        assert isinstance(origins, list)
+        assert len(origins) >= 1
+        assert "http://localhost:5173" in origins
+
+    def test_legacy_delay_mapped_to_rate_limit(self):
+        """旧 *_REQUEST_DELAY_* は平均間隔からreq/秒に換算される"""
+        from app.config import Settings
+        s = Settings(yahoo_request_delay_min=3, yahoo_request_delay_max=8)
+        assert s.yahoo_rate_limit_rps == pytest.approx(1 / 5.5, abs=1e-3)
+        # レートを明示した場合はそちらが優先
+        s = Settings(amazon_request_delay_min=3, amazon_request_delay_max=8, amazon_rate_limit_rps=0.3)
+        assert s.amazon_rate_limit_rps == 0.3
+
+
+def _mock_pool_browser():
+    """BrowserPool 用のモックブラウザ（new_context → new_page を返す）"""
+    browser = MagicMock()
+    browser.is_connected = MagicMock(return_value=True)
+
+    async def new_context(**kwargs):
+        page = MagicMock()
+        page.is_closed = MagicMock(return_value=False)
+        context = MagicMock()
+        context.route = AsyncMock()
+        context.new_page = AsyncMock(return_value=page)
+        context.close = AsyncMock()
+        return context
+
+    browser.new_context = AsyncMock(side_effect=new_context)
+    return browser
+
+
+class TestBrowserPool:
+    """BrowserPool のテスト"""
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.base.asyncio.sleep", new_callable=AsyncMock)
-    async def test_default_delay(self, mock_sleep):
-        from app.scrapers.base import random_delay
-        await random_delay()
-        mock_sleep.assert_called_once()
-        delay = mock_sleep.call_args[0][0]
-        assert 3 <= delay <= 8
+    async def test_page_reused_between_leases(self):
+        from app.scrapers.base import BrowserPool
+        pool = BrowserPool(browsers=1, pages_per_browser=2, max_uses=10)
+        browser = _mock_pool_browser()
+        with patch.object(pool, "get_browser", AsyncMock(return_value=browser)):
+            async with pool.lease() as p1:
+                pass
+            async with pool.lease() as p2:
+                pass
+        assert p1 is p2
+        assert pool.stats()["created"] == 1
+        assert pool.stats()["idle"] == 1
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.base.asyncio.sleep", new_callable=AsyncMock)
-    async def test_custom_delay(self, mock_sleep):
-        from app.scrapers.base import random_delay
-        await random_delay(min_sec=1, max_sec=2)
+    async def test_recycled_after_max_uses(self):
+        from app.scrapers.base import BrowserPool
+        pool = BrowserPool(browsers=1, pages_per_browser=1, max_uses=2)
+        browser = _mock_pool_browser()
+        with patch.object(pool, "get_browser", AsyncMock(return_value=browser)):
+            for _ in range(3):
+                async with pool.lease():
+                    pass
+        stats = pool.stats()
+        assert stats["created"] == 2
+        assert stats["recycled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_lease_discards_page(self):
+        from app.scrapers.base import BrowserPool
+        pool = BrowserPool(browsers=1, pages_per_browser=1, max_uses=10)
+        browser = _mock_pool_browser()
+        with patch.object(pool, "get_browser", AsyncMock(return_value=browser)):
+            with pytest.raises(RuntimeError):
+                async with pool.lease():
+                    raise RuntimeError("boom")
+            async with pool.lease():
+                pass
+        stats = pool.stats()
+        assert stats["created"] == 2
+        assert stats["crashed"] == 1
+        assert stats["in_use"] == 0
+
+    @pytest.mark.asyncio
+    async def test_pages_spread_across_browsers(self):
+        from app.scrapers.base import BrowserPool
+        pool = BrowserPool(browsers=2, pages_per_browser=1, max_uses=10)
+        browsers = [_mock_pool_browser(), _mock_pool_browser()]
+        with patch.object(pool, "get_browser", AsyncMock(side_effect=lambda i: browsers[i])):
+            async with pool.lease():
+                async with pool.lease():
+                    assert pool.stats()["utilization"] == 1.0
+        assert browsers[0].new_context.await_count == 1
+        assert browsers[1].new_context.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_during_lease_stays_within_capacity(self):
+        """貸し出し中に warm しても生存ページ数は上限を超えない"""
+        from app.scrapers.base import BrowserPool
+        pool = BrowserPool(browsers=1, pages_per_browser=3, max_uses=10)
+        browser = _mock_pool_browser()
+        with patch.object(pool, "get_browser", AsyncMock(return_value=browser)):
+            async with pool.lease():
+                await pool.warm()
+                stats = pool.stats()
+                assert stats["in_use"] + stats["idle"] == 3
+            assert pool.stats()["idle"] == 3
+            await pool.warm()
+        assert pool.stats()["created"] == 3
+
+    def test_default_capacity_covers_research_concurrency(self):
+        from app.routers.research import AMAZON_CONCURRENCY, YAHOO_CONCURRENCY
+        from app.scrapers.base import browser_pool
+        assert browser_pool.capacity >= YAHOO_CONCURRENCY + AMAZON_CONCURRENCY
+
+
+class TestHostRateLimiter:
+    """HostRateLimiter のテスト"""
+
+    def test_host_key_groups_subdomains(self):
+        from app.scrapers.ratelimit import host_key
+        assert host_key("https://page.auctions.yahoo.co.jp/jp/auction/x") == "yahoo.co.jp"
+        assert host_key("https://auctions.yahoo.co.jp/search") == "yahoo.co.jp"
+        assert host_key("https://www.example.com/") == "example.com"
+
+    @pytest.mark.asyncio
+    @patch("app.scrapers.ratelimit.asyncio.sleep", new_callable=AsyncMock)
+    async def test_burst_then_wait(self, mock_sleep):
+        from app.scrapers.ratelimit import HostRateLimiter
+        limiter = HostRateLimiter(default_rate=1.0, burst=2)
+        await limiter.acquire("https://example.com/a")
+        await limiter.acquire("https://example.com/b")
+        mock_sleep.assert_not_called()
+        await limiter.acquire("https://example.com/c")
         mock_sleep.assert_called_once()
-        delay = mock_sleep.call_args[0][0]
-        assert 1 <= delay <= 2
+        assert 0 < mock_sleep.call_args[0][0] <= 1.0
 
+    def test_aimd(self):
+        from app.scrapers.ratelimit import HostRateLimiter
+        limiter = HostRateLimiter(default_rate=1.0, increase_step=0.1)
+        limiter.record_throttle("https://example.com/")
+        assert limiter.stats()["example.com"]["rate"] == 0.5
+        limiter.record_success("https://example.com/")
+        assert limiter.stats()["example.com"]["rate"] == 0.6
 
-class TestFetchWithRetry:
-    """fetch_with_retry のテスト"""
+    @pytest.mark.asyncio
+    async def test_circuit_opens_after_failures(self):
+        from app.scrapers.ratelimit import CircuitOpenError, HostRateLimiter
+        limiter = HostRateLimiter(default_rate=1.0, failure_threshold=2, cooldown_seconds=60)
+        limiter.record_failure("https://example.com/")
+        limiter.record_failure("https://example.com/")
+        with pytest.raises(CircuitOpenError):
+            await limiter.acquire("https://example.com/")
+        # 別ホストには影響しない
+        await limiter.acquire("https://other.example.org/")
+
+    def test_rate_capped_at_configured_rate(self):
+        """既定では成功が続いても設定レートより速くならない"""
+        from app.scrapers.ratelimit import HostRateLimiter
+        limiter = HostRateLimiter(default_rate=0.2, increase_step=0.05)
+        for _ in range(50):
+            limiter.record_success("https://example.com/")
+        assert limiter.stats()["example.com"]["rate"] == 0.2
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.base.random_delay", new_callable=AsyncMock)
-    async def test_success(self, mock_delay):
-        from app.scrapers.base import fetch_with_retry
+    async def test_stale_success_does_not_close_circuit(self):
+        """作動前に出たリクエストの成功ではブレーカーは閉じない"""
+        from app.scrapers.ratelimit import CircuitOpenError, HostRateLimiter
+        limiter = HostRateLimiter(default_rate=10.0, failure_threshold=2, cooldown_seconds=60)
+        url = "https://example.com/"
+        started_at = await limiter.acquire(url)
+        limiter.record_failure(url)
+        limiter.record_failure(url)
+        limiter.record_success(url, started_at)
+        with pytest.raises(CircuitOpenError):
+            await limiter.acquire(url)
+
+
+    @pytest.mark.asyncio
+    async def test_half_open_lets_one_probe_through(self):
+        """cooldown 後は1つだけ通し、結果が出るまで他は弾く"""
+        from app.scrapers.ratelimit import CircuitOpenError, HostRateLimiter
+        limiter = HostRateLimiter(default_rate=10.0, failure_threshold=2, cooldown_seconds=60)
+        url = "https://example.com/"
+        limiter.record_failure(url)
+        limiter.record_failure(url)
+
+        with patch("app.scrapers.ratelimit.time.monotonic", return_value=time.monotonic() + 61):
+            results = await asyncio.gather(
+                limiter.acquire(url), limiter.acquire(url), return_exceptions=True
+            )
+            assert len([r for r in results if isinstance(r, CircuitOpenError)]) == 1
+
+            # 試行が失敗すれば再作動、成功すれば閉じる
+            limiter.record_throttle(url)
+            with pytest.raises(CircuitOpenError):
+                await limiter.acquire(url)
+        with patch("app.scrapers.ratelimit.time.monotonic", return_value=time.monotonic() + 200):
+            probe_started = await limiter.acquire(url)
+            with pytest.raises(CircuitOpenError):
+                await limiter.acquire(url)
+            limiter.record_success(url, probe_started)
+            await limiter.acquire(url)
+            await limiter.acquire(url)
+
+
+def _fake_get_page(page):
+    from contextlib import asynccontextmanager
+
+    @asynccontextmanager
+    async def fake_get_page():
+        yield page
+    return fake_get_page
+
+
+class TestFetchPage:
+    """fetch_page のテスト"""
+
+    @pytest.mark.asyncio
+    @patch("app.scrapers.base.asyncio.sleep", new_callable=AsyncMock)
+    async def test_404_yields_none_without_retry(self, mock_sleep):
+        from contextlib import asynccontextmanager
+
+        from app.scrapers import base
         page = AsyncMock()
         response = MagicMock()
-        response.ok = True
-        response.status = 200
+        response.ok = False
+        response.status = 404
         page.goto = AsyncMock(return_value=response)
 
-        result = await fetch_with_retry(page, "https://example.com")
-        assert result is True
+        @asynccontextmanager
+        async def fake_get_page():
+            yield page
+
+        with patch.object(base, "get_page", fake_get_page):
+            async with base.fetch_page("https://example.com/x") as loaded:
+                assert loaded is None
+        assert page.goto.await_count == 1
+        mock_sleep.assert_not_called()
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.base.random_delay", new_callable=AsyncMock)
     @patch("app.scrapers.base.asyncio.sleep", new_callable=AsyncMock)
-    async def test_retry_then_success(self, mock_sleep, mock_delay):
-        from app.scrapers.base import fetch_with_retry
+    async def test_retry_then_success(self, mock_sleep):
+        from app.scrapers import base
         page = AsyncMock()
         fail_response = MagicMock()
         fail_response.ok = False
@@ -118,27 +322,256 @@ class TestFetchWithRetry:
         ok_response.status = 200
         page.goto = AsyncMock(side_effect=[fail_response, ok_response])
 
-        result = await fetch_with_retry(page, "https://example.com", max_retries=2)
-        assert result is True
+        with patch.object(base, "get_page", _fake_get_page(page)):
+            async with base.fetch_page("https://example.com/x", max_retries=2) as loaded:
+                assert loaded is page
+        assert page.goto.await_count == 2
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.base.random_delay", new_callable=AsyncMock)
     @patch("app.scrapers.base.asyncio.sleep", new_callable=AsyncMock)
-    async def test_all_retries_fail(self, mock_sleep, mock_delay):
-        from app.scrapers.base import fetch_with_retry
+    async def test_all_retries_fail(self, mock_sleep):
+        from app.scrapers import base
         page = AsyncMock()
         page.goto = AsyncMock(side_effect=Exception("timeout"))
 
-        result = await fetch_with_retry(page, "https://example.com", max_retries=2)
-        assert result is False
+        with patch.object(base, "get_page", _fake_get_page(page)):
+            async with base.fetch_page("https://example.com/x", max_retries=2) as loaded:
+                assert loaded is None
+        assert page.goto.await_count == 2
 
 
-class TestConfigSettings:
-    """config.py のテスト"""
+class TestSingleFlight:
 
-    def test_cors_origins_list(self):
-        from app.config import settings
-        origins = settings.cors_origins_list
-        assert isinstance(origins, list)
-        assert len(origins) >= 1
-        assert "http://localhost:5173" in origins
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self):
+        """同じキーの同時呼び出しは1回だけ実行され、結果を共有する"""
+        from app.scrapers.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        gate = asyncio.Event()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await gate.wait()
+            return ["result"]
+
+        tasks = [
+            asyncio.create_task(flight.do("search", key, work))
+            for key in ("Switch", " switch ", "SWITCH")
+        ]
+        await asyncio.sleep(0)
+        assert flight.in_flight() == 1
+        gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert runs == 1
+        assert results == [["result"]] * 3
+        assert flight.in_flight() == 0
+        assert flight.stats()["shared"] == 2
+
+    @pytest.mark.asyncio
+    async def test_different_kinds_not_shared(self):
+        from app.scrapers.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        work = AsyncMock(return_value=1)
+        await asyncio.gather(
+            flight.do("detail", "x123", work), flight.do("history", "x123", work)
+        )
+        assert work.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_all_and_clears(self):
+        from app.scrapers.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+            raise RuntimeError("boom")
+
+        tasks = [asyncio.create_task(flight.do("detail", "x1", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """先頭の呼び出し元がキャンセルされても相乗りした側は結果を受け取れる"""
+        from app.scrapers.singleflight import SingleFlight
+
+        flight = SingleFlight()
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+            return "ok"
+
+        first = asyncio.create_task(flight.do("detail", "x1", work))
+        second = asyncio.create_task(flight.do("detail", "x1", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        assert await second == "ok"
+
+
+class TestLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        from app.scrapers.cache import LRUCache
+
+        cache = LRUCache("t", max_entries=2, max_bytes=10**6, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == (1, True)  # a を最近使ったことにする
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        from app.scrapers.cache import LRUCache
+
+        cache = LRUCache("t", max_entries=100, max_bytes=3000, ttl=60)
+        for i in range(10):
+            cache.set(i, "x" * 1000)
+        stats = cache.stats()
+        assert stats["bytes"] <= 3000
+        assert stats["entries"] < 10
+        assert 9 in cache
+        # 1件で予算を超える値は格納しない
+        cache.set("huge", "x" * 10000)
+        assert "huge" not in cache
+
+    def test_fresh_stale_and_expired(self):
+        from app.scrapers.cache import LRUCache
+
+        cache = LRUCache("t", max_entries=10, max_bytes=10**6, ttl=10, stale_ttl=20)
+        with patch("app.scrapers.cache.time.monotonic", return_value=100.0):
+            cache.set("k", "v")
+        with patch("app.scrapers.cache.time.monotonic", return_value=105.0):
+            assert cache.get("k") == ("v", True)
+        with patch("app.scrapers.cache.time.monotonic", return_value=115.0):
+            assert cache.get("k") == ("v", False)
+        with patch("app.scrapers.cache.time.monotonic", return_value=131.0):
+            assert cache.get("k") is None
+        assert len(cache) == 0
+        stats = cache.stats()
+        assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_revalidate_runs_once_per_key(self):
+        from app.scrapers.cache import LRUCache
+
+        cache = LRUCache("t", max_entries=10, max_bytes=10**6, ttl=60)
+        gate = asyncio.Event()
+
+        async def refresh():
+            await gate.wait()
+            cache.set("k", "new")
+
+        cache.revalidate("k", refresh)
+        cache.revalidate("k", refresh)
+        assert cache.stats()["refreshing"] == 1
+        gate.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert cache.get("k") == ("new", True)
+        assert cache.stats()["refreshes"] == 1
+
+
+class TestPersistentCache:
+
+    @pytest.mark.asyncio
+    async def test_round_trip_survives_restart(self, tmp_path):
+        """別インスタンス（=再起動・別ワーカー）からも dataclass として読める"""
+        from app.scrapers.persistent_cache import PersistentCache
+        from app.scrapers.yahoo_detail import AuctionDetail
+
+        path = str(tmp_path / "cache.db")
+        detail = AuctionDetail(
+            auction_id="x1", title="テスト", current_price=1200,
+            end_time=datetime(2030, 1, 2, 21, 0), image_urls=["https://img/1.jpg"],
+        )
+        writer = PersistentCache(path, ttls={"yahoo_detail": 60})
+        await writer.set("yahoo_detail", "X1", detail)
+        writer.close()
+
+        reader = PersistentCache(path, ttls={"yahoo_detail": 60})
+        load = AsyncMock()
+        got = await reader.read_through("yahoo_detail", "x1", AuctionDetail, load)
+        reader.close()
+        assert got == detail
+        load.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_expired_and_failures_not_served(self, tmp_path):
+        from app.scrapers.persistent_cache import PersistentCache
+        from app.scrapers.yahoo_history import HistoryResult
+
+        cache = PersistentCache(str(tmp_path / "cache.db"), ttls={"yahoo_history": 0})
+        await cache.set("yahoo_history", "k", [HistoryResult("a1", "t", 1000, None)])
+        assert await cache.get("yahoo_history", "k") is None
+
+        cache.ttls["yahoo_history"] = 60
+        load = AsyncMock(return_value=[])
+        assert await cache.read_through("yahoo_history", "k", HistoryResult, load, many=True) == []
+        # 空（取得失敗の可能性）は保存しない
+        assert await cache.get("yahoo_history", "k") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_unreadable_entries_are_misses(self, tmp_path):
+        """壊れた行・フィールドが変わる前の形式の行はミス扱いで消し、取得し直す"""
+        import dataclasses
+
+        from app.scrapers.persistent_cache import PersistentCache, normalize_key
+        from app.scrapers.yahoo_detail import AuctionDetail
+
+        cache = PersistentCache(str(tmp_path / "cache.db"), ttls={"yahoo_detail": 60})
+        await cache.set("yahoo_detail", "old", {"auction_id": "x1"})
+        cache._set_sync("yahoo_detail", normalize_key("broken"), b"not zlib", time.time() + 60)
+
+        # 必須フィールドが足りない古い形式は dataclass に戻せない
+        @dataclasses.dataclass
+        class Changed:
+            auction_id: str
+            added: int
+
+        assert await cache.get("yahoo_detail", "old", Changed) is None
+        assert await cache.get("yahoo_detail", "old") is None  # 消えている
+        fresh = AuctionDetail(auction_id="x2", title="t", current_price=1)
+        load = AsyncMock(return_value=fresh)
+        assert await cache.read_through("yahoo_detail", "broken", AuctionDetail, load) == fresh
+        load.assert_awaited_once()
+        assert await cache.get("yahoo_detail", "broken", AuctionDetail) == fresh
+        assert cache.stats()["errors"] == 2
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_refresh_skips_cached_value(self, tmp_path):
+        from app.scrapers.persistent_cache import PersistentCache
+        from app.scrapers.yahoo_detail import AuctionDetail
+
+        cache = PersistentCache(str(tmp_path / "cache.db"), ttls={"yahoo_detail": 60})
+        await cache.set("yahoo_detail", "k", AuctionDetail(auction_id="k", title="t", current_price=1))
+        newer = AuctionDetail(auction_id="k", title="t", current_price=2)
+        load = AsyncMock(return_value=newer)
+        assert await cache.read_through(
+            "yahoo_detail", "k", AuctionDetail, load, refresh=True
+        ) == newer
+        assert await cache.get("yahoo_detail", "k", AuctionDetail) == newer
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_path(self):
+        from app.scrapers.persistent_cache import PersistentCache
+
+        cache = PersistentCache("", ttls={"yahoo_detail": 60})
+        await cache.set("yahoo_detail", "k", {"a": 1})
+        assert await cache.get("yahoo_detail", "k") is None
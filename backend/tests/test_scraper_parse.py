@@ -1,4 +1,6 @@
 """スクレイパーのパース関数テスト（Playwright Page をモック化）"""
+import asyncio
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -28,6 +30,14 @@ def _mock_element(inner_text="", src=None, href=None, attrs=None):
     return el
 
 
+def _fake_fetch_page(page):
+    """fetch_page の代わりに固定のページ（失敗時は None）を渡すコンテキストマネージャ"""
+    @asynccontextmanager
+    async def _fetch_page(url, max_retries=3):
+        yield page
+    return _fetch_page
+
+
 def _mock_page(query_results=None, query_all_results=None):
     """Playwright Page のモック"""
     page = AsyncMock()
@@ -53,31 +63,23 @@ class TestParseSearchResults:
 
     @pytest.mark.asyncio
     async def test_empty_page(self):
-        page = _mock_page(query_all_results=[[]])
+        page = AsyncMock()
+        page.evaluate = AsyncMock(return_value=[])
         results = await parse_search_results(page)
         assert results == []
 
     @pytest.mark.asyncio
     async def test_single_item(self):
-        # li.Product 内の要素をモック
-        link_el = AsyncMock()
-        link_el.get_attribute = AsyncMock(side_effect=lambda name: {
-            "data-auction-id": "abc123",
-            "data-auction-title": "テスト商品",
-            "data-auction-price": "5000",
-        }.get(name))
-
-        item = AsyncMock()
-        item.query_selector = AsyncMock(side_effect=[
-            link_el,  # a.Product__titleLink
-            None,     # .Product__bonus
-            None,     # img.Product__imageData
-            None,     # .Product__time
-            None,     # .Product__bid
-        ])
-
         page = AsyncMock()
-        page.query_selector_all = AsyncMock(return_value=[item])
+        page.evaluate = AsyncMock(return_value=[{
+            "auction_id": "abc123",
+            "title": "テスト商品",
+            "price_str": "5000",
+            "buynow_str": "0",
+            "image_url": None,
+            "end_time_text": "",
+            "bid_text": None,
+        }])
 
         results = await parse_search_results(page)
         assert len(results) == 1
@@ -101,23 +103,43 @@ class TestSearchYahooAuctions:
     """search_yahoo_auctions のテスト"""
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.yahoo_search.get_page")
-    @patch("app.scrapers.yahoo_search.get_browser")
-    @patch("app.scrapers.yahoo_search.fetch_with_retry", new_callable=AsyncMock)
-    async def test_search_failure(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = False
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page_ctx = AsyncMock()
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_ctx)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        results = await search_yahoo_auctions("テスト")
+    async def test_search_failure(self):
+        with patch("app.scrapers.yahoo_search.fetch_page", _fake_fetch_page(None)):
+            results = await search_yahoo_auctions("テスト")
         assert results == []
 
+    @pytest.mark.asyncio
+    async def test_stale_result_served_while_revalidating(self):
+        """TTL切れの結果は即返し、裏で取り直した結果が次回以降に使われる"""
+        from app.scrapers.yahoo_search import _search_cache
+
+        old = [SearchResult("a1", "旧", 1000, None, None, None, None, "u")]
+        new = [SearchResult("a2", "新", 2000, None, None, None, None, "u")]
+        _search_cache.set("テスト", old, ttl=0)
+        fetch = AsyncMock(return_value=new)
+        with patch("app.scrapers.yahoo_search._fetch_search_results", fetch):
+            assert await search_yahoo_auctions("テスト") == old
+            await _search_cache.wait_refreshes()
+            assert await search_yahoo_auctions("テスト") == new
+        assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_revalidation_keeps_stale_result(self):
+        from app.scrapers.yahoo_search import _search_cache
+
+        old = [SearchResult("a1", "旧", 1000, None, None, None, None, "u")]
+        _search_cache.set("テスト", old, ttl=0)
+        fetch = AsyncMock(return_value=None)
+        with patch("app.scrapers.yahoo_search._fetch_search_results", fetch):
+            assert await search_yahoo_auctions("テスト") == old
+            await _search_cache.wait_refreshes()
+            # 失敗直後は古い結果を返し続け、再取得は retry_after まで走らせない
+            assert await search_yahoo_auctions("テスト") == old
+            assert await search_yahoo_auctions("テスト") == old
+            assert _search_cache.stats()["refreshing"] == 0
+            await _search_cache.wait_refreshes()
+        assert fetch.await_count == 1
+
 
 # ========================================
 # Yahoo詳細パース
@@ -129,8 +151,7 @@ class TestParseAuctionDetail:
     async def test_no_title(self):
         """タイトルがない場合はNoneを返す"""
         page = AsyncMock()
-        page.query_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={"title": "", "dls": [], "rows": [], "images": []})
 
         result = await parse_auction_detail(page, "test123")
         assert result is None
@@ -138,43 +159,38 @@ class TestParseAuctionDetail:
     @pytest.mark.asyncio
     async def test_basic_detail(self):
         """基本的な詳細パース"""
-        title_el = AsyncMock()
-        title_el.inner_text = AsyncMock(return_value="  テスト商品タイトル  ")
-
         page = AsyncMock()
-        # query_selector の呼び出し順序: h1, bid, seller
-        page.query_selector = AsyncMock(side_effect=[
-            title_el,  # h1
-            None,      # a[href*='bid_hist']
-            None,      # a[href*='seller']
-        ])
-        # query_selector_all: dl, table tr, img
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={
+            "title": "  テスト商品タイトル  ",
+            "dls": ["現在\n1,000円（税0円）", "即決\n2,000円"],
+            "bid_text": "3件",
+            "seller_text": "出品者",
+            "seller_href": "https://auctions.yahoo.co.jp/seller/abc",
+            "rows": [["終了日時", "2026年2月19日（木）16時16分"]],
+            "images": ["https://auctions.c.yimg.jp/x.jpg"],
+        })
 
         result = await parse_auction_detail(page, "test123")
         assert result is not None
         assert result.title == "テスト商品タイトル"
         assert result.auction_id == "test123"
+        assert result.current_price == 1000
+        assert result.buy_now_price == 2000
+        assert result.bid_count == 3
+        assert result.seller_id == "abc"
+        assert result.end_time.day == 19
+        assert result.image_urls == ["https://auctions.c.yimg.jp/x.jpg"]
+        # DOMへの問い合わせは evaluate 1回だけ
+        page.evaluate.assert_awaited_once()
+        page.query_selector.assert_not_called()
 
 
 class TestGetAuctionDetail:
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.yahoo_detail.get_page")
-    @patch("app.scrapers.yahoo_detail.get_browser")
-    @patch("app.scrapers.yahoo_detail.fetch_with_retry", new_callable=AsyncMock)
-    async def test_fetch_failure(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = False
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page_ctx = AsyncMock()
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_ctx)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        result = await get_auction_detail("test123")
+    async def test_fetch_failure(self):
+        with patch("app.scrapers.yahoo_detail.fetch_page", _fake_fetch_page(None)):
+            result = await get_auction_detail("test123")
         assert result is None
 
 
@@ -187,41 +203,39 @@ class TestParseClosedResults:
     @pytest.mark.asyncio
     async def test_empty_page(self):
         page = AsyncMock()
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value=[])
         results = await parse_closed_results(page)
         assert results == []
 
     @pytest.mark.asyncio
-    async def test_item_without_title_link(self):
-        """タイトルリンクがない項目はスキップ"""
-        item = AsyncMock()
-        item.query_selector = AsyncMock(return_value=None)
-
+    async def test_items_from_single_evaluate(self):
+        """1回のevaluate結果から落札価格のある項目だけを返す"""
         page = AsyncMock()
-        page.query_selector_all = AsyncMock(return_value=[item])
-
+        page.evaluate = AsyncMock(return_value=[
+            {
+                "title": "落札商品",
+                "href": "https://page.auctions.yahoo.co.jp/jp/auction/c123",
+                "price_texts": ["開始 100円", "落札 4,500円"],
+                "time_text": "02/21 16:03",
+                "bid_text": "7",
+            },
+            {"title": "価格なし", "href": "/jp/auction/c456", "price_texts": []},
+            {"title": "リンク不正", "href": "/other", "price_texts": ["落札 1円"]},
+        ])
         results = await parse_closed_results(page)
-        assert results == []
+        assert [r.auction_id for r in results] == ["c123"]
+        assert results[0].winning_price == 4500
+        assert results[0].bid_count == 7
+        page.evaluate.assert_awaited_once()
+        page.query_selector_all.assert_not_called()
 
 
 class TestSearchAuctionHistory:
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.yahoo_history.get_page")
-    @patch("app.scrapers.yahoo_history.get_browser")
-    @patch("app.scrapers.yahoo_history.fetch_with_retry", new_callable=AsyncMock)
-    async def test_fetch_failure(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = False
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page_ctx = AsyncMock()
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_ctx)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        results = await search_auction_history("テスト")
+    async def test_fetch_failure(self):
+        with patch("app.scrapers.yahoo_history.fetch_page", _fake_fetch_page(None)):
+            results = await search_auction_history("テスト")
         assert results == []
 
 
@@ -235,8 +249,7 @@ class TestParseProductPage:
     async def test_empty_page(self):
         """空のページでもクラッシュしない"""
         page = AsyncMock()
-        page.query_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={})
 
         product = await _parse_product_page(page, "B09TEST123")
         assert product.asin == "B09TEST123"
@@ -245,28 +258,48 @@ class TestParseProductPage:
 
     @pytest.mark.asyncio
     async def test_with_title_and_price(self):
-        """タイトルと価格が取得できるケース"""
-        title_el = AsyncMock()
-        title_el.inner_text = AsyncMock(return_value="テストAmazon商品")
-
-        price_el = AsyncMock()
-        price_el.inner_text = AsyncMock(return_value="￥5,980")
-
+        """タイトルと価格が取得できるケース（最初に数値が取れた価格セレクタを採用）"""
         page = AsyncMock()
-        call_count = [0]
-        def query_selector_side_effect(selector):
-            if "#productTitle" in selector:
-                return title_el
-            if "a-offscreen" in selector or "a-price" in selector:
-                return price_el
-            return None
-
-        page.query_selector = AsyncMock(side_effect=query_selector_side_effect)
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={
+            "title": "テストAmazon商品",
+            "price_texts": [None, "", "￥5,980", "￥6,000", None],
+            "byline": "テストブランドのストアを表示",
+            "detail_rows": ["メーカー\tテスト", "型番\tAB-123"],
+            "breadcrumbs": ["ホーム", "ゲーム"],
+        })
 
         product = await _parse_product_page(page, "B09TEST123")
         assert product.title == "テストAmazon商品"
         assert product.price == 5980
+        assert product.brand == "テストブランド"
+        assert product.model_number == "AB-123"
+        assert product.category == "ゲーム"
+        page.evaluate.assert_awaited_once()
+        page.query_selector.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_structured_data_fallback(self):
+        """価格ブロックが無ければ JSON-LD → twister の順で補う"""
+        page = AsyncMock()
+        page.evaluate = AsyncMock(return_value={
+            "price_texts": [None] * 5,
+            "json_ld": [{"@graph": [{
+                "@type": "Product", "name": "LD商品", "mpn": "LD-1",
+                "brand": {"@type": "Brand", "name": "LDブランド"},
+                "offers": {"@type": "Offer", "price": "12800.00"},
+            }]}],
+            "twister_price": "9999.0",
+        })
+
+        product = await _parse_product_page(page, "B09TEST123")
+        assert product.title == "LD商品"
+        assert product.price == 12800
+        assert product.brand == "LDブランド"
+        assert product.model_number == "LD-1"
+
+        page.evaluate = AsyncMock(return_value={"twister_price": "9999.0"})
+        product = await _parse_product_page(page, "B09TEST123")
+        assert product.price == 9999
 
 
 class TestParseOffersPage:
@@ -275,8 +308,7 @@ class TestParseOffersPage:
     async def test_empty_page(self):
         """出品者がいない場合"""
         page = AsyncMock()
-        page.query_selector = AsyncMock(return_value=None)
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={"pinned_price_text": None, "offers": []})
 
         offers = await _parse_offers_page(page)
         assert offers == []
@@ -284,19 +316,8 @@ class TestParseOffersPage:
     @pytest.mark.asyncio
     async def test_pinned_offer(self):
         """pinnedオファー（Amazon販売）がある場合"""
-        pinned_price = AsyncMock()
-        pinned_price.inner_text = AsyncMock(return_value="￥4,980")
-
-        pinned = AsyncMock()
-        pinned.query_selector = AsyncMock(return_value=pinned_price)
-
         page = AsyncMock()
-        def query_selector_side_effect(selector):
-            if "#aod-pinned-offer" in selector:
-                return pinned
-            return None
-        page.query_selector = AsyncMock(side_effect=query_selector_side_effect)
-        page.query_selector_all = AsyncMock(return_value=[])
+        page.evaluate = AsyncMock(return_value={"pinned_price_text": "￥4,980", "offers": []})
 
         offers = await _parse_offers_page(page)
         assert len(offers) == 1
@@ -304,70 +325,59 @@ class TestParseOffersPage:
         assert offers[0].seller_name == "Amazon.co.jp"
         assert offers[0].is_fba is True
 
+    @pytest.mark.asyncio
+    async def test_offer_cards(self):
+        page = AsyncMock()
+        page.evaluate = AsyncMock(return_value={
+            "pinned_price_text": None,
+            "offers": [
+                {
+                    "price_text": "￥3,500",
+                    "condition_text": "中古品 - 良い",
+                    "seller_text": "ショップA",
+                    "shipping_text": "配送料 ￥350",
+                    "fulfillment_text": "Amazon.co.jpが発送します",
+                },
+                {"price_text": None},
+            ],
+        })
+
+        offers = await _parse_offers_page(page)
+        assert len(offers) == 1
+        assert offers[0].condition == "中古"
+        assert offers[0].shipping_cost == 350
+        assert offers[0].is_fba is True
+        page.evaluate.assert_awaited_once()
+
 
 class TestGetAmazonProduct:
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.amazon_product.get_page")
-    @patch("app.scrapers.amazon_product.get_browser")
-    @patch("app.scrapers.amazon_product.fetch_with_retry", new_callable=AsyncMock)
-    async def test_fetch_failure(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = False
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page_ctx = AsyncMock()
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_ctx)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        result = await get_amazon_product("B09TEST123")
+    async def test_fetch_failure(self):
+        with patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(None)):
+            result = await get_amazon_product("B09TEST123")
         assert result is None
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.amazon_product.get_page")
-    @patch("app.scrapers.amazon_product.get_browser")
-    @patch("app.scrapers.amazon_product.fetch_with_retry", new_callable=AsyncMock)
-    async def test_captcha_detected(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = True
+    async def test_captcha_detected(self):
         captcha_el = AsyncMock()
         mock_page_obj = AsyncMock()
         mock_page_obj.query_selector = AsyncMock(return_value=captcha_el)
         mock_page_obj.query_selector_all = AsyncMock(return_value=[])
 
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_obj)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        result = await get_amazon_product("B09TEST123")
+        with patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(mock_page_obj)):
+            result = await get_amazon_product("B09TEST123")
         assert result is None
 
     @pytest.mark.asyncio
     @patch("app.scrapers.amazon_product._parse_product_page", new_callable=AsyncMock)
-    @patch("app.scrapers.amazon_product.get_page")
-    @patch("app.scrapers.amazon_product.get_browser")
-    @patch("app.scrapers.amazon_product.fetch_with_retry", new_callable=AsyncMock)
-    async def test_success(self, mock_fetch, mock_browser, mock_page, mock_parse):
-        mock_fetch.return_value = True
+    async def test_success(self, mock_parse):
         mock_page_obj = AsyncMock()
         mock_page_obj.query_selector = AsyncMock(return_value=None)  # no captcha
-
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_obj)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
         mock_parse.return_value = AmazonProduct(asin="B09TEST123", title="テスト")
 
-        result = await get_amazon_product("B09TEST123")
+        with patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(mock_page_obj)):
+            result = await get_amazon_product("B09TEST123")
         assert result is not None
         assert result.title == "テスト"
 
@@ -375,41 +385,347 @@ class TestGetAmazonProduct:
 class TestGetCompetitorOffers:
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.amazon_product.get_page")
-    @patch("app.scrapers.amazon_product.get_browser")
-    @patch("app.scrapers.amazon_product.fetch_with_retry", new_callable=AsyncMock)
-    async def test_fetch_failure(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = False
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page_ctx = AsyncMock()
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_ctx)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        result = await get_competitor_offers("B09TEST123")
+    async def test_fetch_failure(self):
+        with patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(None)):
+            result = await get_competitor_offers("B09TEST123")
         assert result == []
 
     @pytest.mark.asyncio
-    @patch("app.scrapers.amazon_product.get_page")
-    @patch("app.scrapers.amazon_product.get_browser")
-    @patch("app.scrapers.amazon_product.fetch_with_retry", new_callable=AsyncMock)
-    async def test_captcha_detected(self, mock_fetch, mock_browser, mock_page):
-        mock_fetch.return_value = True
+    async def test_captcha_detected(self):
         captcha_el = AsyncMock()
         mock_page_obj = AsyncMock()
         mock_page_obj.query_selector = AsyncMock(return_value=captcha_el)
         mock_page_obj.query_selector_all = AsyncMock(return_value=[])
 
-        mock_browser_ctx = AsyncMock()
-        mock_browser.__aenter__ = AsyncMock(return_value=mock_browser_ctx)
-        mock_browser.__aexit__ = AsyncMock(return_value=False)
-        mock_page.__aenter__ = AsyncMock(return_value=mock_page_obj)
-        mock_page.__aexit__ = AsyncMock(return_value=False)
-        mock_browser.return_value = mock_browser
-        mock_page.return_value = mock_page
-
-        result = await get_competitor_offers("B09TEST123")
+        with patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(mock_page_obj)):
+            result = await get_competitor_offers("B09TEST123")
         assert result == []
+
+# ========================================
+# HTTP取得 + HTMLパース（ブラウザ不要経路）
+# ========================================
+
+_SEARCH_HTML = """
+<html><body><ul>
+<li class="Product">
+  <a class="Product__imageLink" data-auction-id="x111" data-auction-title="テスト商品A"
+     data-auction-price="5,000"><img class="Product__imageData" src="https://img/a.jpg"></a>
+  <div class="Product__bonus" data-auction-buynowprice="8000"></div>
+  <span class="Product__time">3日</span>
+  <a class="Product__bid">12</a>
+</li>
+<li class="Product Product--ad"><span>広告</span></li>
+</ul></body></html>
+"""
+
+_DETAIL_HTML = """
+<html><body>
+<h1> テスト詳細商品 </h1>
+<dl><dt>現在</dt><dd>1,200円（税0円）</dd></dl>
+<dl><dt>即決</dt><dd>3,000円</dd></dl>
+<dl>
+  <dt>カテゴリ</dt><dd><a>家電</a></dd>
+  <dt>ブランド</dt><dd>ソニー</dd>
+  <dt>商品の状態</dt><dd>目立った傷や汚れなし</dd>
+</dl>
+<dl><dt>送料</dt><dd>落札者負担</dd></dl>
+<a href="https://auctions.yahoo.co.jp/jp/show/bid_hist?aID=x1">5件</a>
+<a href="https://auctions.yahoo.co.jp/seller/seller_abc?x=1">出品者ABC</a>
+<table>
+  <tr><th>開始時の価格</th><td>1円</td></tr>
+  <tr><th>開始日時</th><td>2026年2月12日（木）20時0分</td></tr>
+  <tr><th>終了日時</th><td>2026年2月19日（木）16時16分</td></tr>
+</table>
+<img alt="商品_画像1" src="https://auctions.c.yimg.jp/a.jpg">
+<img alt="商品_画像1" src="https://auctions.c.yimg.jp/a.jpg">
+<img alt="ロゴ" src="https://s.yimg.jp/logo.png">
+</body></html>
+"""
+
+_CLOSED_HTML = """
+<html><body><ul>
+<li class="Product">
+  <a class="Product__titleLink" href="https://page.auctions.yahoo.co.jp/jp/auction/c123">落札商品</a>
+  <span class="Product__price"><span>開始</span> 100円</span>
+  <span class="Product__price"><span>落札</span> 4,500円</span>
+  <span class="Product__time">02/21 16:03</span>
+  <a class="Product__bid">7</a>
+</li>
+<li class="Product">
+  <a class="Product__titleLink" href="https://page.auctions.yahoo.co.jp/jp/auction/c456">価格なし</a>
+</li>
+</ul></body></html>
+"""
+
+
+class TestParseHtml:
+    """ブラウザを使わないHTMLパーサーのテスト"""
+
+    def test_search_html(self):
+        from app.scrapers.yahoo_search import parse_search_html
+        results = parse_search_html(_SEARCH_HTML)
+        assert len(results) == 1
+        r = results[0]
+        assert r.auction_id == "x111"
+        assert r.current_price == 5000
+        assert r.buy_now_price == 8000
+        assert r.image_url == "https://img/a.jpg"
+        assert r.bid_count == 12
+        assert r.end_time_text == "3日"
+
+    def test_search_html_without_markup(self):
+        from app.scrapers.yahoo_search import parse_search_html
+        assert parse_search_html("<html><body>アクセスが集中しています</body></html>") is None
+
+    def test_detail_html(self):
+        from datetime import datetime
+
+        from app.scrapers.yahoo_detail import parse_auction_detail_html
+        d = parse_auction_detail_html(_DETAIL_HTML, "x1")
+        assert d.title == "テスト詳細商品"
+        assert d.current_price == 1200
+        assert d.buy_now_price == 3000
+        assert d.bid_count == 5
+        assert d.seller_id == "seller_abc"
+        assert d.start_price == 1
+        assert d.end_time == datetime(2026, 2, 19, 16, 16)
+        assert d.category == "家電"
+        assert d.brand == "ソニー"
+        assert d.condition == "目立った傷や汚れなし"
+        assert d.shipping_info == "落札者負担"
+        assert d.image_urls == ["https://auctions.c.yimg.jp/a.jpg"]
+
+    def test_detail_html_without_title(self):
+        from app.scrapers.yahoo_detail import parse_auction_detail_html
+        assert parse_auction_detail_html("<html><body></body></html>", "x1") is None
+
+    def test_price_probe_html(self):
+        from datetime import datetime
+        from app.scrapers.yahoo_detail import parse_auction_price_html
+        p = parse_auction_price_html(_DETAIL_HTML, "x1")
+        assert p.current_price == 1200
+        assert p.buy_now_price == 3000
+        assert p.bid_count == 5
+        assert p.end_time == datetime(2026, 2, 19, 16, 16)
+        assert p.ended is False
+
+        ended_html = _DETAIL_HTML.replace(
+            "<body>", "<body><p>このオークションは終了しています</p>"
+        )
+        assert parse_auction_price_html(ended_html, "x1").ended is True
+        assert parse_auction_price_html("<html><body></body></html>", "x1") is None
+
+    def test_closed_html(self):
+        from app.scrapers.yahoo_history import parse_closed_html
+        results = parse_closed_html(_CLOSED_HTML)
+        assert len(results) == 1
+        assert results[0].auction_id == "c123"
+        assert results[0].winning_price == 4500
+        assert results[0].bid_count == 7
+        assert results[0].end_date.month == 2
+
+
+_NO_HIT_HTML = """
+<html><body>
+<div class="Result"><p>条件に一致する商品はありません。</p></div>
+</body></html>
+"""
+
+
+class TestHttpFirstFetch:
+    """HTTP優先取得とブラウザへのフォールバック"""
+
+    @pytest.mark.asyncio
+    async def test_detail_uses_http_without_browser(self, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        browser = MagicMock(side_effect=AssertionError("browser must not be used"))
+        with patch("app.scrapers.yahoo_detail.fetch_html", AsyncMock(return_value=_DETAIL_HTML)), \
+                patch("app.scrapers.yahoo_detail.fetch_page", browser):
+            result = await get_auction_detail("x1")
+        assert result.current_price == 1200
+
+    @pytest.mark.asyncio
+    async def test_history_falls_back_to_browser(self, monkeypatch):
+        """結果一覧も0件の案内も無いページ（ブロック等）はブラウザで取り直す"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        page = AsyncMock()
+        page.evaluate = AsyncMock(return_value=[])
+        blocked = "<html><body><p>アクセスが集中しています</p></body></html>"
+        with patch("app.scrapers.yahoo_history.fetch_html", AsyncMock(return_value=blocked)), \
+                patch("app.scrapers.yahoo_history.fetch_page", _fake_fetch_page(page)):
+            results = await search_auction_history("テスト")
+        assert results == []
+        page.evaluate.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_zero_hit_page_skips_browser(self, monkeypatch):
+        """0件の結果ページはそのまま [] を返し、ブラウザを起動しない"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        browser = MagicMock(side_effect=AssertionError("browser must not be used"))
+        with patch("app.scrapers.yahoo_search.fetch_html", AsyncMock(return_value=_NO_HIT_HTML)), \
+                patch("app.scrapers.yahoo_search.fetch_page", browser), \
+                patch("app.scrapers.yahoo_history.fetch_html", AsyncMock(return_value=_NO_HIT_HTML)), \
+                patch("app.scrapers.yahoo_history.fetch_page", browser):
+            assert await search_yahoo_auctions("存在しない商品") == []
+            assert await search_auction_history("存在しない商品") == []
+
+    @pytest.mark.asyncio
+    async def test_history_pagination_stops_on_short_page(self):
+        page1 = [HistoryResult("a0", "t", 1000, None), HistoryResult("a1", "t", 1000, None)]
+        page2 = [HistoryResult("a1", "t", 1000, None)]  # 重複は除外される
+        fetch = AsyncMock(side_effect=[(page1, 2), (page2, 1)])
+        with patch("app.scrapers.yahoo_history._fetch_closed_page", fetch):
+            results = await search_auction_history("テスト", count=2, pages=5)
+        assert [r.auction_id for r in results] == ["a0", "a1"]
+        # 2ページ目が count 件未満なのでそこで打ち切り
+        assert fetch.await_count == 2
+        assert "b=3&n=2" in fetch.await_args_list[1].args[0]
+
+    @pytest.mark.asyncio
+    async def test_history_filtered_item_does_not_stop_pagination(self, monkeypatch):
+        """落札価格の無い項目で結果が count 未満になっても、商品数が count 件なら次ページへ進む"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+
+        def closed_item(auction_id, price_label):
+            return (
+                f'<li class="Product"><a class="Product__titleLink" '
+                f'href="https://page.auctions.yahoo.co.jp/jp/auction/{auction_id}">商品</a>'
+                f'<span class="Product__price">{price_label} 1,000円</span></li>'
+            )
+
+        page1 = f"<html><body><ul>{closed_item('a0', '落札')}{closed_item('a1', '開始')}</ul></body></html>"
+        page2 = f"<html><body><ul>{closed_item('a2', '落札')}</ul></body></html>"
+        fetch = AsyncMock(side_effect=[page1, page2])
+        with patch("app.scrapers.yahoo_history.fetch_html", fetch):
+            results = await search_auction_history("テスト", count=2, pages=5)
+        assert [r.auction_id for r in results] == ["a0", "a2"]
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_detail_read_from_persistent_cache(self, monkeypatch, tmp_path):
+        """永続キャッシュにある詳細はページを読まずに返す"""
+        from app.config import settings
+        from app.scrapers.persistent_cache import scrape_cache
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        monkeypatch.setattr(scrape_cache, "path", str(tmp_path / "cache.db"))
+        fetch = AsyncMock(return_value=_DETAIL_HTML)
+        try:
+            with patch("app.scrapers.yahoo_detail.fetch_html", fetch):
+                first = await get_auction_detail("x1")
+                second = await get_auction_detail("x1")
+        finally:
+            scrape_cache.close()
+        assert fetch.await_count == 1
+        assert second == first
+
+    @pytest.mark.asyncio
+    async def test_concurrent_detail_requests_share_one_fetch(self, monkeypatch):
+        """同じオークションIDの同時取得はページ読み込み1回にまとまる"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+
+        async def slow_fetch(url):
+            await asyncio.sleep(0.01)
+            return _DETAIL_HTML
+
+        fetch = AsyncMock(side_effect=slow_fetch)
+        with patch("app.scrapers.yahoo_detail.fetch_html", fetch):
+            results = await asyncio.gather(
+                get_auction_detail("x1"), get_auction_detail("x1")
+            )
+        assert fetch.await_count == 1
+        assert results[0] is results[1]
+
+
+_AMAZON_PRODUCT_HTML = """
+<html><body>
+<div id="wayfinding-breadcrumbs_feature_div"><ul>
+  <li><a>家電＆カメラ</a></li><li><a>テレビ</a></li>
+</ul></div>
+<span id="productTitle">  テストTV 32型  </span>
+<a id="bylineInfo">ブランド: テストブランド</a>
+<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">￥29,800</span></span></div>
+<img id="landingImage" src="https://m.media-amazon.com/s.jpg" data-old-hires="https://m.media-amazon.com/l.jpg">
+<span id="acrPopover"><span class="a-icon-alt">4.3 out of 5 stars</span></span>
+<span id="acrCustomerReviewText">1,234個の評価</span>
+<table id="productDetails_techSpec_section_1">
+  <tr><th>メーカー</th><td>テスト</td></tr>
+  <tr><th>型番</th><td>TV-32X</td></tr>
+</table>
+</body></html>
+"""
+
+_AMAZON_OFFERS_HTML = """
+<html><body>
+<div id="aod-pinned-offer"><span class="a-price"><span class="a-offscreen">￥4,980</span></span></div>
+<div id="aod-offer">
+  <span class="a-offscreen">￥3,500</span>
+  <div id="aod-offer-heading"><h5>中古品 - 良い</h5></div>
+  <div id="aod-offer-shippingMessage"><span class="a-color-base">配送料 ￥350</span></div>
+  <div id="aod-offer-soldBy"><a>テストショップ</a></div>
+</div>
+</body></html>
+"""
+
+
+class TestParseAmazonHtml:
+    """Amazon HTMLパーサー（ブラウザ不要経路）のテスト"""
+
+    def test_product_html(self):
+        from app.scrapers.amazon_product import parse_product_html
+        p = parse_product_html(_AMAZON_PRODUCT_HTML, "B09TEST123")
+        assert p.title == "テストTV 32型"
+        assert p.price == 29800
+        assert p.brand == "テストブランド"
+        assert p.model_number == "TV-32X"
+        assert p.category == "テレビ"
+        assert p.image_url == "https://m.media-amazon.com/l.jpg"
+        assert p.rating == 4.3
+        assert p.review_count == 1234
+
+    def test_product_html_captcha(self):
+        from app.scrapers.amazon_product import parse_product_html
+        html = "<form action='/errors/validateCaptcha'><input id='captchacharacters'></form>"
+        assert parse_product_html(html, "B09TEST123") is None
+
+    def test_offers_html(self):
+        from app.scrapers.amazon_product import parse_offers_html
+        offers = parse_offers_html(_AMAZON_OFFERS_HTML)
+        assert len(offers) == 2
+        assert offers[0].seller_name == "Amazon.co.jp"
+        assert offers[0].price == 4980
+        assert offers[1].price == 3500
+        assert offers[1].condition == "中古"
+        assert offers[1].shipping_cost == 350
+        assert offers[1].seller_name == "テストショップ"
+
+    @pytest.mark.asyncio
+    async def test_captcha_over_http_falls_back_to_browser(self, monkeypatch):
+        from app.config import settings
+        from app.scrapers.ratelimit import rate_limiter
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        captcha_html = "<form action='/errors/validateCaptcha'></form>"
+        with patch("app.scrapers.amazon_product.fetch_html", AsyncMock(return_value=captcha_html)), \
+                patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(None)) as _:
+            result = await get_amazon_product("B09TEST123")
+        assert result is None
+        # HTTPのお試し取得が弾かれただけではブラウザ経路のレートは下げない
+        assert "amazon.co.jp" not in rate_limiter.stats()
+
+    @pytest.mark.asyncio
+    async def test_repeated_http_blocks_pause_http_probe(self, monkeypatch):
+        """HTTP取得が連続で弾かれたら一定時間はHTTPを試さずブラウザへ直行する"""
+        from app.config import settings
+        monkeypatch.setattr(settings, "scrape_http_first", True)
+        monkeypatch.setattr(settings, "amazon_http_probe_max_blocks", 2)
+        captcha_html = "<form action='/errors/validateCaptcha'></form>"
+        fetch = AsyncMock(return_value=captcha_html)
+        with patch("app.scrapers.amazon_product.fetch_html", fetch), \
+                patch("app.scrapers.amazon_product.fetch_page", _fake_fetch_page(None)):
+            for asin in ("B000000001", "B000000002", "B000000003"):
+                await get_amazon_product(asin)
+        assert fetch.await_count == 2
@@ -0,0 +1,203 @@
+"""スナップショットの集約・グラフ用の点列のテスト"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Auction, PriceSnapshot, PriceSnapshotRollup, Product, ProductAuctionLink
+from app.services.snapshot_retention import (
+    bucket_start,
+    compact_snapshots,
+    load_snapshot_series,
+    series_resolution,
+)
+from tests.conftest import _test_session_factory
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+@pytest.fixture
+def retention_db():
+    with patch("app.services.snapshot_retention.async_session", _test_session_factory):
+        yield _test_session_factory
+
+
+async def _seed_link(session_factory) -> int:
+    async with session_factory() as db:
+        product = Product(asin="B000000001", title="テスト商品")
+        auction = Auction(auction_id="a1", title="テスト", status="active")
+        db.add_all([product, auction])
+        await db.flush()
+        link = ProductAuctionLink(product_id=product.id, auction_id=auction.id)
+        db.add(link)
+        await db.commit()
+        return link.id
+
+
+async def _add_snapshots(session_factory, link_id, rows):
+    """rows: [(captured_at, yahoo_price), ...]"""
+    async with session_factory() as db:
+        for captured_at, yahoo in rows:
+            db.add(PriceSnapshot(
+                link_id=link_id, yahoo_price=yahoo, amazon_price=20000,
+                profit_rate=10.0, captured_at=captured_at, last_seen_at=captured_at,
+            ))
+        await db.commit()
+
+
+async def _load(session_factory, model):
+    async with session_factory() as db:
+        return (await db.execute(select(model))).scalars().all()
+
+
+def test_bucket_start():
+    dt = datetime(2026, 6, 1, 12, 34, 56)
+    assert bucket_start(dt, "hour") == datetime(2026, 6, 1, 12, 0)
+    assert bucket_start(dt, "day") == datetime(2026, 6, 1)
+
+
+def test_series_resolution():
+    assert series_resolution(7) == "raw"
+    assert series_resolution(30) == "hour"
+    assert series_resolution(365) == "day"
+
+
+@pytest.mark.asyncio
+async def test_compact_raw_into_hourly(retention_db):
+    """保持期間を過ぎた生の行は時間単位の min/max/close になり、最新行は残る"""
+    link_id = await _seed_link(retention_db)
+    old = NOW - timedelta(days=10)
+    hour = bucket_start(old, "hour")
+    await _add_snapshots(retention_db, link_id, [
+        (hour + timedelta(minutes=5), 5000),
+        (hour + timedelta(minutes=20), 7000),
+        (hour + timedelta(minutes=40), 6000),
+        (NOW - timedelta(hours=1), 6500),
+    ])
+
+    stats = await compact_snapshots(NOW)
+
+    assert stats["raw"] == 3
+    assert len(await _load(retention_db, PriceSnapshot)) == 1
+    (rollup,) = await _load(retention_db, PriceSnapshotRollup)
+    assert rollup.resolution == "hour"
+    assert rollup.bucket_start == hour
+    assert (rollup.yahoo_min, rollup.yahoo_max, rollup.yahoo_close) == (5000, 7000, 6000)
+    assert rollup.samples == 3
+
+
+@pytest.mark.asyncio
+async def test_compact_keeps_latest_row(retention_db):
+    """変化の判定に使うので、古くても監視ごとの最新行は残す"""
+    link_id = await _seed_link(retention_db)
+    await _add_snapshots(retention_db, link_id, [(NOW - timedelta(days=30), 5000)])
+
+    await compact_snapshots(NOW)
+
+    assert len(await _load(retention_db, PriceSnapshot)) == 1
+    assert await _load(retention_db, PriceSnapshotRollup) == []
+
+
+@pytest.mark.asyncio
+async def test_compact_hourly_into_daily(retention_db):
+    """時間単位の集約は保持期間を過ぎると日単位にまとまる"""
+    link_id = await _seed_link(retention_db)
+    day = bucket_start(NOW - timedelta(days=100), "day")
+    await _add_snapshots(retention_db, link_id, [
+        (day + timedelta(hours=1), 4000),
+        (day + timedelta(hours=3), 9000),
+        (day + timedelta(hours=5), 5000),
+        (NOW, 6000),
+    ])
+
+    await compact_snapshots(NOW)
+
+    (rollup,) = await _load(retention_db, PriceSnapshotRollup)
+    assert rollup.resolution == "day"
+    assert rollup.bucket_start == day
+    assert (rollup.yahoo_min, rollup.yahoo_max, rollup.yahoo_close) == (4000, 9000, 5000)
+    assert rollup.samples == 3
+
+
+@pytest.mark.asyncio
+async def test_series_combines_rollups_and_raw(retention_db):
+    """長い期間は日単位の点にまとめ、集約済みの区間と生の行をつなげる"""
+    link_id = await _seed_link(retention_db)
+    day = bucket_start(NOW - timedelta(days=100), "day")
+    await _add_snapshots(retention_db, link_id, [
+        (day + timedelta(hours=1), 4000),
+        (day + timedelta(hours=5), 5000),
+        (NOW - timedelta(hours=3), 6000),
+        (NOW - timedelta(hours=1), 6500),
+    ])
+    await compact_snapshots(NOW)
+
+    async with retention_db() as db:
+        points = await load_snapshot_series(db, link_id, 365, now=NOW)
+
+    assert [(p.at, p.yahoo_price) for p in points] == [
+        (day, 5000),
+        (bucket_start(NOW, "day"), 6500),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_series_raw_extends_to_last_seen(retention_db):
+    """生の粒度では最新の値を last_seen_at まで延ばす"""
+    link_id = await _seed_link(retention_db)
+    await _add_snapshots(retention_db, link_id, [(NOW - timedelta(hours=5), 5000)])
+    async with retention_db() as db:
+        latest = (await db.execute(select(PriceSnapshot))).scalar_one()
+        latest.last_seen_at = NOW
+        await db.commit()
+
+    async with retention_db() as db:
+        points = await load_snapshot_series(db, link_id, 7, now=NOW)
+
+    assert [(p.at, p.yahoo_price) for p in points] == [
+        (NOW - timedelta(hours=5), 5000),
+        (NOW, 5000),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("days", [1, 7, 30, 365])
+async def test_series_stable_price_covers_window(retention_db, days):
+    """表示期間より前から価格が変わらない監視でも、期間の始まりから last_seen_at まで点を出す"""
+    link_id = await _seed_link(retention_db)
+    await _add_snapshots(retention_db, link_id, [(NOW - timedelta(days=10), 5000)])
+    async with retention_db() as db:
+        latest = (await db.execute(select(PriceSnapshot))).scalar_one()
+        latest.last_seen_at = NOW
+        await db.commit()
+
+    async with retention_db() as db:
+        points = await load_snapshot_series(db, link_id, days, now=NOW)
+
+    since = NOW - timedelta(days=days)
+    resolution = series_resolution(days)
+    first = since if days < 10 else NOW - timedelta(days=10)
+    assert [p.yahoo_price for p in points] == [5000, 5000]
+    assert points[0].at == bucket_start(first, resolution)
+    assert points[-1].at == bucket_start(NOW, resolution)
+
+
+@pytest.mark.asyncio
+async def test_series_carries_in_rollup_value(retention_db):
+    """期間より前の値が集約済みなら、その close を期間の始まりの点にする"""
+    link_id = await _seed_link(retention_db)
+    await _add_snapshots(retention_db, link_id, [
+        (NOW - timedelta(days=20), 4000),
+        (NOW - timedelta(days=12), 4500),
+        (NOW - timedelta(hours=2), 6000),
+    ])
+    await compact_snapshots(NOW)
+
+    async with retention_db() as db:
+        points = await load_snapshot_series(db, link_id, 7, now=NOW)
+
+    assert [(p.at, p.yahoo_price) for p in points] == [
+        (NOW - timedelta(days=7), 4500),
+        (NOW - timedelta(hours=2), 6000),
+    ]
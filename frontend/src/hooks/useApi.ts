@@ -10,6 +10,8 @@ import type {
   NotificationListResponse,
   PriceDiffResponse,
   PricingResult,
+  RunNowResponse,
+  SchedulerRun,
   SchedulerStatus,
   SearchResult,
   SnapshotPoint,
@@ -38,9 +40,9 @@ const api = {
   getDetail: (auctionId: string) =>
     fetchJson<AuctionDetail>(`${API}/yahoo/detail/${auctionId}`),
 
-  getHistory: (keyword: string, count = 50) =>
+  getHistory: (keyword: string, count = 100, pages = 1) =>
     fetchJson<HistoryResponse>(
-      `${API}/yahoo/history?keyword=${encodeURIComponent(keyword)}&count=${count}`
+      `${API}/yahoo/history?keyword=${encodeURIComponent(keyword)}&count=${count}&pages=${pages}`
     ),
 
   // Monitor
@@ -251,9 +253,12 @@ const api = {
     }),
 
   runSchedulerNow: () =>
-    fetchJson<{ detail: string }>(`${API}/scheduler/run-now`, {
+    fetchJson<RunNowResponse>(`${API}/scheduler/run-now`, {
       method: "POST",
     }),
+
+  getSchedulerRun: (runId: string) =>
+    fetchJson<SchedulerRun>(`${API}/scheduler/runs/${runId}`),
 };
 
 export function useApi() {
@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useApi } from "../hooks/useApi";
 import { ConfirmDialog } from "../components/ConfirmDialog";
-import type { SchedulerStatus } from "../types";
+import type { SchedulerRun, SchedulerStatus } from "../types";
 
 interface FeeRate {
   category: string;
@@ -15,11 +15,19 @@ const DEFAULT_FEE_RATES: FeeRate[] = [
   { category: "その他", rate: 15 },
 ];
 
+const RUN_STATUS_LABELS: Record<SchedulerRun["status"], string> = {
+  queued: "待機中",
+  running: "実行中",
+  done: "完了",
+  failed: "失敗",
+};
+
 export function Settings() {
   const api = useApi();
   const [schedulerStatus, setSchedulerStatus] = useState<SchedulerStatus | null>(null);
   const [schedulerLoading, setSchedulerLoading] = useState(false);
   const [schedulerError, setSchedulerError] = useState("");
+  const [run, setRun] = useState<SchedulerRun | null>(null);
   const [showResetConfirm, setShowResetConfirm] = useState(false);
 
   useEffect(() => {
@@ -43,17 +51,33 @@ export function Settings() {
     setSchedulerLoading(false);
   };
 
+  // 実行中の run の進捗を数秒ごとに取得（終わったら止める）
+  const runId = run?.id;
+  // queued = ジョブキューに積まれてワーカー待ち
+  const runActive = run?.status === "running" || run?.status === "queued";
+  useEffect(() => {
+    if (!runId || !runActive) return;
+    const timer = setInterval(() => {
+      api
+        .getSchedulerRun(runId)
+        .then(setRun)
+        .catch(() => null);
+    }, 2000);
+    return () => clearInterval(timer);
+  }, [api, runId, runActive]);
+
   const runNow = async () => {
-    setSchedulerLoading(true);
     setSchedulerError("");
     try {
-      await api.runSchedulerNow();
-      const status = await api.getSchedulerStatus();
-      setSchedulerStatus(status);
+      const res = await api.runSchedulerNow();
+      if (res.run_id) {
+        setRun(await api.getSchedulerRun(res.run_id));
+      } else if (res.already_running) {
+        setSchedulerError("別のプロセスで実行中です");
+      }
     } catch (err) {
       setSchedulerError(err instanceof Error ? err.message : "実行に失敗しました");
     }
-    setSchedulerLoading(false);
   };
 
   const [feeRates, setFeeRates] = useState<FeeRate[]>(() => {
@@ -234,7 +258,15 @@ export function Settings() {
                 </span>
               </div>
               <div style={{ marginBottom: 8 }}>
-                <strong>チェック間隔:</strong> {schedulerStatus.interval_minutes}分
+                <strong>チェック間隔:</strong> {schedulerStatus.min_interval_minutes}〜
+                {schedulerStatus.max_interval_minutes}分（終了時刻・価格の動きに応じて調整、
+                {schedulerStatus.tick_seconds}秒ごとに期限の来た件を確認）
+              </div>
+              <div style={{ marginBottom: 8 }}>
+                <strong>実行プロセス:</strong>{" "}
+                {schedulerStatus.leader
+                  ? `${schedulerStatus.leader.owner}${schedulerStatus.is_leader ? "（このプロセス）" : ""}`
+                  : "なし"}
               </div>
               {schedulerStatus.next_run && (
                 <div style={{ marginBottom: 12 }}>
@@ -260,11 +292,19 @@ export function Settings() {
                   type="button"
                   className="btn btn-secondary"
                   onClick={runNow}
-                  disabled={schedulerLoading}
+                  disabled={schedulerLoading || runActive}
                 >
-                  今すぐ実行
+                  {runActive ? "実行中..." : "今すぐ実行"}
                 </button>
               </div>
+              {run && (
+                <div style={{ marginTop: 12 }}>
+                  <strong>{RUN_STATUS_LABELS[run.status]}:</strong>{" "}
+                  {run.done}/{run.total}件
+                  {run.failed > 0 && `（失敗 ${run.failed}件）`}
+                  {run.eta_seconds != null && ` 残り約${Math.ceil(run.eta_seconds)}秒`}
+                </div>
+              )}
             </div>
           ) : (
             <div style={{ color: "#999", fontSize: 13 }}>
@@ -156,6 +156,7 @@ export interface ChanceListResponse {
   total: number;
   min_profit_rate: number;
   min_profit_amount: number;
+  next_cursor: string | null;
 }
 
 export interface YahooListing {
@@ -229,8 +230,38 @@ export interface NotificationListResponse {
   unread_count: number;
 }
 
+export interface SchedulerLeaderInfo {
+  owner: string;
+  expires_at: string;
+  heartbeat_at: string;
+}
+
+export interface SchedulerRun {
+  id: string;
+  trigger: string;
+  status: "queued" | "running" | "done" | "failed";
+  total: number;
+  done: number;
+  failed: number;
+  errors: string[];
+  eta_seconds: number | null;
+  started_at: string;
+  finished_at: string | null;
+}
+
+export interface RunNowResponse {
+  run_id: string | null;
+  already_running: boolean;
+  detail: string;
+}
+
 export interface SchedulerStatus {
   running: boolean;
-  interval_minutes: number;
+  tick_seconds: number;
+  min_interval_minutes: number;
+  max_interval_minutes: number;
   next_run: string | null;
+  owner: string;
+  is_leader: boolean;
+  leader: SchedulerLeaderInfo | null;
 }